@@ -9,10 +9,12 @@ import sys
 # Add the server directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'server'))
 
-from app import app
+from app import app, init_database
 
 if __name__ == '__main__':
     print("Starting Tourist Safety Management System (Flask Only)")
+    init_database()
     port = int(os.environ.get('PORT', 5000))
     print(f"Running on http://0.0.0.0:{port}")
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    # Development server only; see the Deployment section of the README for gunicorn
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG', '1').lower() in ('1', 'true', 'yes'))
\ No newline at end of file
@@ -4,24 +4,52 @@ Main application file with all endpoints and configuration.
 """
 
 import os
+import atexit
+import math
+import time
 import uuid
-from datetime import datetime, timezone
+import random
+import threading
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import List, Dict, Any, Optional
 import json
 
-from flask import Flask, request, jsonify, send_from_directory, send_file, Response, render_template, redirect, url_for, session, flash
+import click
+from flask import Flask, request, jsonify, send_from_directory, send_file, Response, render_template, redirect, url_for, session, flash, stream_with_context, g, has_request_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import text
+from sqlalchemy import text, insert, update, select, event, func, inspect, or_
+from sqlalchemy.orm import object_session
+from sqlalchemy.engine import Engine
 from pydantic import BaseModel, ValidationError
 import logging
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from io import BytesIO
+import hashlib
+import re
+
+from geofence import GeofenceIndex
+from proximity import ProximityIndex
+from dispatch import plan_dispatch
+from heatmap import HeatmapGrid, MAX_ZOOM as HEATMAP_MAX_ZOOM
+from location_buffer import LocationBuffer
+from location_history import HistoryStore, Chunk, DOWNSAMPLE_TIERS
+from background import PeriodicTask
+from events import EventBus, Event
+from stats import StatsCounters
+from deadlines import DeadlineWheel
+from safety_score import ScoreQueue, compute_score, STALENESS_PENALTY
+from itinerary import Gazetteer, ItineraryMonitor
+from identity import IdentityResolver, TouristIdentity
+from response_cache import ResponseCache
+from metrics import Metrics
+from sql_profile import QueryProfile, QueryBudgetExceeded, query_budget, DEFAULT_REPEAT_THRESHOLD
+from serialization import RowCache, dumps, encode_keyed, join_array
+from reports import render_summary_pdf
+from report_jobs import ReportJobManager
+from report_stream import StreamingPdf, Section, stream_csv, stream_ndjson
+from migrations import run_migrations
+from listing import (ListingError, encode_cursor, decode_cursor, parse_limit,
+                     parse_fields, parse_list, parse_bbox)
 
 # Initialize Flask app
 app = Flask(__name__, template_folder='../templates', static_folder='../static')
@@ -36,8 +64,62 @@ else:
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///tourist_safety.db'
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# Connections each process keeps open; under threaded workers this should be
+# at least the thread count (gunicorn.conf.py sets it from WEB_THREADS)
+if os.environ.get('DB_POOL_SIZE'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.environ['DB_POOL_SIZE']),
+        'pool_pre_ping': True
+    }
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
 
+# Write-behind location updates: fixes are buffered in memory and flushed in
+# batches. At most LOCATION_FLUSH_INTERVAL seconds of fixes can be lost on a crash.
+app.config['LOCATION_WRITE_BEHIND'] = os.environ.get('LOCATION_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+app.config['LOCATION_FLUSH_INTERVAL'] = float(os.environ.get('LOCATION_FLUSH_INTERVAL', '2.0'))
+app.config['LOCATION_FLUSH_THRESHOLD'] = int(os.environ.get('LOCATION_FLUSH_THRESHOLD', '500'))
+
+# Report rendering: background worker threads and the shared cache directory
+app.config['REPORT_WORKERS'] = int(os.environ.get('REPORT_WORKERS', '2'))
+app.config['REPORT_CACHE_DIR'] = os.environ.get('REPORT_CACHE_DIR')
+
+# Push events: 'local' delivers in-process only; 'database' relays events
+# through the event_outbox table so every worker process sees them
+app.config['EVENT_RELAY'] = os.environ.get('EVENT_RELAY', 'local')
+
+# Location history: trails older than this are purged
+app.config['LOCATION_HISTORY_RETENTION_DAYS'] = int(os.environ.get('LOCATION_HISTORY_RETENTION_DAYS', '30'))
+
+# Dispatch: with DISPATCH_AUTO, new alerts are assigned the nearest available
+# officer automatically; officers further than DISPATCH_MAX_DISTANCE metres are not considered
+app.config['DISPATCH_AUTO'] = os.environ.get('DISPATCH_AUTO', '').lower() in ('1', 'true', 'yes')
+app.config['DISPATCH_MAX_DISTANCE'] = float(os.environ.get('DISPATCH_MAX_DISTANCE', '20000'))
+
+# Missing tourists: a 'missing' alert is raised when a tourist sharing their
+# location sends no fix for this many minutes
+app.config['MISSING_AFTER_MINUTES'] = float(os.environ.get('MISSING_AFTER_MINUTES', '120'))
+
+# Itinerary deviation: a tourist further than ITINERARY_DEVIATION_RADIUS metres
+# from the place currently on their itinerary is off-plan. GAZETTEER_FILE adds
+# places (a JSON object of name -> [lat, lng]) to the built-in list
+app.config['ITINERARY_DEVIATION_RADIUS'] = float(os.environ.get('ITINERARY_DEVIATION_RADIUS', '5000'))
+app.config['GAZETTEER_FILE'] = os.environ.get('GAZETTEER_FILE')
+
+# Metrics: GET /metrics serves Prometheus-format metrics, behind a bearer token
+# when METRICS_TOKEN is set. Each /api request is written to the log with
+# probability REQUEST_LOG_SAMPLE (0 to 1); requests slower than REQUEST_LOG_SLOW_MS always are
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+app.config['REQUEST_LOG_SAMPLE'] = float(os.environ.get('REQUEST_LOG_SAMPLE', '0'))
+app.config['REQUEST_LOG_SLOW_MS'] = float(os.environ.get('REQUEST_LOG_SLOW_MS', '1000'))
+
+# SQL profiling (always on under app.testing): each request's statement count,
+# DB time and repeated statements are returned in an X-SQL-Profile header, a
+# statement repeated SQL_PROFILE_REPEAT_THRESHOLD times is logged as a likely N+1,
+# and going over an endpoint's @query_budget raises under test and logs otherwise
+app.config['SQL_PROFILE'] = os.environ.get('SQL_PROFILE', '').lower() in ('1', 'true', 'yes')
+app.config['SQL_PROFILE_REPEAT_THRESHOLD'] = int(os.environ.get('SQL_PROFILE_REPEAT_THRESHOLD', str(DEFAULT_REPEAT_THRESHOLD)))
+
 # Initialize SQLAlchemy
 db = SQLAlchemy(app)
 
@@ -55,6 +137,16 @@ class UpdateLocationRequest(BaseModel):
     lng: float
     location: Optional[str] = None
 
+class LocationFix(BaseModel):
+    touristId: str
+    lat: float
+    lng: float
+    timestamp: Optional[datetime] = None
+    location: Optional[str] = None
+
+class BatchLocationRequest(BaseModel):
+    fixes: List[Dict[str, Any]]
+
 class UserRegistration(BaseModel):
     username: str
     password: str
@@ -94,6 +186,11 @@ class Coordinate(BaseModel):
     lat: float
     lng: float
 
+class OfficerLocationRequest(BaseModel):
+    lat: float
+    lng: float
+    available: Optional[bool] = None
+
 class GeoZoneRequest(BaseModel):
     name: str
     type: str
@@ -131,7 +228,7 @@ class Tourist(db.Model):
     __tablename__ = 'tourists'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
     tourist_id = db.Column(db.String(255), unique=True, nullable=False)  # TID-2024-001523 format
     safety_score = db.Column(db.Numeric(5, 2), default=Decimal('85.00'))
     current_location = db.Column(db.Text)
@@ -140,15 +237,24 @@ class Tourist(db.Model):
     location_sharing = db.Column(db.Boolean, default=True)
     status = db.Column(db.String(50), default='safe')  # 'safe', 'caution', 'alert'
     valid_until = db.Column(db.DateTime)
-    emergency_contacts = db.Column(db.JSON, default=list)
-    itinerary = db.Column(db.JSON, default=list)
-    last_update = db.Column(db.DateTime, default=datetime.now)
+    last_update = db.Column(db.DateTime, default=datetime.now, index=True)
+    # Only location fixes move this (alerts move last_update too); registration counts as the first
+    last_fix_at = db.Column(db.DateTime, default=datetime.now)
+    missing_alert_fix = db.Column(db.DateTime)  # last_fix_at of the silence already alerted, see Missing-tourist detection
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')  # change sequence, see Delta sync
+    off_itinerary = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())  # see Itinerary deviation
     
     # Relationship
     alerts = db.relationship('Alert', backref='tourist')
+    # Child rows, loaded only when accessed (migration 0002 moved them out of JSON columns)
+    emergency_contacts = db.relationship('EmergencyContactEntry', order_by='EmergencyContactEntry.position',
+                                         cascade='all, delete-orphan', lazy='select')
+    itinerary = db.relationship('ItineraryEntry', order_by='ItineraryEntry.position',
+                                cascade='all, delete-orphan', lazy='select')
     
-    def to_dict(self):
-        return {
+    def to_dict(self, details=True):
+        """Tourist fields; details=False leaves out contacts and itinerary (two extra queries)"""
+        data = {
             'id': self.id,
             'userId': self.user_id,
             'touristId': self.tourist_id,
@@ -159,20 +265,73 @@ class Tourist(db.Model):
             'locationSharing': self.location_sharing,
             'status': self.status,
             'validUntil': self.valid_until.isoformat() if self.valid_until else None,
-            'emergencyContacts': self.emergency_contacts or [],
-            'itinerary': self.itinerary or [],
             'lastUpdate': self.last_update.isoformat() if self.last_update else None
         }
+        if details:
+            data['emergencyContacts'] = [contact.to_dict() for contact in self.emergency_contacts]
+            data['itinerary'] = [item.to_dict() for item in self.itinerary]
+        return data
+
+class ItineraryEntry(db.Model):
+    __tablename__ = 'itinerary_items'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tourist_id = db.Column(db.String(36), db.ForeignKey('tourists.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)  # display order, appended at max + 1
+    place = db.Column(db.Text, nullable=False)
+    date = db.Column(db.String(50))
+    time = db.Column(db.String(50))
+    notes = db.Column(db.Text)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    
+    __table_args__ = (
+        db.Index('ix_itinerary_items_tourist_position', 'tourist_id', 'position'),
+        db.Index('ix_itinerary_items_tourist_version', 'tourist_id', 'version'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'place': self.place,
+            'date': self.date,
+            'time': self.time,
+            'notes': self.notes
+        }
+
+class EmergencyContactEntry(db.Model):
+    __tablename__ = 'emergency_contacts'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tourist_id = db.Column(db.String(36), db.ForeignKey('tourists.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.Text, nullable=False)
+    phone = db.Column(db.Text, nullable=False)
+    relation = db.Column(db.Text)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    
+    __table_args__ = (
+        db.Index('ix_emergency_contacts_tourist_position', 'tourist_id', 'position'),
+        db.Index('ix_emergency_contacts_tourist_version', 'tourist_id', 'version'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'phone': self.phone,
+            'relation': self.relation
+        }
 
 class GeoZone(db.Model):
     __tablename__ = 'geo_zones'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.Text, nullable=False)
-    type = db.Column(db.String(50), nullable=False)  # 'safe', 'caution', 'restricted'
+    type = db.Column(db.String(50), nullable=False, index=True)  # 'safe', 'caution', 'restricted'
     coordinates = db.Column(db.JSON, nullable=False)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.now)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0', index=True)
     
     def to_dict(self):
         return {
@@ -199,6 +358,14 @@ class Alert(db.Model):
     responded_by = db.Column(db.String(36), db.ForeignKey('users.id'))
     created_at = db.Column(db.DateTime, default=datetime.now)
     resolved_at = db.Column(db.DateTime)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    
+    # Existing databases get these from migrations 0001 and 0003
+    __table_args__ = (
+        db.Index('ix_alerts_tourist_status_created', 'tourist_id', 'status', 'created_at'),
+        db.Index('ix_alerts_status_created', 'status', 'created_at'),
+        db.Index('ix_alerts_tourist_version', 'tourist_id', 'version'),
+    )
     
     def to_dict(self):
         return {
@@ -216,24 +383,1381 @@ class Alert(db.Model):
             'resolvedAt': self.resolved_at.isoformat() if self.resolved_at else None
         }
 
-# Request logging middleware
+class LocationChunk(db.Model):
+    __tablename__ = 'location_history_chunks'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    tourist_id = db.Column(db.String(255), db.ForeignKey('tourists.tourist_id'), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    resolution = db.Column(db.Integer, default=0)  # seconds between kept fixes, 0 = raw
+    count = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)  # packed arrays, see location_history.Chunk
+    
+    __table_args__ = (
+        db.Index('ix_location_history_tourist_start', 'tourist_id', 'start_time'),
+        db.Index('ix_location_history_end', 'end_time'),
+    )
+    
+    @classmethod
+    def from_chunk(cls, tourist_id, chunk):
+        return cls(
+            tourist_id=tourist_id,
+            start_time=datetime.fromtimestamp(chunk.start),
+            end_time=datetime.fromtimestamp(chunk.end),
+            resolution=chunk.resolution,
+            count=len(chunk),
+            data=chunk.encode()
+        )
+    
+    def to_chunk(self):
+        return Chunk.decode(self.data, self.count, self.resolution or 0)
+
+class EventOutbox(db.Model):
+    __tablename__ = 'event_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    topic = db.Column(db.String(100), nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    data = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.now, index=True)
+
+class OfficerLocation(db.Model):
+    __tablename__ = 'officer_locations'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    lat = db.Column(db.Numeric(10, 8), nullable=False)
+    lng = db.Column(db.Numeric(11, 8), nullable=False)
+    available = db.Column(db.Boolean, default=True)
+    updated_at = db.Column(db.DateTime, default=datetime.now, index=True)
+    
+    def to_dict(self):
+        return {
+            'userId': self.user_id,
+            'lat': str(self.lat) if self.lat is not None else None,
+            'lng': str(self.lng) if self.lng is not None else None,
+            'available': self.available,
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class SyncCounter(db.Model):
+    __tablename__ = 'sync_counter'
+    
+    id = db.Column(db.Integer, primary_key=True)  # single row, id 1
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    purged_through = db.Column(db.BigInteger, nullable=False, default=0)  # newest tombstone version purged
+
+class SyncTombstone(db.Model):
+    __tablename__ = 'sync_tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    entity = db.Column(db.String(50), nullable=False)  # 'tourist', 'alert', 'zone', 'itinerary', 'contact'
+    entity_id = db.Column(db.String(36), nullable=False)
+    tourist_id = db.Column(db.String(36))  # owning tourist, NULL for shared entities such as zones
+    version = db.Column(db.BigInteger, nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.now, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_sync_tombstones_tourist_version', 'tourist_id', 'version'),
+    )
+
+# Column projections for list endpoints: API field -> (column, formatter).
+# Formatters mirror to_dict() so projected rows serialize identically.
+def _str_or_none(value):
+    return str(value) if value else None
+
+def _iso_or_none(value):
+    return value.isoformat() if value else None
+
+TOURIST_FIELDS = {
+    'id': (Tourist.id, None),
+    'userId': (Tourist.user_id, None),
+    'touristId': (Tourist.tourist_id, None),
+    'safetyScore': (Tourist.safety_score, lambda value: str(value) if value else "85.00"),
+    'currentLocation': (Tourist.current_location, None),
+    'lastKnownLat': (Tourist.last_known_lat, _str_or_none),
+    'lastKnownLng': (Tourist.last_known_lng, _str_or_none),
+    'locationSharing': (Tourist.location_sharing, None),
+    'status': (Tourist.status, None),
+    'validUntil': (Tourist.valid_until, _iso_or_none),
+    'lastUpdate': (Tourist.last_update, _iso_or_none)
+}
+
+# Child-table fields: only returned when asked for with ?fields=, loaded per page
+TOURIST_DETAIL_FIELDS = {
+    'emergencyContacts': EmergencyContactEntry,
+    'itinerary': ItineraryEntry
+}
+
+def load_tourist_details(tourist_pks, names):
+    """{tourist pk: {field: [item dicts]}} for the given detail fields, one query per field and chunk"""
+    details = {pk: {name: [] for name in names} for pk in tourist_pks}
+    for name in names:
+        model = TOURIST_DETAIL_FIELDS[name]
+        for start in range(0, len(tourist_pks), IN_CLAUSE_CHUNK):
+            chunk = tourist_pks[start:start + IN_CLAUSE_CHUNK]
+            for entry in model.query.filter(model.tourist_id.in_(chunk)).order_by(model.tourist_id, model.position):
+                details[entry.tourist_id][name].append(entry.to_dict())
+    return details
+
+ALERT_FIELDS = {
+    'id': (Alert.id, None),
+    'touristId': (Alert.tourist_id, None),
+    'type': (Alert.type, None),
+    'severity': (Alert.severity, None),
+    'status': (Alert.status, None),
+    'location': (Alert.location, None),
+    'lat': (Alert.lat, _str_or_none),
+    'lng': (Alert.lng, _str_or_none),
+    'description': (Alert.description, None),
+    'respondedBy': (Alert.responded_by, None),
+    'createdAt': (Alert.created_at, _iso_or_none),
+    'resolvedAt': (Alert.resolved_at, _iso_or_none)
+}
+
+def projected_query(field_map, names):
+    """SELECT only the columns behind the given API fields, labelled by field name"""
+    return db.session.query(*[field_map[name][0].label(name) for name in names])
+
+def serialize_rows(rows, field_map, names):
+    formatters = [(name, field_map[name][1]) for name in names]
+    items = []
+    for row in rows:
+        mapping = row._mapping
+        items.append({name: fmt(mapping[name]) if fmt else mapping[name] for name, fmt in formatters})
+    return items
+
+# Fast serialization: list endpoints read (id, version) pairs first, reuse each
+# row's encoded JSON while its version is unchanged, and fetch and encode full
+# projected rows only for the rest, without building ORM instances
+row_cache = RowCache()
+
+def fetch_rows(query):
+    """Rows of a projected query executed as Core, skipping the ORM's per-row result processing"""
+    return db.session.connection().execute(query.statement).all()
+
+def fetch_keys(query, model, *extra):
+    """(id, version, *extra) rows of a filtered and ordered projected query"""
+    return fetch_rows(query.with_entities(model.id.label('id'), model.version.label('version'), *extra))
+
+def encode_keys(keys, query, model, field_map, names, fields, kind, bypass=None, overlay=None):
+    """Encoded JSON objects of ``fields`` for the rows of ``query`` listed in ``keys``.
+
+    ``query`` is the projected_query(field_map, names) the keys came from,
+    with the model's version column added.
+    """
+    def fetch(ids):
+        if ids is None:
+            return fetch_rows(query)
+        rows = []
+        for start in range(0, len(ids), IN_CLAUSE_CHUNK):
+            chunk = ids[start:start + IN_CLAUSE_CHUNK]
+            rows.extend(fetch_rows(projected_query(field_map, names).add_columns(model.version).filter(model.id.in_(chunk))))
+        return rows
+    
+    formatters = [(name, field_map[name][1]) for name in names]
+    return encode_keyed(keys, fetch, formatters, fields, row_cache, kind, bypass, overlay)
+
+def buffered_location_bypass():
+    """(bypass, overlay) for encode_keys over tourist keys that include touristId:
+    rows with an unflushed fix are encoded fresh with the fix applied"""
+    buffered = location_buffer.buffered_ids()
+    if not buffered:
+        return None, None
+    return (lambda key: key.touristId in buffered), overlay_buffered_location
+
+# Geofence engine
+geofence_index = GeofenceIndex()
+
+# Entering one of these zone types raises a geofence alert with this severity
+GEOFENCE_ALERT_SEVERITY = {
+    'restricted': 'high',
+    'caution': 'medium'
+}
+
+# Zones created or deleted by other worker processes are picked up this often
+GEOFENCE_REFRESH_INTERVAL = 5.0
+
+_geofence_state = {'watermark': None}
+
+def load_geo_zones():
+    """Zone rows in the shape GeofenceIndex.load expects"""
+    # Read the watermark first: a zone committed meanwhile is applied again, not missed
+    _geofence_state['watermark'] = db.session.query(func.max(GeoZone.version)).scalar() or 0
+    return db.session.query(GeoZone.id, GeoZone.type, GeoZone.name, GeoZone.coordinates).all()
+
+def refresh_geofence_index():
+    """Apply zones created, changed or deleted since the last refresh (possibly by other workers).
+
+    Sync versions become visible in commit order, so everything newer than the
+    watermark is exactly what this worker hasn't seen yet.
+    """
+    watermark = _geofence_state['watermark']
+    if watermark is None:
+        return
+    with app.app_context():
+        purged_through = db.session.query(SyncCounter.purged_through).filter_by(id=1).scalar() or 0
+        if watermark < purged_through:
+            # Deletions this old are no longer recorded; start over
+            geofence_index.load(load_geo_zones())
+            return
+        newest = watermark
+        for zone_id, zone_type, name, coordinates, version in db.session.query(
+            GeoZone.id, GeoZone.type, GeoZone.name, GeoZone.coordinates, GeoZone.version
+        ).filter(GeoZone.version > watermark):
+            geofence_index.add_zone(zone_id, zone_type, name, coordinates)
+            newest = max(newest, version)
+        for zone_id, version in db.session.query(SyncTombstone.entity_id, SyncTombstone.version).filter(
+            SyncTombstone.entity == 'zone', SyncTombstone.version > watermark
+        ):
+            geofence_index.remove_zone(zone_id)
+            newest = max(newest, version)
+    _geofence_state['watermark'] = newest
+
+geofence_refresh_task = PeriodicTask('geofence-refresh', GEOFENCE_REFRESH_INTERVAL, refresh_geofence_index)
+
+def zone_index():
+    """The geofence index, loaded and kept fresh from first use"""
+    geofence_index.ensure_loaded(load_geo_zones)
+    geofence_refresh_task.ensure_started()
+    return geofence_index
+
+def escalate_status(current, severity):
+    """Tourist status after an alert of the given severity"""
+    if severity in ['high', 'critical']:
+        return 'alert'
+    if severity == 'medium' and current != 'alert':
+        return 'caution'
+    return current
+
+def geofence_alerts(tourist_pk, location, old_lat, old_lng, new_lat, new_lng):
+    """Check a move against the zone index.
+
+    Returns (events, alerts, severities) where alerts are unsaved geofence
+    Alert rows for every caution/restricted zone entered.
+    """
+    entered, exited = zone_index().transition(old_lat, old_lng, new_lat, new_lng)
+    
+    events = []
+    alerts = []
+    severities = []
+    for zone in entered:
+        events.append({'event': 'enter', 'zoneId': zone.id, 'zoneName': zone.name, 'zoneType': zone.type})
+        severity = GEOFENCE_ALERT_SEVERITY.get(zone.type)
+        if not severity:
+            continue
+        
+        alert = Alert()
+        alert.tourist_id = tourist_pk
+        alert.type = 'geofence'
+        alert.severity = severity
+        alert.status = 'active'
+        alert.location = location
+        alert.lat = new_lat
+        alert.lng = new_lng
+        alert.description = f"Entered {zone.type} zone: {zone.name}"
+        alerts.append(alert)
+        severities.append(severity)
+    
+    for zone in exited:
+        events.append({'event': 'exit', 'zoneId': zone.id, 'zoneName': zone.name, 'zoneType': zone.type})
+    
+    if events:
+        mark_score(tourist_pk)
+    
+    return events, alerts, severities
+
+def geofence_event_batch(tourist_pk, events):
+    """publish_events entries for enter/exit events from geofence_alerts"""
+    return [
+        (['police', f"tourist:{tourist_pk}"], f"geofence.{event['event']}", {
+            'touristId': tourist_pk,
+            'zoneId': event['zoneId'],
+            'zoneName': event['zoneName'],
+            'zoneType': event['zoneType']
+        })
+        for event in events
+    ]
+
+def evaluate_geofence(tourist, old_lat, old_lng):
+    """Stage geofence alerts for a tourist whose new position is already set.
+
+    Must be called before the session is committed. Returns the enter/exit
+    events and the staged alerts, to be published once committed.
+    """
+    events, alerts, severities = geofence_alerts(
+        tourist.id, tourist.current_location, old_lat, old_lng,
+        tourist.last_known_lat, tourist.last_known_lng
+    )
+    for alert in alerts:
+        db.session.add(alert)
+    for severity in severities:
+        tourist.status = escalate_status(tourist.status, severity)
+    return events, alerts
+
+# Proximity search over tourist positions
+proximity_index = ProximityIndex()
+
+# Positions written by other worker processes are picked up this often
+PROXIMITY_REFRESH_INTERVAL = 5.0
+# Refreshes re-read this far behind the watermark so slow commits aren't missed
+PROXIMITY_REFRESH_OVERLAP = 30
+
+MAX_NEARBY_RADIUS = 50000
+MAX_NEARBY_RESULTS = 1000
+DEFAULT_NEARBY_RADIUS = 1000
+
+_proximity_state = {'watermark': None}
+
+def load_tourist_positions():
+    """(tourist_id, lat, lng) rows for every tourist with a known position"""
+    _proximity_state['watermark'] = datetime.now()
+    return db.session.query(Tourist.tourist_id, Tourist.last_known_lat, Tourist.last_known_lng).filter(
+        Tourist.last_known_lat.isnot(None), Tourist.last_known_lng.isnot(None)
+    ).all()
+
+def refresh_proximity_index():
+    """Apply positions committed since the last refresh (possibly by other workers)"""
+    watermark = _proximity_state['watermark']
+    if watermark is None:
+        return
+    with app.app_context():
+        now = datetime.now()
+        rows = db.session.query(Tourist.tourist_id, Tourist.last_known_lat, Tourist.last_known_lng).filter(
+            Tourist.last_update >= watermark - timedelta(seconds=PROXIMITY_REFRESH_OVERLAP)
+        ).all()
+    for tourist_id, lat, lng in rows:
+        # A buffered fix is newer than anything in the database
+        if location_buffer.get(tourist_id) is None:
+            proximity_index.update(tourist_id, lat, lng)
+    _proximity_state['watermark'] = now
+
+proximity_refresh_task = PeriodicTask('proximity-refresh', PROXIMITY_REFRESH_INTERVAL, refresh_proximity_index)
+
+def nearby_index():
+    """The proximity index, loaded and kept fresh from first use"""
+    proximity_index.ensure_loaded(load_tourist_positions)
+    proximity_refresh_task.ensure_started()
+    return proximity_index
+
+def track_position(tourist_id, lat, lng, status=None):
+    """Record a committed or buffered fix: proximity index, heatmap and missing-tourist deadline"""
+    arm_missing_deadline(tourist_id)
+    if proximity_index.loaded:
+        proximity_index.update(tourist_id, lat, lng)
+    if heatmap_grid.loaded:
+        if status is None:
+            heatmap_grid.move(('tourist', tourist_id), lat, lng)
+        else:
+            heatmap_grid.update(('tourist', tourist_id), lat, lng, tourist_heat_category(status))
+
+def _float_arg(name, default=None):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        raise ListingError(f'Invalid {name}')
+    if not math.isfinite(number):
+        raise ListingError(f'Invalid {name}')
+    return number
+
+def nearby_tourists(lat, lng, exclude=()):
+    """Tourists near a point: ?k= nearest, or all within ?radius= metres"""
+    radius = _float_arg('radius')
+    if radius is not None and not 0 < radius <= MAX_NEARBY_RADIUS:
+        raise ListingError(f'radius must be between 0 and {MAX_NEARBY_RADIUS} metres')
+    k = request.args.get('k')
+    fields = parse_fields(request.args.get('fields'), TOURIST_FIELDS) if request.args.get('fields') else []
+
+    index = nearby_index()
+    if k is not None:
+        try:
+            k = int(k)
+        except ValueError:
+            raise ListingError('Invalid k')
+        if not 0 < k <= MAX_NEARBY_RESULTS:
+            raise ListingError(f'k must be between 1 and {MAX_NEARBY_RESULTS}')
+        matches = index.nearest(lat, lng, k, max_radius_m=radius, exclude=exclude)
+    else:
+        limit = min(parse_limit(request.args.get('limit')), MAX_NEARBY_RESULTS)
+        matches = index.within(lat, lng, radius or DEFAULT_NEARBY_RADIUS, limit=limit, exclude=exclude)
+
+    results = []
+    for tourist_id, distance in matches:
+        position = index.get(tourist_id)
+        if position is None:
+            continue
+        results.append({
+            'touristId': tourist_id,
+            'distance': round(distance, 1),
+            'lat': position[0],
+            'lng': position[1]
+        })
+
+    if fields and results:
+        # Requested tourist columns come from the database, one IN query per chunk
+        names = fields + ['touristId'] if 'touristId' not in fields else fields
+        details = {}
+        tids = [r['touristId'] for r in results]
+        for start in range(0, len(tids), IN_CLAUSE_CHUNK):
+            query = projected_query(TOURIST_FIELDS, names).filter(Tourist.tourist_id.in_(tids[start:start + IN_CLAUSE_CHUNK]))
+            for item in serialize_rows(query.all(), TOURIST_FIELDS, names):
+                details[item['touristId']] = overlay_buffered_location(item)
+        for result in results:
+            item = details.get(result['touristId'], {})
+            result.update({name: item.get(name) for name in fields if name != 'touristId'})
+
+    return {
+        'center': {'lat': lat, 'lng': lng},
+        'radius': radius if k is not None else (radius or DEFAULT_NEARBY_RADIUS),
+        'count': len(results),
+        'results': results
+    }
+
+# Push event bus
+event_bus = EventBus()
+
+# How often each worker polls the outbox when EVENT_RELAY is 'database'
+EVENT_RELAY_INTERVAL = 0.5
+# Relayed events are kept this long for Last-Event-ID replay
+EVENT_OUTBOX_RETENTION = timedelta(hours=1)
+
+_relay_state = {'cursor': None, 'polls': 0}
+
+def poll_event_outbox():
+    """Deliver events written by any worker since the last poll"""
+    with app.app_context():
+        rows = EventOutbox.query.filter(EventOutbox.id > _relay_state['cursor']).order_by(EventOutbox.id).limit(500).all()
+        if rows:
+            event_bus.deliver([Event(r.id, r.topic, r.type, r.data) for r in rows])
+            _relay_state['cursor'] = rows[-1].id
+        
+        _relay_state['polls'] += 1
+        if _relay_state['polls'] % 1000 == 0:
+            EventOutbox.query.filter(EventOutbox.created_at < datetime.now() - EVENT_OUTBOX_RETENTION).delete()
+            db.session.commit()
+        db.session.remove()
+
+event_relay_task = PeriodicTask('event-relay', EVENT_RELAY_INTERVAL, poll_event_outbox)
+
+def start_event_relay():
+    """Start polling the outbox from its current end (needs an app context)"""
+    if _relay_state['cursor'] is None:
+        _relay_state['cursor'] = db.session.query(db.func.max(EventOutbox.id)).scalar() or 0
+    event_relay_task.ensure_started()
+
+def publish_event(topics, event_type, data):
+    """Publish an event to push subscribers. Call only after the change is committed."""
+    publish_events([(topics, event_type, data)])
+
+def publish_events(batch):
+    """Publish (topics, event_type, data) events; relayed events share one commit"""
+    if not batch:
+        return
+    if app.config['EVENT_RELAY'] == 'database':
+        try:
+            # One multi-row INSERT for the whole batch
+            now = datetime.now()
+            db.session.execute(insert(EventOutbox), [
+                {'topic': topic, 'type': event_type, 'data': data, 'created_at': now}
+                for topics, event_type, data in batch for topic in topics
+            ])
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Event publish error: {str(e)}")
+            db.session.rollback()
+        return
+    
+    for topics, event_type, data in batch:
+        for topic in topics:
+            event_bus.publish(topic, event_type, data)
+
+def publish_alert(event_type, alert_data):
+    """Push an alert to police and to the tourist it concerns"""
+    publish_event(['police', f"tourist:{alert_data['touristId']}"], event_type, alert_data)
+    mark_score(alert_data['touristId'])
+    # New alerts need an officer; resolved ones free one up
+    if event_type == 'alert.created' or alert_data.get('status') == 'resolved':
+        request_dispatch()
+
+def replay_events(topics, after_id):
+    if app.config['EVENT_RELAY'] == 'database':
+        rows = EventOutbox.query.filter(
+            EventOutbox.id > after_id,
+            EventOutbox.topic.in_(list(topics))
+        ).order_by(EventOutbox.id).limit(500).all()
+        return [Event(r.id, r.topic, r.type, r.data) for r in rows]
+    return event_bus.replay(topics, after_id)
+
+# Server-Sent Events: heartbeat interval, and how long one stream is held
+# before the client is asked to reconnect (freeing the worker thread)
+SSE_HEARTBEAT = 15.0
+SSE_MAX_DURATION = 300.0
+
+def event_stream(topics):
+    """Server-Sent Events response for the given topics, resuming from Last-Event-ID"""
+    if app.config['EVENT_RELAY'] == 'database':
+        start_event_relay()
+    
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = None
+    
+    # Subscribe before replaying so nothing falls between the two
+    sub = event_bus.subscribe(topics)
+    backlog = replay_events(topics, last_id) if last_id is not None else []
+    
+    def generate():
+        with sub:
+            yield 'retry: 3000\n\n'
+            last = last_id
+            for event in backlog:
+                yield event.to_sse()
+                last = event.id
+            
+            deadline = time.monotonic() + SSE_MAX_DURATION
+            while time.monotonic() < deadline:
+                event = sub.get(timeout=SSE_HEARTBEAT)
+                if event is None:
+                    if sub.overflowed or sub.closed:
+                        return
+                    yield ': keep-alive\n\n'
+                    continue
+                if last is not None and event.id <= last:
+                    continue
+                yield event.to_sse()
+                last = event.id
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# Police statistics: counters maintained from committed writes
+STATS_CACHE_TTL = 2.0
+STATS_RECONCILE_INTERVAL = 60.0
+
+def stats_aggregates():
+    """Authoritative statistics straight from SQL aggregates"""
+    tourists, score_sum = db.session.query(func.count(Tourist.id), func.sum(Tourist.safety_score)).one()
+    return {
+        'tourists': tourists,
+        'score_sum': score_sum,
+        'active_alerts': db.session.query(func.count(Alert.id)).filter(Alert.status == 'active').scalar(),
+        'restricted_zones': db.session.query(func.count(GeoZone.id)).filter(GeoZone.type == 'restricted').scalar()
+    }
+
+police_stats = StatsCounters(stats_aggregates, cache_ttl=STATS_CACHE_TTL)
+
+def reconcile_stats():
+    with app.app_context():
+        police_stats.reconcile()
+
+stats_reconcile_task = PeriodicTask('stats-reconcile', STATS_RECONCILE_INTERVAL, reconcile_stats)
+
+def current_stats():
+    """Police dashboard statistics in O(1)"""
+    stats_reconcile_task.ensure_started()
+    return police_stats.snapshot()
+
+def _old_and_new(obj, attr):
+    """(changed, old, new) for an attribute in the current flush; old is
+    Ellipsis when it was never loaded and can't be known"""
+    history = inspect(obj).attrs[attr].history
+    if not history.added and not history.deleted:
+        return False, None, None
+    old = history.deleted[0] if history.deleted else ...
+    new = history.added[0] if history.added else None
+    return True, old, new
+
+@event.listens_for(db.session, 'after_flush')
+def track_stats_changes(session, flush_context):
+    """Collect counter deltas for this transaction; applied on commit"""
+    delta = session.info.setdefault('stats_delta', {})
+    
+    def add(key, value):
+        delta[key] = delta.get(key, 0) + value
+    
+    def score(value):
+        return Decimal(str(value)) if value is not None else Decimal('0')
+    
+    for obj in session.new:
+        if isinstance(obj, Tourist):
+            add('tourists', 1)
+            add('score_sum', score(obj.safety_score))
+        elif isinstance(obj, Alert) and (obj.status or 'active') == 'active':
+            add('active_alerts', 1)
+        elif isinstance(obj, GeoZone) and obj.type == 'restricted':
+            add('restricted_zones', 1)
+    
+    for obj in session.deleted:
+        if isinstance(obj, Tourist):
+            add('tourists', -1)
+            add('score_sum', -score(obj.safety_score))
+        elif isinstance(obj, Alert) and obj.status == 'active':
+            add('active_alerts', -1)
+        elif isinstance(obj, GeoZone) and obj.type == 'restricted':
+            add('restricted_zones', -1)
+    
+    for obj in session.dirty:
+        if isinstance(obj, Tourist):
+            changed, old, new = _old_and_new(obj, 'safety_score')
+            if changed:
+                if old is ...:
+                    session.info['stats_stale'] = True
+                else:
+                    add('score_sum', score(new) - score(old))
+        elif isinstance(obj, Alert):
+            changed, old, new = _old_and_new(obj, 'status')
+            if changed:
+                if old is ...:
+                    session.info['stats_stale'] = True
+                else:
+                    add('active_alerts', (new == 'active') - (old == 'active'))
+        elif isinstance(obj, GeoZone):
+            changed, old, new = _old_and_new(obj, 'type')
+            if changed:
+                if old is ...:
+                    session.info['stats_stale'] = True
+                else:
+                    add('restricted_zones', (new == 'restricted') - (old == 'restricted'))
+
+@event.listens_for(db.session, 'after_commit')
+def apply_stats_changes(session):
+    police_stats.apply(session.info.pop('stats_delta', None))
+    if session.info.pop('stats_stale', False):
+        # A change we couldn't diff; let the reconciler catch up now
+        stats_reconcile_task.wake()
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_stats_changes(session):
+    session.info.pop('stats_delta', None)
+    session.info.pop('stats_stale', None)
+
+# Delta sync: every write to a synced entity is stamped with a change version
+# taken from one counter row. Rows are stamped as the last step before COMMIT,
+# so the counter row is locked only between that step and the commit rather
+# than for the whole writing transaction; versions still become visible in
+# commit order, so a client that has seen version V misses nothing by asking
+# for everything newer. Deletions leave tombstones.
+SYNCED_MODELS = {
+    Tourist: 'tourist',
+    Alert: 'alert',
+    GeoZone: 'zone',
+    ItineraryEntry: 'itinerary',
+    EmergencyContactEntry: 'contact'
+}
+
+# Tombstones are kept this long; clients further behind get a full snapshot
+SYNC_TOMBSTONE_RETENTION = timedelta(days=30)
+SYNC_PURGE_INTERVAL = 3600.0
+
+def next_sync_version(connection):
+    table = SyncCounter.__table__
+    version = connection.execute(
+        table.update().where(table.c.id == 1).values(value=table.c.value + 1).returning(table.c.value)
+    ).scalar()
+    if version is None:
+        connection.execute(table.insert().values(id=1, value=1, purged_through=0))
+        version = 1
+    return version
+
+def note_sync_changes(model, ids, session=None):
+    """Stamp these rows with the transaction's change version when it commits.
+
+    The flush hooks cover ORM writes; bulk UPDATEs must call this themselves.
+    """
+    changes = (session or db.session).info.setdefault('sync_changes', {})
+    changes.setdefault(model.__table__, set()).update(ids)
+
+@event.listens_for(db.session, 'after_flush')
+def track_sync_changes(session, flush_context):
+    changed = [obj for obj in session.new if type(obj) in SYNCED_MODELS]
+    changed += [
+        obj for obj in session.dirty
+        if type(obj) in SYNCED_MODELS and session.is_modified(obj, include_collections=False)
+    ]
+    for obj in changed:
+        note_sync_changes(type(obj), [obj.id], session)
+
+@event.listens_for(db.session, 'before_commit')
+def stamp_sync_versions(session):
+    # Flush now so whatever the commit would flush is stamped too
+    session.flush()
+    changes = session.info.pop('sync_changes', None)
+    if not changes:
+        return
+    connection = session.connection()
+    version = next_sync_version(connection)
+    # The rows are already locked by this transaction, so nothing here waits
+    for table, ids in changes.items():
+        ids = list(ids)
+        for start in range(0, len(ids), IN_CLAUSE_CHUNK):
+            connection.execute(
+                table.update().where(table.c.id.in_(ids[start:start + IN_CLAUSE_CHUNK])).values(version=version)
+            )
+
+def record_tombstone(mapper, connection, target):
+    """Runs for explicit deletes and delete-orphan cascades alike"""
+    session = object_session(target)
+    entity = SYNCED_MODELS[type(target)]
+    owner = target.id if entity == 'tourist' else getattr(target, 'tourist_id', None)
+    result = connection.execute(SyncTombstone.__table__.insert().values(
+        entity=entity,
+        entity_id=target.id,
+        tourist_id=owner,
+        version=0,
+        deleted_at=datetime.now()
+    ))
+    note_sync_changes(SyncTombstone, result.inserted_primary_key, session)
+    session.info['sync_tombstones'] = True
+
+for _model in SYNCED_MODELS:
+    event.listen(_model, 'after_delete', record_tombstone)
+
+@event.listens_for(db.session, 'after_commit')
+def start_tombstone_purge(session):
+    if session.info.pop('sync_tombstones', False):
+        sync_purge_task.ensure_started()
+
+@event.listens_for(db.session, 'after_transaction_end')
+def release_sync_changes(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('sync_changes', None)
+        session.info.pop('sync_tombstones', None)
+
+def purge_sync_tombstones():
+    """Drop expired tombstones, remembering the newest version dropped"""
+    with app.app_context():
+        try:
+            cutoff = datetime.now() - SYNC_TOMBSTONE_RETENTION
+            newest = db.session.query(func.max(SyncTombstone.version)).filter(SyncTombstone.deleted_at < cutoff).scalar()
+            if newest is None:
+                return
+            SyncTombstone.query.filter(SyncTombstone.version <= newest).delete(synchronize_session=False)
+            SyncCounter.query.filter(SyncCounter.id == 1, SyncCounter.purged_through < newest).update(
+                {'purged_through': newest}, synchronize_session=False
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+sync_purge_task = PeriodicTask('sync-tombstones', SYNC_PURGE_INTERVAL, purge_sync_tombstones)
+
+# Response cache: serialized bodies of hot read endpoints, dropped when a
+# committed write touches the resource sets they were built from
+response_cache = ResponseCache()
+
+def note_cache_changes(resources, session=None):
+    """Invalidate resource sets when the current transaction commits.
+
+    The flush hooks cover ORM writes; bulk UPDATEs must call this themselves.
+    """
+    (session or db.session).info.setdefault('cache_changes', set()).update(resources)
+
+def shared_cache_stamp():
+    """With several worker processes (EVENT_RELAY=database) writes made elsewhere
+    only show up in the sync counter, so cached bodies are also keyed by it"""
+    if app.config['EVENT_RELAY'] != 'database':
+        return None
+    return db.session.query(SyncCounter.value).filter_by(id=1).scalar()
+
+def cached_response(key, build):
+    """Serve ``key`` from the response cache, or from ``build() -> (payload, resources)``.
+
+    payload may already be encoded JSON bytes. build may return (None, None)
+    for a missing entity; the caller then gets None.
+    A current entry answers If-None-Match with a 304 without running any query.
+    """
+    shared = shared_cache_stamp()
+    entry = response_cache.get(key, shared)
+    if entry is None:
+        as_of = response_cache.snapshot()
+        payload, resources = build()
+        if payload is None:
+            return None
+        body = payload if isinstance(payload, bytes) else dumps(payload)
+        entry = response_cache.put(key, body, resources, as_of, shared)
+    
+    if entry.etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    # Revalidate every time; unchanged data costs a 304
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@event.listens_for(db.session, 'after_flush')
+def track_cache_changes(session, flush_context):
+    changes = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Tourist):
+            changes.update(('tourists', f"tourist:{obj.id}", f"tourist:{obj.tourist_id}"))
+        elif isinstance(obj, (ItineraryEntry, EmergencyContactEntry)):
+            changes.update(('tourists', f"tourist:{obj.tourist_id}"))
+        elif isinstance(obj, Alert):
+            changes.add('alerts')
+        elif isinstance(obj, GeoZone):
+            changes.add('zones')
+    if changes:
+        note_cache_changes(changes, session)
+
+@event.listens_for(db.session, 'after_commit')
+def apply_cache_changes(session):
+    changes = session.info.pop('cache_changes', None)
+    if changes:
+        response_cache.invalidate(changes)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_cache_changes(session):
+    session.info.pop('cache_changes', None)
+
+# Safety scores: events mark the tourists they affect, and a background batch
+# recomputes just those tourists from their current alerts, zones and last fix
+score_queue = ScoreQueue()
+
+SCORE_INTERVAL = 2.0
+# Tourists recomputed per batch; the rest wait for the next run
+MAX_SCORE_BATCH = 2000
+# How often tourists crossing a staleness threshold are looked for
+SCORE_SWEEP_INTERVAL = 60.0
+
+_score_state = {'swept_at': None}
+
+def mark_score(tourist_pk):
+    """Queue a tourist (by primary key) for a score recompute"""
+    score_queue.mark(tourist_pk)
+    score_task.ensure_started()
+
+def note_location_fix(tourist_pk, previous_update):
+    """A fresh fix only changes the score when the tourist had gone stale"""
+    if previous_update is None or (datetime.now() - previous_update).total_seconds() >= STALENESS_PENALTY[0][0]:
+        mark_score(tourist_pk)
+
+def sweep_stale_scores(now):
+    """Mark tourists whose last fix crossed a staleness threshold since the previous sweep"""
+    previous = _score_state['swept_at']
+    _score_state['swept_at'] = now
+    if previous is None:
+        return
+    for threshold, _ in STALENESS_PENALTY:
+        age = timedelta(seconds=threshold)
+        score_queue.mark_many(row[0] for row in db.session.query(Tourist.id).filter(
+            Tourist.last_update > previous - age,
+            Tourist.last_update <= now - age
+        ))
+
+def recompute_scores():
+    """Recompute the scores of pending tourists; returns how many changed"""
+    now = datetime.now()
+    with app.app_context():
+        swept_at = _score_state['swept_at']
+        if swept_at is None or (now - swept_at).total_seconds() >= SCORE_SWEEP_INTERVAL:
+            sweep_stale_scores(now)
+        
+        pending = score_queue.drain(MAX_SCORE_BATCH)
+        if not pending:
+            return 0
+        try:
+            ids = list(pending)
+            rows = []
+            severities = {}
+            for start in range(0, len(ids), IN_CLAUSE_CHUNK):
+                chunk = ids[start:start + IN_CLAUSE_CHUNK]
+                rows.extend(db.session.query(
+                    Tourist.id, Tourist.last_known_lat, Tourist.last_known_lng, Tourist.last_update,
+                    Tourist.safety_score, Tourist.off_itinerary
+                ).filter(Tourist.id.in_(chunk)))
+                for tourist_pk, severity in db.session.query(Alert.tourist_id, Alert.severity).filter(
+                    Alert.tourist_id.in_(chunk), Alert.status.in_(OPEN_ALERT_STATUSES)
+                ):
+                    severities.setdefault(tourist_pk, []).append(severity)
+            
+            zones_now = zone_index()
+            params = []
+            score_delta = Decimal('0')
+            for row in rows:
+                zones = [zones_now.get(zone_id) for zone_id in zones_now.locate(row.last_known_lat, row.last_known_lng)]
+                age = (now - row.last_update).total_seconds() if row.last_update else None
+                score = compute_score(
+                    severities.get(row.id, ()),
+                    [zone.type for zone in zones if zone is not None],
+                    age,
+                    row.off_itinerary
+                )
+                if score != row.safety_score:
+                    params.append({'id': row.id, 'safety_score': score})
+                    score_delta += score - (row.safety_score or Decimal('0'))
+            
+            if params:
+                db.session.execute(update(Tourist), params)
+                note_sync_changes(Tourist, [p['id'] for p in params])
+                # Bulk updates bypass the flush hooks, so hand the stats counters the delta directly
+                stats_delta = db.session.info.setdefault('stats_delta', {})
+                stats_delta['score_sum'] = stats_delta.get('score_sum', 0) + score_delta
+                note_cache_changes(['tourists'] + [f"tourist:{p['id']}" for p in params])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            score_queue.requeue(pending)
+            raise
+    
+    if len(score_queue):
+        score_task.wake()
+    return len(params)
+
+score_task = PeriodicTask('safety-score', SCORE_INTERVAL, recompute_scores)
+
+# Itinerary deviation: itineraries are compiled once into time windows with
+# gazetteer coordinates, and each fix is checked against the window open at its time
+gazetteer = Gazetteer()
+if app.config['GAZETTEER_FILE']:
+    gazetteer.load_file(app.config['GAZETTEER_FILE'])
+itinerary_monitor = ItineraryMonitor(gazetteer, app.config['ITINERARY_DEVIATION_RADIUS'])
+
+def preload_itineraries(tourist_pks):
+    """Compile the plans of tourists not cached yet, one query per chunk"""
+    missing = [pk for pk in tourist_pks if not itinerary_monitor.has_plan(pk)]
+    for start in range(0, len(missing), IN_CLAUSE_CHUNK):
+        chunk = missing[start:start + IN_CLAUSE_CHUNK]
+        items = {pk: [] for pk in chunk}
+        for tourist_pk, place, date, time_text in db.session.query(
+            ItineraryEntry.tourist_id, ItineraryEntry.place, ItineraryEntry.date, ItineraryEntry.time
+        ).filter(ItineraryEntry.tourist_id.in_(chunk)):
+            items[tourist_pk].append((place, date, time_text))
+        for tourist_pk, plan_items in items.items():
+            itinerary_monitor.store(tourist_pk, plan_items)
+
+def check_itinerary(tourist_pk, ts, lat, lng, status, off_plan):
+    """Check a fix against the tourist's plan before commit.
+
+    ``off_plan`` is the flag stored on the tourist row. A change is claimed
+    by a conditional update of that flag, so when workers race on fixes for
+    the same tourist only the one whose update matches reports it.
+    Going off-plan raises the status to 'caution'; returning lowers it to
+    'safe' again unless something else still calls for caution.
+    Returns (status, change): the status to store and the deviation change
+    to hand to apply_itinerary_change once committed, or None.
+    """
+    change = itinerary_monitor.check(tourist_pk, ts.timestamp(), lat, lng, off_plan)
+    if change is None:
+        return status, None
+    claimed = db.session.execute(
+        update(Tourist)
+        .where(Tourist.id == tourist_pk, Tourist.off_itinerary == (not change['offPlan']))
+        .values(off_itinerary=change['offPlan'])
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        return status, None
+    if change['offPlan']:
+        status = escalate_status(status, 'medium')
+        logger.info(f"Itinerary deviation: tourist {tourist_pk} is {change['distance']}m from {change['place']}")
+    elif status == 'caution' and not caution_from_elsewhere(tourist_pk, lat, lng):
+        status = 'safe'
+    return status, change
+
+def caution_from_elsewhere(tourist_pk, lat, lng):
+    """Whether the zone a tourist is in, or an open alert of theirs, calls for 'caution'"""
+    zones = zone_index()
+    for zone_id in zones.locate(lat, lng):
+        zone = zones.get(zone_id)
+        if zone is not None and GEOFENCE_ALERT_SEVERITY.get(zone.type):
+            return True
+    # Staged alerts for this fix are flushed first, so they count too
+    return db.session.query(Alert.id).filter(
+        Alert.tourist_id == tourist_pk,
+        Alert.status.in_(OPEN_ALERT_STATUSES),
+        Alert.severity != 'low'
+    ).first() is not None
+
+def apply_itinerary_change(tourist_pk, change):
+    """Rescore a tourist after a committed deviation change and tell push subscribers"""
+    mark_score(tourist_pk)
+    publish_event(['police', f"tourist:{tourist_pk}"], 'itinerary.deviation', dict(change, touristId=tourist_pk))
+
+# Missing-tourist detection: one deadline per tourist, re-armed by every fix
+missing_deadlines = DeadlineWheel()
+
+MISSING_CHECK_INTERVAL = 30.0
+
+def missing_after():
+    return app.config['MISSING_AFTER_MINUTES'] * 60
+
+def load_missing_deadlines():
+    """(tourist_id, deadline) for every tourist sharing their location"""
+    after = missing_after()
+    rows = db.session.query(Tourist.tourist_id, Tourist.last_fix_at).filter(
+        Tourist.location_sharing.isnot(False), Tourist.last_fix_at.isnot(None)
+    ).all()
+    return [(tourist_id, last_fix_at.timestamp() + after) for tourist_id, last_fix_at in rows]
+
+def arm_missing_deadline(tourist_id, ts=None):
+    """Push back a tourist's missing deadline after a fix at ``ts`` (default now)"""
+    if missing_deadlines.loaded:
+        missing_deadlines.arm(tourist_id, (ts if ts is not None else time.time()) + missing_after())
+
+def claim_missing_alert(tourist_pk, last_fix):
+    """Claim the 'missing' alert for the silence since ``last_fix``.
+
+    A conditional update, so of several workers checking the same tourist
+    only one raises the alert; fails too once a newer fix has been written.
+    """
+    return db.session.execute(
+        update(Tourist)
+        .where(
+            Tourist.id == tourist_pk,
+            Tourist.last_fix_at == last_fix,
+            or_(Tourist.missing_alert_fix.is_(None), Tourist.missing_alert_fix != last_fix)
+        )
+        .values(missing_alert_fix=last_fix)
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+
+def detect_missing_tourists():
+    """Raise 'missing' alerts for tourists whose deadline expired; returns the alerts raised"""
+    after = missing_after()
+    with app.app_context():
+        missing_deadlines.ensure_loaded(load_missing_deadlines)
+        expired = missing_deadlines.expired(time.time())
+        if not expired:
+            return []
+        
+        now = datetime.now()
+        raised = []
+        try:
+            for start in range(0, len(expired), IN_CLAUSE_CHUNK):
+                tourists = Tourist.query.filter(Tourist.tourist_id.in_(expired[start:start + IN_CLAUSE_CHUNK])).all()
+                for tourist in tourists:
+                    if tourist.location_sharing is False or (tourist.valid_until and tourist.valid_until < now):
+                        continue
+                    # The deadline may be out of date: fixes can land in another worker or the write-behind buffer
+                    fix = location_buffer.get(tourist.tourist_id)
+                    last_fix = fix.timestamp if fix is not None else tourist.last_fix_at
+                    if last_fix is None:
+                        continue
+                    if (now - last_fix).total_seconds() < after:
+                        missing_deadlines.arm(tourist.tourist_id, last_fix.timestamp() + after)
+                        continue
+                    if not claim_missing_alert(tourist.id, tourist.last_fix_at):
+                        continue
+                    
+                    alert = Alert()
+                    alert.tourist_id = tourist.id
+                    alert.type = 'missing'
+                    alert.severity = 'high'
+                    alert.status = 'active'
+                    alert.location = tourist.current_location
+                    alert.lat = tourist.last_known_lat
+                    alert.lng = tourist.last_known_lng
+                    alert.description = f"No location update since {last_fix.strftime('%Y-%m-%d %H:%M')}"
+                    db.session.add(alert)
+                    tourist.status = escalate_status(tourist.status, alert.severity)
+                    raised.append(alert)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Check them again on the next tick
+            for tourist_id in expired:
+                missing_deadlines.arm(tourist_id, time.time())
+            raise
+        
+        for alert in raised:
+            publish_alert('alert.created', alert.to_dict())
+        if raised:
+            logger.info(f"Raised {len(raised)} missing-tourist alerts")
+        return raised
+
+missing_detector_task = PeriodicTask('missing-detector', MISSING_CHECK_INTERVAL, detect_missing_tourists)
+
+# Officer dispatch
+# Officers who haven't reported a position for this long are not dispatched
+OFFICER_LOCATION_MAX_AGE = timedelta(minutes=10)
+# An officer assigned to an alert in one of these states is busy
+OPEN_ALERT_STATUSES = ['active', 'investigating']
+# Open alerts considered by one dispatch run, oldest first
+MAX_DISPATCH_BATCH = 500
+# With DISPATCH_AUTO, pending alerts are retried this often as officers free up
+DISPATCH_INTERVAL = 15.0
+
+def run_dispatch():
+    """Assign available officers to every open, unassigned alert in one batch.
+
+    Returns (assignments, unassigned) as from plan_dispatch, counting only
+    assignments that were actually written.
+    """
+    busy = {row[0] for row in db.session.query(Alert.responded_by).filter(
+        Alert.status.in_(OPEN_ALERT_STATUSES), Alert.responded_by.isnot(None)
+    ).distinct()}
+    officers = ProximityIndex()
+    officers.load(
+        (row.user_id, row.lat, row.lng)
+        for row in db.session.query(OfficerLocation.user_id, OfficerLocation.lat, OfficerLocation.lng).filter(
+            OfficerLocation.updated_at >= datetime.now() - OFFICER_LOCATION_MAX_AGE,
+            OfficerLocation.available.is_(True)
+        )
+        if row.user_id not in busy
+    )
+    
+    pending = db.session.query(Alert.id, Alert.lat, Alert.lng, Alert.severity).filter(
+        Alert.status == 'active',
+        Alert.responded_by.is_(None),
+        Alert.lat.isnot(None),
+        Alert.lng.isnot(None)
+    ).order_by(Alert.created_at).limit(MAX_DISPATCH_BATCH).all()
+    if not pending or not len(officers):
+        return [], [row.id for row in pending]
+    
+    assignments, unassigned = plan_dispatch(
+        [(row.id, float(row.lat), float(row.lng), row.severity) for row in pending],
+        officers,
+        max_distance=app.config['DISPATCH_MAX_DISTANCE']
+    )
+    
+    # Guarded writes: another worker may have dispatched the same alert or officer meanwhile
+    other = db.aliased(Alert)
+    written = []
+    for alert_id, officer_id, distance in assignments:
+        result = db.session.execute(
+            update(Alert).where(
+                Alert.id == alert_id,
+                Alert.responded_by.is_(None),
+                ~db.session.query(other.id).filter(
+                    other.responded_by == officer_id,
+                    other.status.in_(OPEN_ALERT_STATUSES)
+                ).exists()
+            ).values(responded_by=officer_id).execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            written.append((alert_id, officer_id, distance))
+        else:
+            unassigned.append(alert_id)
+    if written:
+        note_sync_changes(Alert, [alert_id for alert_id, _, _ in written])
+        note_cache_changes(['alerts'])
+    db.session.commit()
+    
+    if written:
+        for alert in Alert.query.filter(Alert.id.in_([a for a, _, _ in written])):
+            publish_alert('alert.updated', alert.to_dict())
+        logger.info(f"Dispatched {len(written)} alerts, {len(unassigned)} waiting")
+    return written, unassigned
+
+def dispatch_pending():
+    with app.app_context():
+        try:
+            run_dispatch()
+        except Exception:
+            db.session.rollback()
+            raise
+
+dispatch_task = PeriodicTask('dispatch', DISPATCH_INTERVAL, dispatch_pending)
+
+def request_dispatch():
+    """Run auto-dispatch soon; bursts of alerts coalesce into one batch"""
+    if app.config['DISPATCH_AUTO']:
+        dispatch_task.ensure_started()
+        dispatch_task.wake()
+
+# Density heatmap: per-cell counts on map tiles, maintained as data changes
+heatmap_grid = HeatmapGrid()
+
+# Changes committed by other worker processes are picked up this often
+HEATMAP_REFRESH_INTERVAL = 5.0
+
+_heatmap_state = {'watermark': None}
+
+def tourist_heat_category(status):
+    return ('tourists', status or 'safe')
+
+def alert_heat_category(status, severity):
+    """Open alerts are counted by status and severity; resolved ones drop off the map"""
+    if status not in OPEN_ALERT_STATUSES:
+        return None
+    return ('alerts', status, severity)
+
+def _open_alert_heat_rows():
+    return db.session.query(Alert.id, Alert.lat, Alert.lng, Alert.status, Alert.severity).filter(
+        Alert.status.in_(OPEN_ALERT_STATUSES)
+    ).all()
+
+def load_heatmap_entities():
+    """(key, lat, lng, category) for every tourist position and open alert"""
+    _heatmap_state['watermark'] = datetime.now()
+    tourists = db.session.query(Tourist.tourist_id, Tourist.last_known_lat, Tourist.last_known_lng, Tourist.status).filter(
+        Tourist.last_known_lat.isnot(None), Tourist.last_known_lng.isnot(None)
+    ).all()
+    entities = [(('tourist', tid), lat, lng, tourist_heat_category(status)) for tid, lat, lng, status in tourists]
+    entities.extend(
+        (('alert', row.id), row.lat, row.lng, alert_heat_category(row.status, row.severity))
+        for row in _open_alert_heat_rows()
+    )
+    return entities
+
+def refresh_heatmap():
+    """Apply tourists updated since the last refresh and re-sync the open alerts"""
+    watermark = _heatmap_state['watermark']
+    if watermark is None:
+        return
+    with app.app_context():
+        now = datetime.now()
+        tourists = db.session.query(Tourist.tourist_id, Tourist.last_known_lat, Tourist.last_known_lng, Tourist.status).filter(
+            Tourist.last_update >= watermark - timedelta(seconds=PROXIMITY_REFRESH_OVERLAP)
+        ).all()
+        # Open alerts are few and found through the status index, so take them all
+        alerts = _open_alert_heat_rows()
+    
+    for tid, lat, lng, status in tourists:
+        fix = location_buffer.get(tid)
+        if fix is not None:
+            lat, lng = fix.lat, fix.lng
+        heatmap_grid.update(('tourist', tid), lat, lng, tourist_heat_category(status))
+    open_keys = set()
+    for row in alerts:
+        open_keys.add(('alert', row.id))
+        heatmap_grid.update(('alert', row.id), row.lat, row.lng, alert_heat_category(row.status, row.severity))
+    for key in heatmap_grid.keys():
+        if key[0] == 'alert' and key not in open_keys:
+            heatmap_grid.remove(key)
+    _heatmap_state['watermark'] = now
+
+heatmap_refresh_task = PeriodicTask('heatmap-refresh', HEATMAP_REFRESH_INTERVAL, refresh_heatmap)
+
+def heatmap_tiles():
+    """The heatmap grid, loaded and kept fresh from first use"""
+    heatmap_grid.ensure_loaded(load_heatmap_entities)
+    heatmap_refresh_task.ensure_started()
+    return heatmap_grid
+
+@event.listens_for(db.session, 'after_flush')
+def track_heatmap_changes(session, flush_context):
+    """Collect heatmap moves for this transaction; applied on commit"""
+    if not heatmap_grid.loaded:
+        return
+    changes = session.info.setdefault('heatmap_changes', [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Tourist):
+            changes.append((('tourist', obj.tourist_id), obj.last_known_lat, obj.last_known_lng, tourist_heat_category(obj.status)))
+        elif isinstance(obj, Alert):
+            changes.append((('alert', obj.id), obj.lat, obj.lng, alert_heat_category(obj.status or 'active', obj.severity)))
+    for obj in session.deleted:
+        if isinstance(obj, Tourist):
+            changes.append((('tourist', obj.tourist_id), None, None, None))
+        elif isinstance(obj, Alert):
+            changes.append((('alert', obj.id), None, None, None))
+
+@event.listens_for(db.session, 'after_commit')
+def apply_heatmap_changes(session):
+    for key, lat, lng, category in session.info.pop('heatmap_changes', ()):
+        heatmap_grid.update(key, lat, lng, category)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_heatmap_changes(session):
+    session.info.pop('heatmap_changes', None)
+
+# Metrics: request latency per route and status, database activity, and gauges
+# read at scrape time. Recording is per thread and lock-free (see metrics.py)
+metrics = Metrics()
+metrics.histogram('http_request_duration_seconds', 'Time to build a response, by route template and status')
+metrics.counter('db_queries_total', 'SQL statements executed, by statement type')
+metrics.histogram('db_query_duration_seconds', 'SQL statement execution time')
+metrics.counter('db_commits_total', 'Database transactions committed')
+metrics.counter('db_rollbacks_total', 'Session transactions rolled back')
+metrics.gauge('active_alerts', 'Alerts currently active', lambda: current_stats()['activeAlerts'])
+metrics.gauge('tourists', 'Registered tourists', lambda: current_stats()['activeTourists'])
+metrics.gauge('location_buffer_pending', 'Buffered location fixes not yet written', lambda: len(location_buffer))
+metrics.gauge('score_queue_pending', 'Tourists awaiting a safety score recompute', lambda: len(score_queue))
+metrics.gauge('missing_deadlines_armed', 'Tourists with an armed missing-tourist deadline', lambda: len(missing_deadlines))
+metrics.gauge('event_subscribers', 'Open push-event subscriptions', lambda: event_bus.subscriber_count())
+metrics.gauge('response_cache_entries', 'Cached response bodies', lambda: len(response_cache))
+metrics.gauge('row_cache_rows', 'Cached encoded list rows', lambda: len(row_cache))
+metrics.gauge('db_pool_checked_out', 'Database connections in use', lambda: db.engine.pool.checkedout())
+
+_STATEMENT_TYPES = ('select', 'insert', 'update', 'delete')
+
+def current_query_profile():
+    """The profile of the request running on this thread, if profiling"""
+    return g.get('sql_profile') if has_request_context() else None
+
+def finish_query_profile(response, profile):
+    """Report a finished request's profile: debug header, N+1 log, budget check"""
+    route = request.url_rule.rule if request.url_rule is not None else request.path
+    response.headers['X-SQL-Profile'] = profile.header()
+    for fp, count in profile.repeated(app.config['SQL_PROFILE_REPEAT_THRESHOLD']):
+        logger.warning(f"Possible N+1 in {request.method} {route}: {count}x {fp}")
+    
+    budget = getattr(app.view_functions.get(request.endpoint), 'query_budget', None)
+    if profile.over_budget(budget):
+        message = f"{request.method} {route} ran {profile.count} queries, budget {budget}"
+        if app.testing:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query_metrics(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        metrics.observe('db_query_duration_seconds', elapsed)
+        profile = current_query_profile()
+        if profile is not None:
+            profile.record(statement, elapsed)
+    verb = statement.lstrip()[:6].lower()
+    metrics.inc('db_queries_total', (('type', verb if verb in _STATEMENT_TYPES else 'other'),))
+
+@event.listens_for(Engine, 'commit')
+def record_commit(conn):
+    metrics.inc('db_commits_total')
+
+# Session-level, so connections returned to the pool after a read aren't counted
+@event.listens_for(db.session, 'after_rollback')
+def record_rollback(session):
+    metrics.inc('db_rollbacks_total')
+
+# Request timing, SQL profiling and sampled request logging
 @app.before_request
-def log_request_info():
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if app.config['SQL_PROFILE'] or app.testing:
+        g.sql_profile = QueryProfile()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    duration = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.observe('http_request_duration_seconds', duration,
+                    (('method', request.method), ('route', route), ('status', str(response.status_code))))
+    profile = g.pop('sql_profile', None)
+    if profile is not None:
+        finish_query_profile(response, profile)
+    
     if request.path.startswith('/api'):
-        start_time = datetime.now()
-        # Store in Flask g object instead of request
-        from flask import g
-        g.start_time = start_time
-
-@app.after_request  
-def log_response_info(response):
-    from flask import g
-    if hasattr(g, 'start_time') and request.path.startswith('/api'):
-        duration = (datetime.now() - g.start_time).total_seconds() * 1000
-        log_line = f"{request.method} {request.path} {response.status_code} in {duration:.0f}ms"
-        logger.info(log_line)
+        sample = app.config['REQUEST_LOG_SAMPLE']
+        if duration * 1000 >= app.config['REQUEST_LOG_SLOW_MS'] or (sample > 0 and random.random() < sample):
+            logger.info(f"{request.method} {request.path} {response.status_code} in {duration * 1000:.0f}ms")
     return response
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint; counts are per worker process"""
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Error handler
 @app.errorhandler(Exception)
 def handle_error(e):
@@ -331,16 +1855,11 @@ def police_dashboard():
     
     try:
         user = User.query.get(session['user_id'])
-        tourists = Tourist.query.all()
-        alerts = Alert.query.filter_by(status='active').all()
-        
-        # Calculate statistics
-        stats = {
-            'activeTourists': len(tourists),
-            'activeAlerts': len(alerts),
-            'highRiskZones': len(GeoZone.query.filter_by(type='restricted').all()),
-            'averageSafetyScore': f"{sum(float(t.safety_score or 0) for t in tourists) / len(tourists):.1f}" if tourists else "0.0"
-        }
+        # Plain dicts in the API shape from column projections; stats come from the counters
+        tourists = serialize_rows(fetch_rows(projected_query(TOURIST_FIELDS, list(TOURIST_FIELDS))), TOURIST_FIELDS, list(TOURIST_FIELDS))
+        alerts = serialize_rows(fetch_rows(projected_query(ALERT_FIELDS, list(ALERT_FIELDS)).filter(Alert.status == 'active')),
+                                ALERT_FIELDS, list(ALERT_FIELDS))
+        stats = current_stats()
         
         return render_template('police_dashboard.html', 
                              user=user, 
@@ -354,6 +1873,7 @@ def police_dashboard():
 
 # Authentication endpoints
 @app.route('/api/auth/login', methods=['POST'])
+@query_budget(5)
 def api_login():
     try:
         data = LoginRequest.model_validate(request.json)
@@ -413,8 +1933,6 @@ def register():
             tourist.location_sharing = True
             tourist.status = 'safe'
             tourist.valid_until = datetime.now().replace(year=datetime.now().year + 1)  # 1 year validity
-            tourist.emergency_contacts = []
-            tourist.itinerary = []
             db.session.add(tourist)
             result['tourist'] = tourist.to_dict()
         
@@ -430,35 +1948,68 @@ def register():
 
 # Tourist endpoints
 @app.route('/api/tourist/profile/<user_id>', methods=['GET'])
+@query_budget(5)
 def get_tourist_profile(user_id):
     try:
-        tourist = Tourist.query.filter_by(user_id=user_id).first()
-        if not tourist:
+        def build():
+            tourist = find_tourist(user_id)
+            if not tourist:
+                return None, None
+            return overlay_buffered_location(tourist.to_dict()), [f"tourist:{tourist.id}", f"tourist:{tourist.tourist_id}"]
+        
+        response = cached_response(('profile', user_id), build)
+        if response is None:
             return jsonify({'error': 'Tourist not found'}), 404
-        
-        return jsonify(tourist.to_dict())
+        return response
     
     except Exception as e:
         logger.error(f"Get tourist profile error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+# Worst case, with EVENT_RELAY=database on a fresh worker: zone index and itinerary
+# loads, entering a restricted zone (alert insert) while going off-plan, the sync
+# stamps, and three outbox writes for the geofence, alert and deviation events
 @app.route('/api/tourist/location/<tourist_id>', methods=['PUT'])
+@query_budget(16)
 def update_location(tourist_id):
     try:
         data = UpdateLocationRequest.model_validate(request.json)
         
-        tourist = Tourist.query.filter_by(tourist_id=tourist_id).first()
+        if app.config['LOCATION_WRITE_BEHIND']:
+            return buffer_location_update(tourist_id, data)
+        
+        tourist = find_tourist(tourist_id)
         if not tourist:
             return jsonify({'error': 'Tourist not found'}), 404
         
+        old_lat, old_lng = tourist.last_known_lat, tourist.last_known_lng
+        note_location_fix(tourist.id, tourist.last_update)
         tourist.last_known_lat = Decimal(str(data.lat))
         tourist.last_known_lng = Decimal(str(data.lng))
         if data.location:
             tourist.current_location = data.location
         tourist.last_update = datetime.now()
+        tourist.last_fix_at = tourist.last_update
+        
+        events, alerts = evaluate_geofence(tourist, old_lat, old_lng)
+        preload_itineraries([tourist.id])
+        tourist.status, deviation = check_itinerary(tourist.id, tourist.last_update, data.lat, data.lng, tourist.status,
+                                                     tourist.off_itinerary)
         
         db.session.commit()
-        return jsonify(tourist.to_dict())
+        # Render once before publishing, as relayed events commit (and expire the rows) again;
+        # contacts and itinerary don't change with a fix, clients fetch them through sync
+        payload = tourist.to_dict(details=False)
+        created = [alert.to_dict() for alert in alerts]
+        tourist_pk = tourist.id
+        track_position(tourist.tourist_id, data.lat, data.lng)
+        record_location_history(tourist.tourist_id, tourist.last_update, data.lat, data.lng)
+        publish_events(geofence_event_batch(tourist_pk, events))
+        for alert_data in created:
+            publish_alert('alert.created', alert_data)
+        if deviation:
+            apply_itinerary_change(tourist_pk, deviation)
+        return jsonify(payload)
     
     except ValidationError as e:
         return jsonify({'error': 'Invalid request'}), 400
@@ -467,13 +2018,281 @@ def update_location(tourist_id):
         db.session.rollback()
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/tourist/panic/<tourist_id>', methods=['POST'])
-def panic_button(tourist_id):
-    try:
-        tourist = Tourist.query.filter_by(tourist_id=tourist_id).first()
-        if not tourist:
-            return jsonify({'error': 'Tourist not found'}), 404
-        
+# Largest batch accepted by the bulk location endpoint
+MAX_LOCATION_BATCH = 1000
+
+# Chunk size for IN (...) lookups, kept under SQLite's bound-parameter limit
+IN_CLAUSE_CHUNK = 500
+
+def _fix_time(timestamp):
+    """Normalize a client timestamp to the naive local time used by the models"""
+    now = datetime.now()
+    if timestamp is None:
+        return now
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    # Never let a skewed device clock push last_update into the future
+    return min(timestamp, now)
+
+def apply_location_fixes(fixes, record_history=True):
+    """Apply many location fixes in one transaction.
+
+    ``fixes`` is a list of validated LocationFix objects. Only the newest fix
+    per tourist is written; fixes older than the stored ``last_update`` are
+    reported as stale. Returns a status string per fix, in input order.
+    """
+    results = ['ok'] * len(fixes)
+    
+    # Coalesce to the newest fix per tourist
+    latest = {}
+    for i, fix in enumerate(fixes):
+        ts = _fix_time(fix.timestamp)
+        current = latest.get(fix.touristId)
+        if current is None or ts >= current[1]:
+            latest[fix.touristId] = (i, ts)
+    
+    # Resolve every tourist with a single query per chunk
+    tids = list(latest)
+    rows = {}
+    for start in range(0, len(tids), IN_CLAUSE_CHUNK):
+        chunk = tids[start:start + IN_CLAUSE_CHUNK]
+        for row in db.session.query(
+            Tourist.id, Tourist.tourist_id, Tourist.last_known_lat, Tourist.last_known_lng,
+            Tourist.current_location, Tourist.status, Tourist.last_update, Tourist.off_itinerary
+        ).filter(Tourist.tourist_id.in_(chunk)):
+            rows[row.tourist_id] = row
+    preload_itineraries([row.id for row in rows.values()])
+    
+    params = []
+    moved = []
+    staged_alerts = []
+    zone_events = []
+    deviations = []
+    for tid, (index, ts) in latest.items():
+        row = rows.get(tid)
+        if row is None:
+            continue
+        if row.last_update and ts < row.last_update:
+            results[index] = 'stale'
+            continue
+        note_location_fix(row.id, row.last_update)
+        
+        fix = fixes[index]
+        lat = Decimal(str(fix.lat))
+        lng = Decimal(str(fix.lng))
+        location = fix.location or row.current_location
+        status = row.status
+        
+        events, alerts, severities = geofence_alerts(row.id, location, row.last_known_lat, row.last_known_lng, lat, lng)
+        for alert in alerts:
+            db.session.add(alert)
+        staged_alerts.extend(alerts)
+        zone_events.extend(geofence_event_batch(row.id, events))
+        for severity in severities:
+            status = escalate_status(status, severity)
+        status, deviation = check_itinerary(row.id, ts, fix.lat, fix.lng, status, row.off_itinerary)
+        if deviation:
+            deviations.append((row.id, deviation))
+        
+        moved.append((tid, fix.lat, fix.lng, status))
+        params.append({
+            'id': row.id,
+            'last_known_lat': lat,
+            'last_known_lng': lng,
+            'current_location': location,
+            'status': status,
+            'last_update': ts,
+            'last_fix_at': ts
+        })
+    
+    for i, fix in enumerate(fixes):
+        if fix.touristId not in rows:
+            results[i] = 'not_found'
+        elif results[latest[fix.touristId][0]] == 'stale':
+            results[i] = 'stale'
+    
+    if params:
+        # ORM bulk UPDATE by primary key: one executemany for the whole batch
+        db.session.execute(update(Tourist), params)
+        note_sync_changes(Tourist, [p['id'] for p in params])
+        note_cache_changes(['tourists'] + [f"tourist:{p['id']}" for p in params])
+    db.session.commit()
+    
+    for tid, lat, lng, status in moved:
+        track_position(tid, lat, lng, status)
+    publish_events(zone_events)
+    for alert in staged_alerts:
+        publish_alert('alert.created', alert.to_dict())
+    for tourist_pk, deviation in deviations:
+        apply_itinerary_change(tourist_pk, deviation)
+    
+    # Every fix goes into the trail, including superseded and late ones
+    for fix in fixes:
+        if record_history and fix.touristId in rows:
+            record_location_history(fix.touristId, _fix_time(fix.timestamp), fix.lat, fix.lng)
+    
+    return results
+
+def flush_location_fixes(fixes):
+    """Flush callback for the write-behind buffer (runs on its own thread)"""
+    with app.app_context():
+        try:
+            # Trails were already recorded when the fixes were buffered
+            apply_location_fixes(fixes, record_history=False)
+        except Exception:
+            db.session.rollback()
+            raise
+
+location_buffer = LocationBuffer(
+    flush_location_fixes,
+    max_pending=app.config['LOCATION_FLUSH_THRESHOLD'],
+    max_age=app.config['LOCATION_FLUSH_INTERVAL']
+)
+atexit.register(location_buffer.close)
+
+def overlay_buffered_location(data):
+    """Serve a tourist dict with any newer, not yet flushed fix applied"""
+    fix = location_buffer.get(data['touristId'])
+    if fix is not None:
+        data['lastKnownLat'] = f"{fix.lat:.8f}"
+        data['lastKnownLng'] = f"{fix.lng:.8f}"
+        if fix.location:
+            data['currentLocation'] = fix.location
+        data['lastUpdate'] = fix.timestamp.isoformat()
+    return data
+
+# Location history
+history_store = HistoryStore()
+
+# Chunks rewritten per tier on each compaction run, to keep runs short
+HISTORY_COMPACTION_BATCH = 2000
+
+def persist_location_history(seal_all=False):
+    """Write sealed history chunks; with seal_all, open chunks are sealed first"""
+    sealed = history_store.drain(seal_all)
+    if not sealed:
+        return 0
+    with app.app_context():
+        try:
+            db.session.add_all([LocationChunk.from_chunk(tid, chunk) for tid, chunk in sealed])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            history_store.requeue(sealed)
+            raise
+    return len(sealed)
+
+def compact_location_history():
+    """Downsample old chunks into coarser tiers and purge expired ones"""
+    now = time.time()
+    with app.app_context():
+        try:
+            retention_cutoff = datetime.fromtimestamp(now - app.config['LOCATION_HISTORY_RETENTION_DAYS'] * 86400)
+            purged = LocationChunk.query.filter(LocationChunk.end_time < retention_cutoff).delete(synchronize_session=False)
+            
+            rewritten = 0
+            for min_age, resolution in DOWNSAMPLE_TIERS:
+                cutoff = datetime.fromtimestamp(now - min_age)
+                rows = LocationChunk.query.filter(
+                    LocationChunk.end_time < cutoff,
+                    LocationChunk.resolution < resolution
+                ).order_by(LocationChunk.tourist_id, LocationChunk.start_time).limit(HISTORY_COMPACTION_BATCH).all()
+                
+                by_tourist = {}
+                for row in rows:
+                    by_tourist.setdefault(row.tourist_id, []).append(row)
+                
+                for tid, tourist_rows in by_tourist.items():
+                    merged = Chunk()
+                    for row in tourist_rows:
+                        merged.extend(row.to_chunk())
+                        db.session.delete(row)
+                    for piece in merged.downsample(resolution).split():
+                        db.session.add(LocationChunk.from_chunk(tid, piece))
+                    rewritten += len(tourist_rows)
+            
+            db.session.commit()
+            if purged or rewritten:
+                logger.info(f"Location history compaction: purged {purged}, downsampled {rewritten} chunks")
+        except Exception:
+            db.session.rollback()
+            raise
+
+history_persist_task = PeriodicTask('location-history', 30.0, persist_location_history)
+history_compaction_task = PeriodicTask('location-history-compaction', 3600.0, compact_location_history)
+atexit.register(lambda: persist_location_history(seal_all=True))
+
+def record_location_history(tourist_id, ts, lat, lng):
+    """Append a fix to the tourist's trail (persisted in the background)"""
+    history_persist_task.ensure_started()
+    history_compaction_task.ensure_started()
+    history_store.record(tourist_id, ts.timestamp(), lat, lng)
+
+@app.route('/api/tourist/locations/batch', methods=['POST'])
+def update_locations_batch():
+    try:
+        data = BatchLocationRequest.model_validate(request.json)
+        if len(data.fixes) > MAX_LOCATION_BATCH:
+            return jsonify({'error': f'Batch too large (max {MAX_LOCATION_BATCH} fixes)'}), 413
+        
+        # Validate per item so one bad fix doesn't reject the whole upload
+        valid = []
+        positions = []
+        results = ['invalid'] * len(data.fixes)
+        for i, item in enumerate(data.fixes):
+            try:
+                valid.append(LocationFix.model_validate(item))
+                positions.append(i)
+            except ValidationError:
+                pass
+        
+        for i, status in zip(positions, apply_location_fixes(valid)):
+            results[i] = status
+        
+        return jsonify({
+            'accepted': results.count('ok'),
+            'results': results
+        })
+    
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid request'}), 400
+    except Exception as e:
+        logger.error(f"Batch location update error: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
+
+def buffer_location_update(ref, data):
+    """Write-behind path for update_location: buffer the fix and answer from the stored row with it applied"""
+    # Normally a cache hit; the response then costs one primary-key read and the fix no write
+    identity = tourist_identities.resolve(ref)
+    if identity is None:
+        return jsonify({'error': 'Tourist not found'}), 404
+    names = list(TOURIST_FIELDS)
+    rows = serialize_rows(fetch_rows(projected_query(TOURIST_FIELDS, names).filter(Tourist.id == identity.pk)),
+                          TOURIST_FIELDS, names)
+    if not rows:
+        return jsonify({'error': 'Tourist not found'}), 404
+    tourist_id = identity.tourist_id
+    
+    fix = LocationFix(touristId=tourist_id, lat=data.lat, lng=data.lng,
+                      timestamp=datetime.now(), location=data.location)
+    location_buffer.put(fix)
+    # Profiles and lists overlay buffered fixes
+    response_cache.invalidate(['tourists', f"tourist:{tourist_id}"])
+    track_position(tourist_id, fix.lat, fix.lng)
+    record_location_history(tourist_id, fix.timestamp, fix.lat, fix.lng)
+    
+    # Same fields as the synchronous path; status and score catch up when the fix is flushed
+    return jsonify(dict(overlay_buffered_location(rows[0]), buffered=True))
+
+@app.route('/api/tourist/panic/<tourist_id>', methods=['POST'])
+@query_budget(8)
+def panic_button(tourist_id):
+    try:
+        tourist = find_tourist(tourist_id)
+        if not tourist:
+            return jsonify({'error': 'Tourist not found'}), 404
+        
         # Create alert
         alert = Alert()
         alert.tourist_id = tourist.id
@@ -491,7 +2310,10 @@ def panic_button(tourist_id):
         tourist.last_update = datetime.now()
         
         db.session.commit()
-        return jsonify(alert.to_dict())
+        
+        payload = alert.to_dict()
+        publish_alert('alert.created', payload)
+        return jsonify(payload)
     
     except Exception as e:
         logger.error(f"Panic button error: {str(e)}")
@@ -499,46 +2321,117 @@ def panic_button(tourist_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/tourist/alerts/<tourist_id>', methods=['GET'])
+@query_budget(3)
 def get_tourist_alerts(tourist_id):
     try:
-        tourist = Tourist.query.filter_by(tourist_id=tourist_id).first()
-        if not tourist:
+        tourist_pk = find_tourist_pk(tourist_id)
+        if not tourist_pk:
             return jsonify({'error': 'Tourist not found'}), 404
         
-        alerts = Alert.query.filter_by(tourist_id=tourist.id).all()
+        alerts = Alert.query.filter_by(tourist_id=tourist_pk).all()
         return jsonify([alert.to_dict() for alert in alerts])
     
     except Exception as e:
         logger.error(f"Get tourist alerts error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/tourist/alerts/<tourist_id>/stream', methods=['GET'])
+def stream_tourist_alerts(tourist_id):
+    """Push feed of a tourist's alert changes (Server-Sent Events)"""
+    try:
+        tourist_pk = find_tourist_pk(tourist_id)
+        if not tourist_pk:
+            return jsonify({'error': 'Tourist not found'}), 404
+        
+        return event_stream([f"tourist:{tourist_pk}"])
+    
+    except Exception as e:
+        logger.error(f"Stream tourist alerts error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+# Tourist identity: the database ID, the tourist_id and the owning user's ID all
+# resolve to the tourist through one LRU cache, dropped for tourists registered
+# or deleted when the write commits
+def load_tourist_identity(ref):
+    """(pk, tourist_id) of the tourist matching ref in any form, preferring the ID, then the tourist_id"""
+    row = db.session.query(Tourist.id, Tourist.tourist_id).filter(
+        or_(Tourist.id == ref, Tourist.tourist_id == ref, Tourist.user_id == ref)
+    ).order_by((Tourist.id == ref).desc(), (Tourist.tourist_id == ref).desc()).first()
+    return TouristIdentity(row.id, row.tourist_id) if row else None
+
+tourist_identities = IdentityResolver(load_tourist_identity)
+
+def find_tourist_pk(ref):
+    """Primary key of a tourist given its database ID, tourist_id or user ID"""
+    identity = tourist_identities.resolve(ref)
+    return identity.pk if identity else None
+
+def find_tourist(ref):
+    """Tourist given its database ID, tourist_id or user ID; a primary-key load once resolved"""
+    identity = tourist_identities.resolve(ref)
+    return db.session.get(Tourist, identity.pk) if identity else None
+
+@event.listens_for(db.session, 'after_flush')
+def track_identity_changes(session, flush_context):
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Tourist):
+            refs, pks = session.info.setdefault('identity_changes', (set(), set()))
+            refs.update(ref for ref in (obj.id, obj.tourist_id, obj.user_id) if ref)
+            pks.add(obj.id)
+
+@event.listens_for(db.session, 'after_commit')
+def apply_identity_changes(session):
+    changes = session.info.pop('identity_changes', None)
+    if changes:
+        tourist_identities.forget(*changes)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_identity_changes(session):
+    session.info.pop('identity_changes', None)
+
+def next_position(model, tourist_pk):
+    """Position after a tourist's last child row, read from the (tourist_id, position) index"""
+    last = db.session.query(func.max(model.position)).filter(model.tourist_id == tourist_pk).scalar()
+    return 0 if last is None else last + 1
+
+# Itinerary endpoints: one row per item, so edits never rewrite the whole itinerary
+@app.route('/api/tourist/itinerary/<tourist_id>', methods=['GET'])
+@query_budget(3)
+def get_itinerary(tourist_id):
+    try:
+        tourist_pk = find_tourist_pk(tourist_id)
+        if not tourist_pk:
+            return jsonify({'error': 'Tourist not found'}), 404
+        
+        items = ItineraryEntry.query.filter_by(tourist_id=tourist_pk).order_by(ItineraryEntry.position).all()
+        return jsonify([item.to_dict() for item in items])
+    
+    except Exception as e:
+        logger.error(f"Get itinerary error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route('/api/tourist/itinerary/<tourist_id>', methods=['POST'])
+@query_budget(7)
 def add_itinerary_item(tourist_id):
     try:
         data = ItineraryItem.model_validate(request.json)
         
-        # Try both database ID and tourist_id
-        tourist = Tourist.query.filter_by(id=tourist_id).first()
-        if not tourist:
-            tourist = Tourist.query.filter_by(tourist_id=tourist_id).first()
-        if not tourist:
+        tourist_pk = find_tourist_pk(tourist_id)
+        if not tourist_pk:
             return jsonify({'error': 'Tourist not found'}), 404
         
-        # Add new itinerary item
-        existing_itinerary = tourist.itinerary or []
-        new_item = {
-            'place': data.place,
-            'date': data.date,
-            'time': data.time,
-            'notes': data.notes
-        }
-        existing_itinerary.append(new_item)
-        
-        tourist.itinerary = existing_itinerary
-        tourist.last_update = datetime.now()
-        
+        item = ItineraryEntry(
+            tourist_id=tourist_pk,
+            position=next_position(ItineraryEntry, tourist_pk),
+            place=data.place,
+            date=data.date,
+            time=data.time,
+            notes=data.notes
+        )
+        db.session.add(item)
         db.session.commit()
-        return jsonify(tourist.to_dict())
+        itinerary_monitor.invalidate(tourist_pk)
+        return jsonify(item.to_dict())
     
     except ValidationError as e:
         return jsonify({'error': 'Invalid request'}), 400
@@ -547,25 +2440,111 @@ def add_itinerary_item(tourist_id):
         db.session.rollback()
         return jsonify({'error': 'Failed to add itinerary item'}), 400
 
+@app.route('/api/tourist/itinerary/<tourist_id>/<item_id>', methods=['PUT'])
+def update_itinerary_item(tourist_id, item_id):
+    try:
+        data = ItineraryItem.model_validate(request.json)
+        
+        tourist_pk = find_tourist_pk(tourist_id)
+        item = ItineraryEntry.query.filter_by(id=item_id, tourist_id=tourist_pk).first() if tourist_pk else None
+        if not item:
+            return jsonify({'error': 'Itinerary item not found'}), 404
+        
+        item.place = data.place
+        item.date = data.date
+        item.time = data.time
+        item.notes = data.notes
+        db.session.commit()
+        itinerary_monitor.invalidate(tourist_pk)
+        return jsonify(item.to_dict())
+    
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid request'}), 400
+    except Exception as e:
+        logger.error(f"Update itinerary error: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update itinerary item'}), 400
+
+@app.route('/api/tourist/itinerary/<tourist_id>/<item_id>', methods=['DELETE'])
+def delete_itinerary_item(tourist_id, item_id):
+    try:
+        tourist_pk = find_tourist_pk(tourist_id)
+        item = ItineraryEntry.query.filter_by(id=item_id, tourist_id=tourist_pk).first() if tourist_pk else None
+        if not item:
+            return jsonify({'error': 'Itinerary item not found'}), 404
+        
+        db.session.delete(item)
+        db.session.commit()
+        itinerary_monitor.invalidate(tourist_pk)
+        return jsonify({'id': item_id, 'deleted': True})
+    
+    except Exception as e:
+        logger.error(f"Delete itinerary error: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to delete itinerary item'}), 400
+
+# Emergency contact endpoints
+@app.route('/api/tourist/contacts/<tourist_id>', methods=['GET'])
+@query_budget(3)
+def get_emergency_contacts(tourist_id):
+    try:
+        tourist_pk = find_tourist_pk(tourist_id)
+        if not tourist_pk:
+            return jsonify({'error': 'Tourist not found'}), 404
+        
+        contacts = EmergencyContactEntry.query.filter_by(tourist_id=tourist_pk).order_by(EmergencyContactEntry.position).all()
+        return jsonify([contact.to_dict() for contact in contacts])
+    
+    except Exception as e:
+        logger.error(f"Get contacts error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/tourist/contacts/<tourist_id>', methods=['POST'])
+def add_emergency_contact(tourist_id):
+    try:
+        data = EmergencyContact.model_validate(request.json)
+        
+        tourist_pk = find_tourist_pk(tourist_id)
+        if not tourist_pk:
+            return jsonify({'error': 'Tourist not found'}), 404
+        
+        contact = EmergencyContactEntry(
+            tourist_id=tourist_pk,
+            position=next_position(EmergencyContactEntry, tourist_pk),
+            **data.model_dump()
+        )
+        db.session.add(contact)
+        db.session.commit()
+        return jsonify(contact.to_dict())
+    
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid request'}), 400
+    except Exception as e:
+        logger.error(f"Add contact error: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to add emergency contact'}), 400
+
 @app.route('/api/tourist/contacts/<tourist_id>', methods=['PUT'])
+@query_budget(12)
 def update_emergency_contacts(tourist_id):
     try:
         data = UpdateContactsRequest.model_validate(request.json)
         
-        # Try both database ID and tourist_id
-        tourist = Tourist.query.filter_by(id=tourist_id).first()
-        if not tourist:
-            tourist = Tourist.query.filter_by(tourist_id=tourist_id).first()
+        tourist = find_tourist(tourist_id)
         if not tourist:
             return jsonify({'error': 'Tourist not found'}), 404
         
-        # Update emergency contacts
-        contacts = [contact.model_dump() for contact in data.emergencyContacts]
-        tourist.emergency_contacts = contacts
-        tourist.last_update = datetime.now()
+        # Replace the whole list; orphaned rows are deleted by the cascade
+        tourist.emergency_contacts = [
+            EmergencyContactEntry(position=position, **contact.model_dump())
+            for position, contact in enumerate(data.emergencyContacts)
+        ]
         
+        # Flush for the new contact ids, then serialize before the commit expires everything
+        db.session.flush()
+        payload = tourist.to_dict()
         db.session.commit()
-        return jsonify(tourist.to_dict())
+        return jsonify(payload)
     
     except ValidationError as e:
         return jsonify({'error': 'Invalid request'}), 400
@@ -574,28 +2553,336 @@ def update_emergency_contacts(tourist_id):
         db.session.rollback()
         return jsonify({'error': 'Failed to update emergency contacts'}), 400
 
+@app.route('/api/tourist/contacts/<tourist_id>/<contact_id>', methods=['PUT'])
+def update_emergency_contact(tourist_id, contact_id):
+    try:
+        data = EmergencyContact.model_validate(request.json)
+        
+        tourist_pk = find_tourist_pk(tourist_id)
+        contact = EmergencyContactEntry.query.filter_by(id=contact_id, tourist_id=tourist_pk).first() if tourist_pk else None
+        if not contact:
+            return jsonify({'error': 'Emergency contact not found'}), 404
+        
+        contact.name = data.name
+        contact.phone = data.phone
+        contact.relation = data.relation
+        db.session.commit()
+        return jsonify(contact.to_dict())
+    
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid request'}), 400
+    except Exception as e:
+        logger.error(f"Update contact error: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update emergency contact'}), 400
+
+@app.route('/api/tourist/contacts/<tourist_id>/<contact_id>', methods=['DELETE'])
+def delete_emergency_contact(tourist_id, contact_id):
+    try:
+        tourist_pk = find_tourist_pk(tourist_id)
+        contact = EmergencyContactEntry.query.filter_by(id=contact_id, tourist_id=tourist_pk).first() if tourist_pk else None
+        if not contact:
+            return jsonify({'error': 'Emergency contact not found'}), 404
+        
+        db.session.delete(contact)
+        db.session.commit()
+        return jsonify({'id': contact_id, 'deleted': True})
+    
+    except Exception as e:
+        logger.error(f"Delete contact error: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to delete emergency contact'}), 400
+
+# Delta sync endpoint
+@app.route('/api/tourist/sync/<tourist_id>', methods=['GET'])
+@query_budget(8)
+def sync_tourist(tourist_id):
+    """Everything visible to a tourist that changed after ?since=<version>.
+
+    Returns the new version to send next time. since=0, or a version older
+    than the retained tombstones, gets a full snapshot with reset=true.
+    """
+    try:
+        try:
+            since = int(request.args.get('since', '0'))
+        except ValueError:
+            return jsonify({'error': 'Invalid since'}), 400
+        
+        # Read the version before any data: a change committed meanwhile is
+        # sent again next time rather than skipped
+        counter = db.session.query(SyncCounter.value, SyncCounter.purged_through).filter_by(id=1).first()
+        version, purged_through = counter if counter else (0, 0)
+        
+        tourist = find_tourist(tourist_id)
+        if not tourist:
+            return jsonify({'error': 'Tourist not found'}), 404
+        
+        reset = since <= 0 or since < purged_through or since > version
+        def changed(query, model):
+            return query if reset else query.filter(model.version > since)
+        
+        alerts = changed(Alert.query.filter(Alert.tourist_id == tourist.id), Alert).all()
+        zones = changed(GeoZone.query, GeoZone).all()
+        itinerary = changed(ItineraryEntry.query.filter(ItineraryEntry.tourist_id == tourist.id), ItineraryEntry)
+        contacts = changed(EmergencyContactEntry.query.filter(EmergencyContactEntry.tourist_id == tourist.id), EmergencyContactEntry)
+        deleted = [] if reset else SyncTombstone.query.filter(
+            SyncTombstone.version > since,
+            or_(SyncTombstone.tourist_id == tourist.id, SyncTombstone.tourist_id.is_(None))
+        ).order_by(SyncTombstone.version).all()
+        
+        return jsonify({
+            'version': version,
+            'reset': reset,
+            'tourist': overlay_buffered_location(tourist.to_dict(details=False)) if reset or tourist.version > since else None,
+            'alerts': [alert.to_dict() for alert in alerts],
+            'zones': [zone.to_dict() for zone in zones],
+            'itinerary': [item.to_dict() for item in itinerary.order_by(ItineraryEntry.position)],
+            'emergencyContacts': [contact.to_dict() for contact in contacts.order_by(EmergencyContactEntry.position)],
+            'deleted': [{'type': row.entity, 'id': row.entity_id} for row in deleted]
+        })
+    
+    except Exception as e:
+        logger.error(f"Sync error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 # Police endpoints
+# Query parameters that switch list endpoints to paginated responses
+LISTING_PARAMS = ('limit', 'cursor', 'fields', 'status', 'severity', 'type', 'bbox', 'updatedSince')
+
+def wants_listing():
+    return any(param in request.args for param in LISTING_PARAMS)
+
+def _parse_since():
+    value = request.args.get('updatedSince')
+    if not value:
+        return None
+    try:
+        return _parse_time_arg('updatedSince', None)
+    except ValueError:
+        raise ListingError('Invalid updatedSince')
+
+def list_tourists():
+    """Keyset-paginated, filtered and projected tourist listing"""
+    fields = parse_fields(request.args.get('fields'), {**TOURIST_FIELDS, **TOURIST_DETAIL_FIELDS}, default=list(TOURIST_FIELDS))
+    limit = parse_limit(request.args.get('limit'))
+    cursor = decode_cursor(request.args.get('cursor'))
+    
+    # id keys the cursor and touristId the write-behind overlay
+    detail_names = [name for name in fields if name in TOURIST_DETAIL_FIELDS]
+    names = [name for name in fields if name in TOURIST_FIELDS]
+    names += [name for name in ('id', 'touristId') if name not in names]
+    query = projected_query(TOURIST_FIELDS, names).add_columns(Tourist.version)
+    
+    statuses = parse_list(request.args.get('status'))
+    if statuses:
+        query = query.filter(Tourist.status.in_(statuses))
+    bbox = parse_bbox(request.args.get('bbox'))
+    if bbox:
+        min_lat, min_lng, max_lat, max_lng = bbox
+        query = query.filter(
+            Tourist.last_known_lat.between(min_lat, max_lat),
+            Tourist.last_known_lng.between(min_lng, max_lng)
+        )
+    since = _parse_since()
+    if since:
+        query = query.filter(Tourist.last_update >= since)
+    if cursor:
+        query = query.filter(Tourist.id > cursor[0])
+    
+    query = query.order_by(Tourist.id).limit(limit + 1)
+    if not detail_names:
+        keys = fetch_keys(query, Tourist, Tourist.tourist_id.label('touristId'))
+        next_cursor = encode_cursor([keys[limit - 1].id]) if len(keys) > limit else None
+        bypass, overlay = buffered_location_bypass()
+        items = join_array(encode_keys(keys[:limit], query, Tourist, TOURIST_FIELDS, names, fields, 'tourist', bypass, overlay))
+        return b'{"items":' + items + b',"nextCursor":' + dumps(next_cursor) + b'}'
+    
+    # Child rows carry their own versions, so these pages aren't built from cached rows
+    rows = fetch_rows(query)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor([rows[-1].id]) if has_more else None
+    details = load_tourist_details([row.id for row in rows], detail_names)
+    items = []
+    for item in serialize_rows(rows, TOURIST_FIELDS, names):
+        overlay_buffered_location(item)
+        item.update(details.get(item['id'], {}))
+        items.append({name: item[name] for name in fields})
+    
+    return {'items': items, 'nextCursor': next_cursor}
+
+def list_alerts():
+    """Keyset-paginated alert listing, newest first; only active alerts unless ?status= is given"""
+    fields = parse_fields(request.args.get('fields'), ALERT_FIELDS)
+    limit = parse_limit(request.args.get('limit'))
+    cursor = decode_cursor(request.args.get('cursor'))
+    
+    names = fields + [name for name in ('id', 'createdAt') if name not in fields]
+    query = projected_query(ALERT_FIELDS, names).add_columns(Alert.version)
+    
+    statuses = parse_list(request.args.get('status')) or ['active']
+    if 'all' not in statuses:
+        query = query.filter(Alert.status.in_(statuses))
+    severities = parse_list(request.args.get('severity'))
+    if severities:
+        query = query.filter(Alert.severity.in_(severities))
+    types = parse_list(request.args.get('type'))
+    if types:
+        query = query.filter(Alert.type.in_(types))
+    bbox = parse_bbox(request.args.get('bbox'))
+    if bbox:
+        min_lat, min_lng, max_lat, max_lng = bbox
+        query = query.filter(Alert.lat.between(min_lat, max_lat), Alert.lng.between(min_lng, max_lng))
+    since = _parse_since()
+    if since:
+        query = query.filter(db.or_(Alert.created_at >= since, Alert.resolved_at >= since))
+    if cursor:
+        try:
+            cursor_time = datetime.fromisoformat(cursor[0])
+            cursor_id = cursor[1]
+        except (ValueError, TypeError, IndexError):
+            raise ListingError('Invalid cursor')
+        query = query.filter(db.or_(
+            Alert.created_at < cursor_time,
+            db.and_(Alert.created_at == cursor_time, Alert.id < cursor_id)
+        ))
+    
+    query = query.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(limit + 1)
+    keys = fetch_keys(query, Alert, Alert.created_at.label('createdAt'))
+    has_more = len(keys) > limit
+    keys = keys[:limit]
+    
+    items = join_array(encode_keys(keys, query, Alert, ALERT_FIELDS, names, fields, 'alert'))
+    next_cursor = None
+    if has_more:
+        last = keys[-1]
+        next_cursor = encode_cursor([last.createdAt.isoformat(), last.id])
+    
+    return b'{"items":' + items + b',"nextCursor":' + dumps(next_cursor) + b'}'
+
 @app.route('/api/police/tourists', methods=['GET'])
+@query_budget(3)
 def get_all_tourists():
     try:
-        tourists = Tourist.query.all()
-        return jsonify([tourist.to_dict() for tourist in tourists])
+        def build():
+            if wants_listing():
+                return list_tourists(), ['tourists']
+            names = list(TOURIST_FIELDS)
+            query = projected_query(TOURIST_FIELDS, names).add_columns(Tourist.version)
+            keys = fetch_keys(query, Tourist, Tourist.tourist_id.label('touristId'))
+            bypass, overlay = buffered_location_bypass()
+            return join_array(encode_keys(keys, query, Tourist, TOURIST_FIELDS, names, names, 'tourist', bypass, overlay)), ['tourists']
+        
+        return cached_response(('tourists', request.full_path), build)
     
+    except ListingError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Get all tourists error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/police/tourists/nearby', methods=['GET'])
+def get_nearby_tourists():
+    """Tourists around ?lat=&lng=, within ?radius= metres or the ?k= nearest"""
+    try:
+        lat = _float_arg('lat')
+        lng = _float_arg('lng')
+        if lat is None or lng is None or not -90 <= lat <= 90 or not -180 <= lng <= 180:
+            return jsonify({'error': 'lat and lng are required'}), 400
+        
+        return jsonify(nearby_tourists(lat, lng))
+    
+    except ListingError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Get nearby tourists error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+# Longest trail returned by one request
+MAX_TRAIL_POINTS = 50000
+
+def _parse_time_arg(name, default):
+    value = request.args.get(name)
+    if not value:
+        return default
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+@app.route('/api/police/tourists/<tourist_id>/trail', methods=['GET'])
+def get_tourist_trail(tourist_id):
+    """Location history for a tourist between ?from= and ?to= (ISO times, default last 24h)"""
+    try:
+        try:
+            end = _parse_time_arg('to', datetime.now())
+            start = _parse_time_arg('from', end - timedelta(hours=24))
+        except ValueError:
+            return jsonify({'error': 'Invalid time range'}), 400
+        
+        identity = tourist_identities.resolve(tourist_id)
+        if identity is None:
+            return jsonify({'error': 'Tourist not found'}), 404
+        # Trails are stored by tourist_id
+        tourist_id = identity.tourist_id
+        
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        rows = LocationChunk.query.filter(
+            LocationChunk.tourist_id == tourist_id,
+            LocationChunk.start_time <= end,
+            LocationChunk.end_time >= start
+        ).order_by(LocationChunk.start_time).all()
+        
+        points = [p for row in rows for p in row.to_chunk().points(start_ts, end_ts)]
+        points.extend(history_store.pending_points(tourist_id, start_ts, end_ts))
+        points.sort()
+        
+        truncated = len(points) > MAX_TRAIL_POINTS
+        points = points[-MAX_TRAIL_POINTS:]
+        
+        return jsonify({
+            'touristId': tourist_id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'truncated': truncated,
+            'points': [[datetime.fromtimestamp(t).isoformat(), lat, lng] for t, lat, lng in points]
+        })
+    
+    except Exception as e:
+        logger.error(f"Get tourist trail error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route('/api/police/alerts', methods=['GET'])
+@query_budget(3)
 def get_active_alerts():
     try:
-        alerts = Alert.query.filter_by(status='active').all()
-        return jsonify([alert.to_dict() for alert in alerts])
+        def build():
+            if wants_listing():
+                return list_alerts(), ['alerts']
+            names = list(ALERT_FIELDS)
+            query = projected_query(ALERT_FIELDS, names).add_columns(Alert.version).filter(Alert.status == 'active')
+            return join_array(encode_keys(fetch_keys(query, Alert), query, Alert, ALERT_FIELDS, names, names, 'alert')), ['alerts']
+        
+        return cached_response(('alerts', request.full_path), build)
     
+    except ListingError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Get active alerts error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/police/alerts/stream', methods=['GET'])
+def stream_police_alerts():
+    """Push feed of all alert changes (Server-Sent Events)"""
+    try:
+        return event_stream(['police'])
+    
+    except Exception as e:
+        logger.error(f"Stream police alerts error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route('/api/police/alert/<alert_id>', methods=['PUT'])
+@query_budget(5)
 def update_alert(alert_id):
     try:
         data = UpdateAlertRequest.model_validate(request.json)
@@ -611,8 +2898,11 @@ def update_alert(alert_id):
         if data.status == 'resolved':
             alert.resolved_at = datetime.now()
         
+        # Serialized before the commit expires the alert, saving a reload
+        payload = alert.to_dict()
         db.session.commit()
-        return jsonify(alert.to_dict())
+        publish_alert('alert.updated', payload)
+        return jsonify(payload)
     
     except ValidationError as e:
         return jsonify({'error': 'Invalid request'}), 400
@@ -621,12 +2911,137 @@ def update_alert(alert_id):
         db.session.rollback()
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/police/alert/<alert_id>/nearby', methods=['GET'])
+def get_alert_nearby_tourists(alert_id):
+    """Other tourists around an alert (witnesses, group members, people affected)"""
+    try:
+        alert = Alert.query.get(alert_id)
+        if not alert:
+            return jsonify({'error': 'Alert not found'}), 404
+        
+        tourist_id = db.session.query(Tourist.tourist_id).filter_by(id=alert.tourist_id).scalar()
+        if alert.lat is not None and alert.lng is not None:
+            lat, lng = float(alert.lat), float(alert.lng)
+        else:
+            # Alerts without coordinates fall back to the tourist's last position
+            position = nearby_index().get(tourist_id) if tourist_id else None
+            if position is None:
+                return jsonify({'error': 'Alert has no location'}), 400
+            lat, lng = position
+        
+        result = nearby_tourists(lat, lng, exclude=[tourist_id] if tourist_id else [])
+        result['alertId'] = alert_id
+        return jsonify(result)
+    
+    except ListingError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Get alert nearby tourists error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+# Officer endpoints
+@app.route('/api/police/officers/<user_id>/location', methods=['PUT'])
+def update_officer_location(user_id):
+    try:
+        data = OfficerLocationRequest.model_validate(request.json)
+        
+        officer = db.session.get(OfficerLocation, user_id)
+        if officer is None:
+            user = db.session.get(User, user_id)
+            if not user or user.role != 'police':
+                return jsonify({'error': 'Officer not found'}), 404
+            officer = OfficerLocation(user_id=user_id, available=True)
+            db.session.add(officer)
+        
+        was_available = officer.available
+        officer.lat = Decimal(str(data.lat))
+        officer.lng = Decimal(str(data.lng))
+        if data.available is not None:
+            officer.available = data.available
+        officer.updated_at = datetime.now()
+        db.session.commit()
+        
+        if officer.available and not was_available:
+            request_dispatch()
+        return jsonify(officer.to_dict())
+    
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid request'}), 400
+    except Exception as e:
+        logger.error(f"Update officer location error: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/police/officers', methods=['GET'])
+def get_officers():
+    """Officers with a recent position, and the open alert each is assigned to"""
+    try:
+        assigned = dict(db.session.query(Alert.responded_by, Alert.id).filter(
+            Alert.status.in_(OPEN_ALERT_STATUSES), Alert.responded_by.isnot(None)
+        ).all())
+        officers = OfficerLocation.query.filter(
+            OfficerLocation.updated_at >= datetime.now() - OFFICER_LOCATION_MAX_AGE
+        ).all()
+        
+        results = []
+        for officer in officers:
+            item = officer.to_dict()
+            item['alertId'] = assigned.get(officer.user_id)
+            results.append(item)
+        return jsonify(results)
+    
+    except Exception as e:
+        logger.error(f"Get officers error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/police/dispatch', methods=['POST'])
+def dispatch_officers():
+    """Assign the nearest available officers to all open, unassigned alerts"""
+    try:
+        assignments, unassigned = run_dispatch()
+        return jsonify({
+            'assignments': [
+                {'alertId': alert_id, 'officerId': officer_id, 'distance': round(distance, 1)}
+                for alert_id, officer_id, distance in assignments
+            ],
+            'unassigned': unassigned
+        })
+    
+    except Exception as e:
+        logger.error(f"Dispatch error: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/police/heatmap/<int:z>/<int:x>/<int:y>', methods=['GET'])
+def get_heatmap_tile(z, x, y):
+    """Per-cell tourist and open alert counts for one map tile"""
+    try:
+        if z > HEATMAP_MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            return jsonify({'error': f'Tile out of range (max zoom {HEATMAP_MAX_ZOOM})'}), 400
+        
+        body, etag = heatmap_tiles().tile_json(z, x, y)
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        # Revalidate every time; unchanged tiles cost a 304
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    except Exception as e:
+        logger.error(f"Get heatmap tile error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 # Geo zones endpoints
 @app.route('/api/geo-zones', methods=['GET'])
+@query_budget(2)
 def get_geo_zones():
     try:
-        zones = GeoZone.query.all()
-        return jsonify([zone.to_dict() for zone in zones])
+        def build():
+            return [zone.to_dict() for zone in GeoZone.query.all()], ['zones']
+        
+        return cached_response(('zones',), build)
     
     except Exception as e:
         logger.error(f"Get geo zones error: {str(e)}")
@@ -645,6 +3060,12 @@ def create_geo_zone():
         
         db.session.add(zone)
         db.session.commit()
+        
+        # Index incrementally; the full zone set is only read on first use, and
+        # other workers pick the zone up on their next refresh
+        if geofence_index.loaded:
+            geofence_index.add_zone(zone.id, zone.type, zone.name, zone.coordinates)
+        
         return jsonify(zone.to_dict())
     
     except ValidationError as e:
@@ -656,26 +3077,10 @@ def create_geo_zone():
 
 # Statistics endpoint for police dashboard
 @app.route('/api/police/stats', methods=['GET'])
+@query_budget(4)
 def get_police_stats():
     try:
-        tourists = Tourist.query.all()
-        alerts = Alert.query.filter_by(status='active').all()
-        zones = GeoZone.query.filter_by(type='restricted').all()
-        
-        # Calculate average safety score
-        if tourists:
-            avg_score = sum(float(t.safety_score or 0) for t in tourists) / len(tourists)
-        else:
-            avg_score = 0.0
-        
-        stats = {
-            'activeTourists': len(tourists),
-            'activeAlerts': len(alerts),
-            'highRiskZones': len(zones),
-            'averageSafetyScore': f"{avg_score:.1f}"
-        }
-        
-        return jsonify(stats)
+        return jsonify(current_stats())
     
     except Exception as e:
         logger.error(f"Get police stats error: {str(e)}")
@@ -683,14 +3088,12 @@ def get_police_stats():
 
 # Create alert endpoint for police
 @app.route('/api/police/alerts', methods=['POST'])
+@query_budget(9)
 def create_alert():
     try:
         data = CreateAlertRequest.model_validate(request.json)
         
-        # Find tourist by ID or tourist_id
-        tourist = Tourist.query.filter_by(id=data.touristId).first()
-        if not tourist:
-            tourist = Tourist.query.filter_by(tourist_id=data.touristId).first()
+        tourist = find_tourist(data.touristId)
         if not tourist:
             return jsonify({'error': 'Tourist not found'}), 404
         
@@ -715,7 +3118,10 @@ def create_alert():
         tourist.last_update = datetime.now()
         
         db.session.commit()
-        return jsonify(alert.to_dict())
+        
+        payload = alert.to_dict()
+        publish_alert('alert.created', payload)
+        return jsonify(payload)
     
     except ValidationError as e:
         return jsonify({'error': 'Invalid request'}), 400
@@ -725,140 +3131,277 @@ def create_alert():
         return jsonify({'error': 'Internal server error'}), 500
 
 # PDF report generation
+report_jobs = ReportJobManager(app.config['REPORT_CACHE_DIR'], max_workers=app.config['REPORT_WORKERS'])
+
+# Rows shown per section in the summary report
+REPORT_SECTION_ROWS = 10
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+def report_data_stamp():
+    """Version stamp of everything the report shows; changes whenever the data does"""
+    tourists = db.session.query(
+        func.count(Tourist.id), func.max(Tourist.last_update), func.sum(Tourist.safety_score)
+    ).one()
+    alerts = db.session.query(
+        Alert.status, func.count(Alert.id), func.max(Alert.created_at), func.max(Alert.resolved_at)
+    ).group_by(Alert.status).order_by(Alert.status).all()
+    zones = db.session.query(func.count(GeoZone.id), func.max(GeoZone.created_at)).one()
+    
+    raw = repr((tuple(tourists), [tuple(a) for a in alerts], tuple(zones)))
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+def load_report_snapshot():
+    """Everything the summary report renders, in four queries (no per-row lookups)"""
+    counts = stats_aggregates()
+    zones = db.session.query(func.count(GeoZone.id)).scalar()
+    
+    tourists = db.session.query(
+        Tourist.tourist_id, User.name, Tourist.safety_score, Tourist.status, Tourist.current_location
+    ).outerjoin(User, User.id == Tourist.user_id).order_by(Tourist.tourist_id).limit(REPORT_SECTION_ROWS).all()
+    
+    alerts = db.session.query(
+        Alert.id, Alert.type, Alert.severity, Alert.location, Alert.created_at
+    ).filter(Alert.status == 'active').order_by(Alert.created_at.desc()).limit(REPORT_SECTION_ROWS).all()
+    
+    return {
+        'generated_at': datetime.now(),
+        'summary': {
+            'tourists': counts['tourists'],
+            'active_alerts': counts['active_alerts'],
+            'zones': zones,
+            'restricted_zones': counts['restricted_zones']
+        },
+        'tourists': [tuple(row) for row in tourists],
+        'alerts': [tuple(row) for row in alerts]
+    }
+
+def render_report():
+    """Render the summary report on a worker thread"""
+    with app.app_context():
+        return render_summary_pdf(load_report_snapshot())
+
+def report_response(path):
+    return send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'tourist_safety_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+    )
+
+def report_job_status(job):
+    data = job.to_dict()
+    if job.status == 'done':
+        data['downloadUrl'] = url_for('download_report_job', job_id=job.id)
+    return data
+
+@app.route('/api/police/reports', methods=['POST'])
+def submit_report():
+    """Queue a report for the current data; returns a job to poll"""
+    try:
+        job = report_jobs.submit(report_data_stamp(), render_report)
+        return jsonify(report_job_status(job)), 200 if job.status == 'done' else 202
+    
+    except Exception as e:
+        logger.error(f"Report submit error: {str(e)}")
+        return jsonify({'error': 'Failed to submit report'}), 500
+
+@app.route('/api/police/reports/<job_id>', methods=['GET'])
+def get_report_job(job_id):
+    job = report_jobs.get(job_id) if JOB_ID_PATTERN.match(job_id) else None
+    if not job:
+        return jsonify({'error': 'Report job not found'}), 404
+    return jsonify(report_job_status(job))
+
+@app.route('/api/police/reports/<job_id>/pdf', methods=['GET'])
+def download_report_job(job_id):
+    path = report_jobs.cached(job_id) if JOB_ID_PATTERN.match(job_id) else None
+    if not path:
+        job = report_jobs.get(job_id) if JOB_ID_PATTERN.match(job_id) else None
+        if job and job.status in ('queued', 'running'):
+            return jsonify(report_job_status(job)), 409
+        return jsonify({'error': 'Report not found'}), 404
+    return report_response(path)
+
 @app.route('/api/police/reports/download', methods=['GET'])
+@query_budget(10)
 def download_report():
+    """Synchronous download; served from the cache when the data hasn't changed"""
     try:
-        # Get all data for the report
-        tourists = Tourist.query.all()
-        alerts = Alert.query.all()
-        zones = GeoZone.query.all()
-        
-        # Create PDF in memory
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Title
-        title = Paragraph("Tourist Safety Management System - Report", styles['Title'])
-        story.append(title)
-        story.append(Spacer(1, 20))
-        
-        # Current date
-        date_para = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal'])
-        story.append(date_para)
-        story.append(Spacer(1, 20))
-        
-        # Summary section
-        summary_title = Paragraph("Summary", styles['Heading1'])
-        story.append(summary_title)
-        
-        summary_data = [
-            ['Metric', 'Count'],
-            ['Total Tourists', str(len(tourists))],
-            ['Active Alerts', str(len([a for a in alerts if a.status == 'active']))],
-            ['Total Geo Zones', str(len(zones))],
-            ['High Risk Zones', str(len([z for z in zones if z.type == 'restricted']))]
-        ]
-        
-        summary_table = Table(summary_data)
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        story.append(summary_table)
-        story.append(Spacer(1, 30))
-        
-        # Tourists section
-        tourists_title = Paragraph("Tourist Details", styles['Heading1'])
-        story.append(tourists_title)
-        
-        tourist_data = [['Tourist ID', 'Name', 'Safety Score', 'Status', 'Location']]
-        for tourist in tourists[:10]:  # Limit to first 10 for space
-            user = User.query.get(tourist.user_id)
-            tourist_data.append([
-                tourist.tourist_id,
-                user.name if user else 'Unknown',
-                tourist.safety_score or '0',
-                tourist.status or 'safe',
-                tourist.current_location or 'Unknown'
-            ])
-        
-        tourist_table = Table(tourist_data)
-        tourist_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        story.append(tourist_table)
-        story.append(Spacer(1, 30))
-        
-        # Alerts section
-        alerts_title = Paragraph("Active Alerts", styles['Heading1'])
-        story.append(alerts_title)
-        
-        active_alerts = [a for a in alerts if a.status == 'active']
-        alert_data = [['Alert ID', 'Type', 'Severity', 'Location', 'Created']]
-        for alert in active_alerts[:10]:  # Limit to first 10
-            alert_data.append([
-                alert.id[:8] + '...',
-                alert.type,
-                alert.severity,
-                alert.location or 'Unknown',
-                alert.created_at.strftime('%Y-%m-%d %H:%M') if alert.created_at else 'Unknown'
-            ])
+        stamp = report_data_stamp()
+        path = report_jobs.cached(stamp)
+        if not path:
+            path = report_jobs.store(stamp, render_summary_pdf(load_report_snapshot()))
+        return report_response(path)
+    
+    except Exception as e:
+        logger.error(f"PDF generation error: {str(e)}")
+        return jsonify({'error': 'Failed to generate report'}), 500
+
+# Full reports: every row, paged from the database and streamed as rendered
+REPORT_PAGE_SIZE = 1000
+
+REPORT_TOURIST_COLUMNS = ['Tourist ID', 'Name', 'Safety Score', 'Status', 'Location']
+REPORT_TOURIST_WIDTHS = [110, 130, 70, 60, 162]
+REPORT_ALERT_COLUMNS = ['Alert ID', 'Type', 'Severity', 'Location', 'Created']
+REPORT_ALERT_WIDTHS = [80, 80, 70, 190, 112]
+
+def iter_report_tourists():
+    """Yield (tourist_id, name, safety_score, status, location) in keyset-paged chunks"""
+    last_id = None
+    while True:
+        query = db.session.query(
+            Tourist.id, Tourist.tourist_id, User.name, Tourist.safety_score, Tourist.status, Tourist.current_location
+        ).outerjoin(User, User.id == Tourist.user_id)
+        if last_id is not None:
+            query = query.filter(Tourist.id > last_id)
+        rows = query.order_by(Tourist.id).limit(REPORT_PAGE_SIZE).all()
+        if not rows:
+            return
+        for row in rows:
+            yield (row.tourist_id, row.name or 'Unknown', row.safety_score or '0',
+                   row.status or 'safe', row.current_location or 'Unknown')
+        last_id = rows[-1].id
+
+def iter_report_alerts():
+    """Yield (id, type, severity, location, created_at) for active alerts, newest first"""
+    cursor = None
+    while True:
+        query = db.session.query(
+            Alert.id, Alert.type, Alert.severity, Alert.location, Alert.created_at
+        ).filter(Alert.status == 'active')
+        if cursor is not None:
+            query = query.filter(db.or_(
+                Alert.created_at < cursor[0],
+                db.and_(Alert.created_at == cursor[0], Alert.id < cursor[1])
+            ))
+        rows = query.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(REPORT_PAGE_SIZE).all()
+        if not rows:
+            return
+        for row in rows:
+            yield (row.id, row.type, row.severity, row.location or 'Unknown',
+                   row.created_at.strftime('%Y-%m-%d %H:%M') if row.created_at else 'Unknown')
+        cursor = (rows[-1].created_at, rows[-1].id)
+
+def report_summary_rows():
+    counts = stats_aggregates()
+    return [
+        ('Total Tourists', counts['tourists']),
+        ('Active Alerts', counts['active_alerts']),
+        ('Total Geo Zones', db.session.query(func.count(GeoZone.id)).scalar()),
+        ('High Risk Zones', counts['restricted_zones'])
+    ]
+
+@app.route('/api/police/reports/full', methods=['GET'])
+def download_full_report():
+    """Complete report streamed as ?format=pdf (default), csv or ndjson.
+
+    CSV holds one table, chosen with ?section=tourists (default) or alerts.
+    """
+    try:
+        report_format = request.args.get('format', 'pdf')
+        section = request.args.get('section', 'tourists')
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        if report_format == 'pdf':
+            def generate():
+                sections = [
+                    Section('Tourist Details', REPORT_TOURIST_COLUMNS, REPORT_TOURIST_WIDTHS, iter_report_tourists()),
+                    Section('Active Alerts', REPORT_ALERT_COLUMNS, REPORT_ALERT_WIDTHS, iter_report_alerts(), 'No active alerts')
+                ]
+                pdf = StreamingPdf().render(
+                    'Tourist Safety Management System - Full Report', datetime.now(), report_summary_rows(), sections
+                )
+                for chunk in pdf:
+                    if chunk:
+                        yield chunk
+            mimetype, extension = 'application/pdf', 'pdf'
+        
+        elif report_format == 'csv':
+            if section == 'tourists':
+                columns, rows = REPORT_TOURIST_COLUMNS, iter_report_tourists
+            elif section == 'alerts':
+                columns, rows = REPORT_ALERT_COLUMNS, iter_report_alerts
+            else:
+                return jsonify({'error': 'Unknown section'}), 400
+            def generate():
+                return stream_csv(columns, rows())
+            mimetype, extension = 'text/csv', f'{section}.csv'
+        
+        elif report_format == 'ndjson':
+            def generate():
+                def records():
+                    yield {'record': 'summary', **{label: value for label, value in report_summary_rows()}}
+                    for row in iter_report_tourists():
+                        yield {'record': 'tourist', **dict(zip(REPORT_TOURIST_COLUMNS, row))}
+                    for row in iter_report_alerts():
+                        yield {'record': 'alert', **dict(zip(REPORT_ALERT_COLUMNS, row))}
+                return stream_ndjson(records())
+            mimetype, extension = 'application/x-ndjson', 'ndjson'
         
-        if len(alert_data) > 1:
-            alert_table = Table(alert_data)
-            alert_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(alert_table)
         else:
-            no_alerts = Paragraph("No active alerts", styles['Normal'])
-            story.append(no_alerts)
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
+            return jsonify({'error': 'Unknown format'}), 400
         
-        # Return PDF as response
         return Response(
-            buffer.getvalue(),
-            mimetype='application/pdf',
+            stream_with_context(generate()),
+            mimetype=mimetype,
             headers={
-                'Content-Disposition': f'attachment; filename=tourist_safety_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+                'Content-Disposition': f'attachment; filename=tourist_safety_full_report_{stamp}.{extension}'
             }
         )
     
     except Exception as e:
-        logger.error(f"PDF generation error: {str(e)}")
+        logger.error(f"Full report error: {str(e)}")
         return jsonify({'error': 'Failed to generate report'}), 500
 
 # Health check endpoint
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
+    if draining.is_set():
+        return jsonify({'status': 'draining', 'backend': 'flask'}), 503
     return jsonify({'status': 'healthy', 'backend': 'flask'})
 
+# Worker lifecycle under a pre-forking server (see gunicorn.conf.py). The app
+# is imported once in the master; each worker then gets its own connection
+# pool, and on shutdown drains before exiting.
+draining = threading.Event()
+
+BACKGROUND_TASKS = (
+    proximity_refresh_task, geofence_refresh_task, event_relay_task, stats_reconcile_task, sync_purge_task,
+    score_task, missing_detector_task, dispatch_task, heatmap_refresh_task,
+    history_persist_task, history_compaction_task
+)
+
+def init_worker():
+    """Run in each worker right after fork"""
+    # Pooled connections inherited from the master must not be shared between
+    # processes; drop them without closing the master's sockets
+    with app.app_context():
+        db.engine.dispose(close=False)
+    # Tasks that must run whether or not requests arrive; the rest start on first use
+    missing_detector_task.ensure_started()
+
+def begin_drain():
+    """Stop taking long-lived work so in-flight requests can finish"""
+    draining.set()
+    # Event streams end now; clients reconnect to another worker with Last-Event-ID
+    event_bus.close()
+
+def drain_worker():
+    """Write out buffered state and release resources before the worker exits"""
+    begin_drain()
+    for task in BACKGROUND_TASKS:
+        task.stop()
+    report_jobs.shutdown()
+    try:
+        location_buffer.close()
+        persist_location_history(seal_all=True)
+    except Exception as e:
+        logger.error(f"Drain error: {str(e)}")
+    with app.app_context():
+        db.engine.dispose()
+
 # Frontend is handled by Express/Vite, so remove frontend routes from Flask
 
 # Initialize database and demo data
@@ -901,13 +3444,13 @@ def init_demo_data():
             status='safe',
             valid_until=datetime(2024, 12, 30),
             emergency_contacts=[
-                {"name": "Rahul Sharma", "phone": "+91 98765-43210", "relation": "Brother"},
-                {"name": "Maya Sharma", "phone": "+91 98765-43211", "relation": "Mother"}
+                EmergencyContactEntry(position=0, name="Rahul Sharma", phone="+91 98765-43210", relation="Brother"),
+                EmergencyContactEntry(position=1, name="Maya Sharma", phone="+91 98765-43211", relation="Mother")
             ],
             itinerary=[
-                {"place": "Calangute Beach", "date": "2024-12-26", "time": "9:00 AM - 2:00 PM"},
-                {"place": "Old Goa Churches", "date": "2024-12-27", "time": "10:00 AM - 4:00 PM"},
-                {"place": "Spice Plantation Tour", "date": "2024-12-28", "time": "8:00 AM - 6:00 PM"}
+                ItineraryEntry(position=0, place="Calangute Beach", date="2024-12-26", time="9:00 AM - 2:00 PM"),
+                ItineraryEntry(position=1, place="Old Goa Churches", date="2024-12-27", time="10:00 AM - 4:00 PM"),
+                ItineraryEntry(position=2, place="Spice Plantation Tour", date="2024-12-28", time="8:00 AM - 6:00 PM")
             ]
         )
         db.session.add(tourist)
@@ -923,9 +3466,7 @@ def init_demo_data():
             last_known_lng=Decimal('73.7370'),
             location_sharing=True,
             status='caution',
-            valid_until=datetime(2024, 12, 30),
-            emergency_contacts=[],
-            itinerary=[]
+            valid_until=datetime(2024, 12, 30)
         )
         db.session.add(tourist2)
         
@@ -939,9 +3480,7 @@ def init_demo_data():
             last_known_lng=Decimal('73.9119'),
             location_sharing=True,
             status='safe',
-            valid_until=datetime(2024, 12, 30),
-            emergency_contacts=[],
-            itinerary=[]
+            valid_until=datetime(2024, 12, 30)
         )
         db.session.add(tourist3)
         
@@ -995,14 +3534,28 @@ def init_demo_data():
         logger.error(f"Error initializing demo data: {str(e)}")
         db.session.rollback()
 
-# Initialize database
-with app.app_context():
-    db.create_all()
-    
-    # Check if demo data already exists
-    if not User.query.first():
-        init_demo_data()
+# Initialize database: create tables, run migrations and load demo data into
+# an empty database. Not run on import, so workers and scripts start without
+# touching the schema; run `flask --app app init-db` once per deployment
+def init_database(demo=True):
+    with app.app_context():
+        db.create_all()
+        run_migrations(db.engine)
+        
+        # Check if demo data already exists
+        if demo and not User.query.first():
+            init_demo_data()
+
+@app.cli.command('init-db')
+@click.option('--demo/--no-demo', default=True, help='Load demo data into an empty database')
+def init_db_command(demo):
+    """Create tables, run migrations and load demo data"""
+    init_database(demo)
+    click.echo('Database initialized')
 
 if __name__ == '__main__':
+    # Development server; use gunicorn (see gunicorn.conf.py) in production
+    init_database()
+    init_worker()
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG', '1').lower() in ('1', 'true', 'yes'))
\ No newline at end of file
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for the police tourist list.
+
+Seeds a throwaway database and times three ways of building the
+/api/police/tourists body for the first N tourists:
+
+    orm       ORM instances -> to_dict() -> jsonify (the old path)
+    cold      projected row tuples -> fast encoder, empty row cache
+    warm      the same with every row already encoded (nothing changed),
+              so only (id, version) pairs are read
+
+and, when orjson is installed, the cold path with the standard library
+encoder for comparison. Each timing is the best of --repeat runs:
+
+    cd server && python benchmarks/serialization.py --sizes 10000,100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_of(repeat, fn):
+    """(fastest wall time, last result) over ``repeat`` runs"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000', help='comma-separated row counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    # Always a throwaway database: this seeds data
+    tmpdir = tempfile.mkdtemp(prefix='bench_serialization_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+    sys.path.insert(0, SERVER_DIR)
+
+    import serialization
+    from flask import jsonify
+    from query_plan import seed
+    from app import (app, db, init_database, Tourist, Alert, ItineraryEntry, GeoZone, TOURIST_FIELDS,
+                     projected_query, fetch_keys, encode_keys, row_cache)
+
+    names = list(TOURIST_FIELDS)
+
+    def orm(limit):
+        db.session.expunge_all()
+        tourists = Tourist.query.order_by(Tourist.id).limit(limit).all()
+        return jsonify([tourist.to_dict(details=False) for tourist in tourists]).get_data()
+
+    def projected(limit):
+        query = projected_query(TOURIST_FIELDS, names).add_columns(Tourist.version).order_by(Tourist.id).limit(limit)
+        keys = fetch_keys(query, Tourist)
+        return serialization.join_array(encode_keys(keys, query, Tourist, TOURIST_FIELDS, names, names, 'tourist'))
+
+    def cold(limit):
+        row_cache.clear()
+        return projected(limit)
+
+    def cold_stdlib(limit):
+        fast, serialization.orjson = serialization.orjson, None
+        try:
+            return cold(limit)
+        finally:
+            serialization.orjson = fast
+
+    runs = [('orm', orm), ('cold', cold), ('warm', projected)]
+    if serialization.orjson is not None:
+        runs.insert(2, ('cold-stdlib', cold_stdlib))
+
+    init_database()
+    with app.app_context(), app.test_request_context():
+        print(f"Seeding {sizes[-1]} tourists...")
+        seed(db, Tourist, Alert, ItineraryEntry, GeoZone, sizes[-1], 0, 0)
+        row_cache.max_rows = max(row_cache.max_rows, sizes[-1])
+
+        print(f"{'rows':>8} {'path':<12} {'seconds':>9} {'speedup':>8}")
+        for size in sizes:
+            baseline = None
+            expected = None
+            for label, fn in runs:
+                if label == 'warm':
+                    projected(size)
+                elapsed, body = best_of(args.repeat, lambda: fn(size))
+                # Same data either way (key order may differ)
+                items = json.loads(body)
+                if expected is None:
+                    expected = items
+                elif items != expected:
+                    raise SystemExit(f"{label} output differs from orm at {size} rows")
+                baseline = baseline or elapsed
+                print(f"{size:>8} {label:<12} {elapsed:>9.3f} {baseline / elapsed:>7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
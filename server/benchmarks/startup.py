@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: how long a fresh process takes to serve its first request.
+
+Initializes a throwaway database once (as `flask --app app init-db` would),
+then starts --repeat fresh interpreters that each time
+
+    import    importing app.py (modules, models, routes, config)
+    first     the first request through the test client, opening the
+              database connection
+    process   the whole child process as seen from outside, including
+              interpreter startup and exit
+
+and reports whether ReportLab was loaded along the way. Timings are the
+median over the runs:
+
+    cd server && python benchmarks/startup.py --repeat 10
+    cd server && python benchmarks/startup.py --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(path):
+    """Runs in the measured process; prints one JSON line of timings"""
+    sys.path.insert(0, SERVER_DIR)
+    started = time.perf_counter()
+    from app import app
+    imported = time.perf_counter()
+    response = app.test_client().get(path)
+    served = time.perf_counter()
+    print(json.dumps({
+        'import': imported - started,
+        'first': served - imported,
+        'status': response.status_code,
+        'reportlab': any(name.startswith('reportlab') for name in sys.modules)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--path', default='/api/police/stats', help='first request to send')
+    parser.add_argument('--budget-ms', type=float, help='exit non-zero if median import + first request exceeds this')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.path)
+        return 0
+
+    # Always a throwaway database
+    tmpdir = tempfile.mkdtemp(prefix='bench_startup_')
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmpdir, 'bench.db'))
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'],
+                   cwd=SERVER_DIR, env=env, check=True, capture_output=True)
+
+    runs = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', '--path', args.path],
+                                cwd=SERVER_DIR, env=env, check=True, capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        if timings['status'] >= 500:
+            raise SystemExit(f"{args.path} returned {timings['status']}")
+        timings['process'] = elapsed
+        runs.append(timings)
+
+    print(f"{'phase':<10} {'median ms':>10} {'min ms':>8}")
+    for phase in ('import', 'first', 'process'):
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<10} {statistics.median(values):>10.1f} {min(values):>8.1f}")
+    print(f"reportlab loaded: {'yes' if any(run['reportlab'] for run in runs) else 'no'}")
+
+    total = statistics.median((run['import'] + run['first']) * 1000 for run in runs)
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"Over budget: {total:.1f} ms > {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
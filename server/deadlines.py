@@ -0,0 +1,109 @@
+"""
+Per-key deadlines in a hashed timer wheel.
+
+Deadlines are rounded up to fixed-width slots. Re-arming a key moves it
+between slot sets in O(1), and collecting expired keys only visits the slots
+that have elapsed since the last collection, so the cost of a tick depends on
+how many deadlines expired rather than on how many are armed.
+"""
+
+import math
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# Seconds per slot; deadlines fire up to this late
+DEFAULT_RESOLUTION = 10.0
+
+
+class DeadlineWheel:
+    def __init__(self, resolution: float = DEFAULT_RESOLUTION):
+        self.resolution = resolution
+        self._slots: Dict[int, Set[Hashable]] = {}
+        self._slot_of: Dict[Hashable, int] = {}
+        self._cursor: Optional[int] = None  # first slot not yet collected
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    def _slot(self, deadline: float) -> int:
+        return math.ceil(deadline / self.resolution)
+
+    def _cancel_locked(self, key: Hashable):
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return
+        keys = self._slots.get(slot)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._slots[slot]
+
+    def _arm_locked(self, key: Hashable, deadline: float):
+        slot = self._slot(deadline)
+        if self._cursor is not None and slot < self._cursor:
+            # Already due; fire on the next collection
+            slot = self._cursor
+        if self._slot_of.get(key) == slot:
+            return
+        self._cancel_locked(key)
+        self._slot_of[key] = slot
+        self._slots.setdefault(slot, set()).add(key)
+
+    def arm(self, key: Hashable, deadline: float):
+        """Set (or move) the deadline for ``key`` to the epoch time ``deadline``."""
+        with self._lock:
+            self._arm_locked(key, deadline)
+
+    def cancel(self, key: Hashable):
+        with self._lock:
+            self._cancel_locked(key)
+
+    def expired(self, now: float) -> List[Hashable]:
+        """Remove and return every key whose deadline is at or before ``now``."""
+        due = []
+        with self._lock:
+            current = math.floor(now / self.resolution)
+            if self._cursor is None:
+                # First collection: everything armed before now is due
+                slots = [slot for slot in self._slots if slot <= current]
+            elif current - self._cursor > len(self._slots):
+                # Long gap: cheaper to look at the occupied slots than every elapsed one
+                slots = [slot for slot in self._slots if self._cursor <= slot <= current]
+            else:
+                slots = range(self._cursor, current + 1)
+            for slot in slots:
+                keys = self._slots.pop(slot, None)
+                if keys:
+                    for key in keys:
+                        del self._slot_of[key]
+                    due.extend(keys)
+            if self._cursor is None or current + 1 > self._cursor:
+                self._cursor = current + 1
+        return due
+
+    def load(self, deadlines: Iterable[Tuple[Hashable, float]]):
+        """Arm (key, deadline) pairs in bulk, replacing anything armed before."""
+        with self._lock:
+            self._slots = {}
+            self._slot_of = {}
+            for key, deadline in deadlines:
+                self._arm_locked(key, deadline)
+        self._loaded = True
+
+    def ensure_loaded(self, loader):
+        """Populate the wheel from ``loader()`` the first time it is needed."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load(loader())
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of
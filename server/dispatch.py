@@ -0,0 +1,158 @@
+"""
+Nearest-responder dispatch.
+
+All open alerts are assigned in one batch so that a burst of simultaneous
+alerts is solved jointly: the assignment minimises total travel distance
+instead of greedily giving each alert whichever officer happens to be closest
+when it is processed. At first only each alert's few nearest officers (found
+through the proximity index) are considered, which keeps the assignment
+problem small enough to re-solve on every burst. In a clustered burst those
+few are the same officers for every alert, so alerts left unassigned are
+widened to the nearest free officers, as many as there are unassigned
+alerts, and the problem is solved again until nothing more can be assigned.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from proximity import ProximityIndex
+
+# Nearest officers first considered for each alert
+DEFAULT_CANDIDATES = 8
+
+# Leaving an alert unassigned costs more than any real trip, scaled by
+# severity so that when officers run short the least severe alerts wait
+UNASSIGNED_COST = 1e8
+SEVERITY_WEIGHT = {
+    'critical': 4,
+    'high': 3,
+    'medium': 2,
+    'low': 1
+}
+
+
+def _hungarian(cost: List[List[float]]) -> List[int]:
+    """Minimum-cost assignment for an n x m matrix with n <= m.
+
+    Returns the column assigned to each row. O(n^2 m), the shortest
+    augmenting path form of the Hungarian algorithm.
+    """
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    inf = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    match = [0] * (m + 1)  # row matched to each column, 1-based, 0 = free
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            row = cost[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    reduced = row[j - 1] - ui0 - v[j]
+                    if reduced < minv[j]:
+                        minv[j] = reduced
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+
+    assignment = [-1] * n
+    for j in range(1, m + 1):
+        if match[j]:
+            assignment[match[j] - 1] = j - 1
+    return assignment
+
+
+def _solve(alerts: Sequence[Tuple[str, float, float, str]], options: List[Dict[str, float]]) -> List[Optional[str]]:
+    """Officer assigned to each alert, or None, choosing only from its ``options``."""
+    columns: Dict[str, int] = {}
+    for distances in options:
+        for officer_id in distances:
+            columns.setdefault(officer_id, len(columns))
+
+    officer_ids = list(columns)
+    # Pairing an alert with an officer it can't use costs the same as leaving
+    # it unassigned, so padding columns are only needed to make n <= m
+    width = max(len(officer_ids), len(alerts))
+    cost = []
+    for (alert_id, lat, lng, severity), distances in zip(alerts, options):
+        row = [UNASSIGNED_COST * SEVERITY_WEIGHT.get(severity, 1)] * width
+        for officer_id, distance in distances.items():
+            row[columns[officer_id]] = distance
+        cost.append(row)
+
+    chosen = []
+    for distances, column in zip(options, _hungarian(cost)):
+        officer_id = officer_ids[column] if column < len(officer_ids) else None
+        chosen.append(officer_id if officer_id in distances else None)
+    return chosen
+
+
+def plan_dispatch(alerts: Sequence[Tuple[str, float, float, str]], officers: ProximityIndex,
+                  candidates: int = DEFAULT_CANDIDATES, max_distance: Optional[float] = None
+                  ) -> Tuple[List[Tuple[str, str, float]], List[str]]:
+    """Assign officers to alerts.
+
+    ``alerts`` are (alert_id, lat, lng, severity) tuples and ``officers`` an
+    index of available officer positions. Returns (assignments, unassigned)
+    where assignments are (alert_id, officer_id, metres) and unassigned the
+    ids of alerts left without an officer.
+    """
+    if not alerts:
+        return [], []
+
+    options: List[Dict[str, float]] = [
+        dict(officers.nearest(lat, lng, candidates, max_radius_m=max_distance))
+        for alert_id, lat, lng, severity in alerts
+    ]
+    chosen = _solve(alerts, options)
+    while True:
+        waiting = [i for i, officer_id in enumerate(chosen) if officer_id is None]
+        busy = {officer_id for officer_id in chosen if officer_id is not None}
+        if not waiting or len(busy) >= len(officers):
+            break
+        # With this many free officers each, every waiting alert could be
+        # served at once, so one more solve assigns all that can be
+        widen = max(candidates, len(waiting))
+        added = False
+        for i in waiting:
+            alert_id, lat, lng, severity = alerts[i]
+            for officer_id, distance in officers.nearest(lat, lng, widen, max_radius_m=max_distance, exclude=busy):
+                if officer_id not in options[i]:
+                    options[i][officer_id] = distance
+                    added = True
+        # Each pass with new candidates assigns at least one more alert
+        if not added:
+            break
+        chosen = _solve(alerts, options)
+
+    assignments = []
+    unassigned = []
+    for (alert_id, _, _, _), distances, officer_id in zip(alerts, options, chosen):
+        if officer_id is None:
+            unassigned.append(alert_id)
+        else:
+            assignments.append((alert_id, officer_id, distances[officer_id]))
+    return assignments, unassigned
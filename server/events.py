@@ -0,0 +1,133 @@
+"""
+In-process publish/subscribe bus for push notifications.
+
+Events carry a monotonically increasing id so Server-Sent Events clients can
+resume with ``Last-Event-ID``; recent events are kept in a ring buffer for
+replay. When several worker processes are running, an external relay (see
+``app.py``) feeds events from other processes in through ``deliver``.
+"""
+
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+# Events kept for Last-Event-ID replay
+REPLAY_BUFFER_SIZE = 1000
+
+# Per-subscriber backlog; a client this far behind is dropped and reconnects
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class Event:
+    __slots__ = ('id', 'topic', 'type', 'data')
+
+    def __init__(self, event_id: int, topic: str, event_type: str, data: Dict[str, Any]):
+        self.id = event_id
+        self.topic = topic
+        self.type = event_type
+        self.data = data
+
+    def to_sse(self) -> str:
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+class Subscription:
+    """A subscriber's queue of events for a set of topics."""
+
+    def __init__(self, bus: 'EventBus', topics: Iterable[str]):
+        self.bus = bus
+        self.topics = frozenset(topics)
+        self.queue: 'queue.Queue[Optional[Event]]' = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+        self.closed = False
+
+    def offer(self, event: Event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout: float) -> Optional[Event]:
+        """Next event, or None on timeout, overflow or shutdown."""
+        if self.overflowed or self.closed:
+            return None
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBus:
+    def __init__(self, replay_size: int = REPLAY_BUFFER_SIZE):
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._recent: deque = deque(maxlen=replay_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        sub = Subscription(self, topics)
+        with self._lock:
+            sub.closed = self._closed
+            for topic in sub.topics:
+                self._subscribers.setdefault(topic, []).append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            for topic in sub.topics:
+                subs = self._subscribers.get(topic)
+                if subs and sub in subs:
+                    subs.remove(sub)
+                    if not subs:
+                        del self._subscribers[topic]
+
+    def publish(self, topic: str, event_type: str, data: Dict[str, Any]) -> Event:
+        """Publish locally, assigning the next in-process event id."""
+        with self._lock:
+            event = Event(next(self._ids), topic, event_type, data)
+        self.deliver([event])
+        return event
+
+    def deliver(self, events: Iterable[Event]):
+        """Fan out events that already carry ids (local or relayed)."""
+        for event in events:
+            with self._lock:
+                self._recent.append(event)
+                subs = list(self._subscribers.get(event.topic, ()))
+            for sub in subs:
+                sub.offer(event)
+
+    def replay(self, topics: Iterable[str], after_id: int) -> List[Event]:
+        """Buffered events newer than ``after_id`` for the given topics."""
+        topics = set(topics)
+        with self._lock:
+            return [e for e in self._recent if e.id > after_id and e.topic in topics]
+
+    def close(self):
+        """Wake every subscriber with end-of-stream, e.g. while a worker drains."""
+        with self._lock:
+            self._closed = True
+            subs = {id(s): s for subs in self._subscribers.values() for s in subs}.values()
+        for sub in subs:
+            sub.closed = True
+            try:
+                sub.queue.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({id(s) for subs in self._subscribers.values() for s in subs})
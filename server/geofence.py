@@ -0,0 +1,188 @@
+"""
+Geofence evaluation engine.
+
+Keeps an in-memory spatial index over GeoZone polygons so a location fix can be
+tested against thousands of zones without touching the database. Zones are
+bucketed into a uniform lat/lng grid by bounding box; a lookup only runs the
+point-in-polygon test for the handful of zones registered in the fix's cell.
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+# ~1.1km at the equator; small enough that a cell rarely holds many zones
+DEFAULT_CELL_SIZE = 0.01
+
+# Zones spanning more cells than this are kept in a separate list and only
+# bounding-box filtered, so one huge polygon can't blow up the grid
+MAX_CELLS_PER_ZONE = 4096
+
+
+class Zone:
+    """A polygon zone with its precomputed bounding box."""
+
+    __slots__ = ('id', 'type', 'name', 'lats', 'lngs', 'min_lat', 'max_lat', 'min_lng', 'max_lng')
+
+    def __init__(self, zone_id: str, zone_type: str, name: str, coordinates: List[Dict[str, float]]):
+        self.id = zone_id
+        self.type = zone_type
+        self.name = name
+        self.lats = [float(c['lat']) for c in coordinates]
+        self.lngs = [float(c['lng']) for c in coordinates]
+        self.min_lat = min(self.lats)
+        self.max_lat = max(self.lats)
+        self.min_lng = min(self.lngs)
+        self.max_lng = max(self.lngs)
+
+    def in_bbox(self, lat: float, lng: float) -> bool:
+        return self.min_lat <= lat <= self.max_lat and self.min_lng <= lng <= self.max_lng
+
+    def contains(self, lat: float, lng: float) -> bool:
+        """Ray-casting point-in-polygon test (edges count as inside)."""
+        if not self.in_bbox(lat, lng):
+            return False
+
+        lats, lngs = self.lats, self.lngs
+        inside = False
+        j = len(lats) - 1
+        for i in range(len(lats)):
+            yi, xi = lats[i], lngs[i]
+            yj, xj = lats[j], lngs[j]
+            # The crossing test below skips vertices and horizontal edges at the point's latitude
+            if yi == lat and (xi == lng or (yj == lat and min(xi, xj) <= lng <= max(xi, xj))):
+                return True
+            if (yi > lat) != (yj > lat):
+                x_cross = (xj - xi) * (lat - yi) / (yj - yi) + xi
+                if lng == x_cross:
+                    return True
+                if lng < x_cross:
+                    inside = not inside
+            j = i
+        return inside
+
+
+class GeofenceIndex:
+    """Uniform-grid spatial index of zones with bounding-box prefilter."""
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._zones: Dict[str, Zone] = {}
+        self._grid: Dict[Tuple[int, int], List[Zone]] = {}
+        self._large: List[Zone] = []
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size), math.floor(lng / self.cell_size))
+
+    def _cells_for(self, zone: Zone):
+        lat0, lng0 = self._cell(zone.min_lat, zone.min_lng)
+        lat1, lng1 = self._cell(zone.max_lat, zone.max_lng)
+        if (lat1 - lat0 + 1) * (lng1 - lng0 + 1) > MAX_CELLS_PER_ZONE:
+            return None
+        return [(y, x) for y in range(lat0, lat1 + 1) for x in range(lng0, lng1 + 1)]
+
+    def _remove_locked(self, zone_id: str):
+        zone = self._zones.pop(zone_id, None)
+        if zone is None:
+            return
+        cells = self._cells_for(zone)
+        if cells is None:
+            self._large = [z for z in self._large if z.id != zone_id]
+            return
+        for cell in cells:
+            bucket = [z for z in self._grid.get(cell, []) if z.id != zone_id]
+            if bucket:
+                self._grid[cell] = bucket
+            else:
+                self._grid.pop(cell, None)
+
+    def add_zone(self, zone_id: str, zone_type: str, name: str, coordinates: List[Dict[str, float]]):
+        """Insert or replace a zone. Zones with fewer than 3 vertices are ignored."""
+        if not coordinates or len(coordinates) < 3:
+            return
+        zone = Zone(zone_id, zone_type, name, coordinates)
+        cells = self._cells_for(zone)
+        with self._lock:
+            self._remove_locked(zone_id)
+            self._zones[zone_id] = zone
+            if cells is None:
+                # Copy-on-write so concurrent readers never see a half-built list
+                self._large = self._large + [zone]
+            else:
+                for cell in cells:
+                    self._grid[cell] = self._grid.get(cell, []) + [zone]
+
+    def remove_zone(self, zone_id: str):
+        with self._lock:
+            self._remove_locked(zone_id)
+
+    def load(self, zones):
+        """Replace the index contents with (id, type, name, coordinates) tuples.
+
+        The new index is built aside and swapped in, so lookups during a reload
+        see the old zones rather than a partial set.
+        """
+        by_id: Dict[str, Zone] = {}
+        grid: Dict[Tuple[int, int], List[Zone]] = {}
+        large: List[Zone] = []
+        for zone_id, zone_type, name, coordinates in zones:
+            if not coordinates or len(coordinates) < 3:
+                continue
+            zone = Zone(zone_id, zone_type, name, coordinates)
+            by_id[zone_id] = zone
+            cells = self._cells_for(zone)
+            if cells is None:
+                large.append(zone)
+            else:
+                for cell in cells:
+                    grid.setdefault(cell, []).append(zone)
+        with self._lock:
+            self._zones, self._grid, self._large = by_id, grid, large
+        self._loaded = True
+
+    def ensure_loaded(self, loader):
+        """Populate the index from ``loader()`` the first time it is needed."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load(loader())
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self):
+        return len(self._zones)
+
+    def get(self, zone_id: str) -> Optional[Zone]:
+        return self._zones.get(zone_id)
+
+    def locate(self, lat: Optional[float], lng: Optional[float]) -> Set[str]:
+        """Return the ids of all zones containing the point."""
+        if lat is None or lng is None:
+            return set()
+        lat, lng = float(lat), float(lng)
+        found = set()
+        for zone in self._grid.get(self._cell(lat, lng), ()):
+            if zone.contains(lat, lng):
+                found.add(zone.id)
+        for zone in self._large:
+            if zone.contains(lat, lng):
+                found.add(zone.id)
+        return found
+
+    def transition(self, old_lat, old_lng, new_lat, new_lng) -> Tuple[List[Zone], List[Zone]]:
+        """Return (entered, exited) zones for a move between two fixes.
+
+        Membership is derived from the previous stored position rather than
+        per-tourist state, so the result is correct across restarts and workers.
+        """
+        before = self.locate(old_lat, old_lng)
+        after = self.locate(new_lat, new_lng)
+        entered = [self._zones[z] for z in after - before if z in self._zones]
+        exited = [self._zones[z] for z in before - after if z in self._zones]
+        return entered, exited
@@ -0,0 +1,81 @@
+"""
+Gunicorn settings for production serving.
+
+Run from the server directory, where gunicorn picks this file up:
+
+    flask --app app init-db
+    gunicorn wsgi:app
+
+Every setting can be overridden from the environment (or on the command line).
+Requests are served by WEB_CONCURRENCY worker processes with WEB_THREADS
+threads each, so a slow PDF render ties up one thread rather than the server,
+and CPU-bound work spreads over every core.
+"""
+
+import os
+import signal
+
+# Python runs one thread at a time per process; use a process per core
+# (twice over, as processes also wait on the database) and a few threads each
+try:
+    cores = len(os.sched_getaffinity(0))
+except AttributeError:
+    cores = os.cpu_count() or 1
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', str(cores * 2 + 1)))
+threads = int(os.environ.get('WEB_THREADS', '4'))
+worker_class = 'gthread'
+
+# Import the app once in the master and fork workers from it; with this off
+# each worker imports the app itself. Tables come from `flask --app app init-db`
+preload_app = os.environ.get('PRELOAD_APP', '1').lower() in ('1', 'true', 'yes')
+
+# Seconds a stopping worker has to finish in-flight requests before it is killed
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', '30'))
+timeout = int(os.environ.get('WORKER_TIMEOUT', '60'))
+keepalive = int(os.environ.get('KEEPALIVE', '5'))
+
+# Recycle workers now and then to bound memory growth; 0 never recycles
+max_requests = int(os.environ.get('MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('ACCESS_LOG') or None
+
+# One pooled connection per worker thread
+os.environ.setdefault('DB_POOL_SIZE', str(threads))
+
+# Response caches and event streams live in each worker; with several workers
+# they only see each other's writes when changes are relayed through the database
+if workers > 1:
+    os.environ.setdefault('EVENT_RELAY', 'database')
+
+
+def on_starting(server):
+    if server.cfg.workers > 1 and os.environ.get('EVENT_RELAY', 'local') != 'database':
+        raise SystemExit("EVENT_RELAY must be 'database' when running more than one worker")
+
+
+def post_fork(server, worker):
+    from app import init_worker
+    init_worker()
+
+
+def post_worker_init(worker):
+    from app import begin_drain
+
+    # Gunicorn stops accepting on SIGTERM but then waits for open requests;
+    # end event streams straight away so they don't hold the worker until it is killed
+    stop = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        begin_drain()
+        if callable(stop):
+            stop(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+
+def worker_exit(server, worker):
+    from app import drain_worker
+    drain_worker()
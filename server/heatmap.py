@@ -0,0 +1,198 @@
+"""
+Density heatmap aggregates on the Web Mercator tile pyramid.
+
+Every tile at every zoom level is split into BINS x BINS cells, and each cell
+keeps counts per category (tourist status, alert status and severity). The
+counts are maintained incrementally: moving or re-categorising one entity
+touches one cell per zoom level, so serving a tile is a dictionary lookup no
+matter how many entities are tracked.
+"""
+
+import hashlib
+import json
+import math
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+# Cells per tile side; a power of two so coarser levels are a bit shift away
+BINS = 16
+BIN_BITS = 4
+
+# Deepest zoom with aggregates; roughly 150m cells at the equator
+MAX_ZOOM = 16
+
+# Web Mercator stops short of the poles
+MAX_LATITUDE = 85.05112878
+
+# Rendered tiles kept in the cache
+TILE_CACHE_SIZE = 4096
+
+Category = Tuple[str, ...]
+
+
+def mercator_bin(lat: float, lng: float) -> Tuple[int, int]:
+    """Global (x, y) cell at MAX_ZOOM for a position."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, float(lat)))
+    lng = max(-180.0, min(180.0, float(lng)))
+    scale = (1 << (MAX_ZOOM + BIN_BITS))
+    x = (lng + 180.0) / 360.0
+    rad = math.radians(lat)
+    y = (1.0 - math.log(math.tan(rad) + 1.0 / math.cos(rad)) / math.pi) / 2.0
+    return min(int(x * scale), scale - 1), min(int(y * scale), scale - 1)
+
+
+class HeatmapGrid:
+    """Per-cell category counts for every tile up to MAX_ZOOM."""
+
+    def __init__(self):
+        self._entities: Dict[Hashable, Tuple[int, int, Category]] = {}
+        self._tiles: Dict[Tuple[int, int, int], Dict[Tuple[int, int], Dict[Category, int]]] = {}
+        self._versions: Dict[Tuple[int, int, int], int] = {}
+        self._cache: 'OrderedDict[Tuple[int, int, int], Tuple[int, dict]]' = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    def _apply(self, gx: int, gy: int, category: Category, delta: int):
+        for z in range(MAX_ZOOM + 1):
+            shift = MAX_ZOOM - z
+            x, y = gx >> shift, gy >> shift
+            tile = (z, x >> BIN_BITS, y >> BIN_BITS)
+            cell = (x & (BINS - 1), y & (BINS - 1))
+            cells = self._tiles.setdefault(tile, {})
+            counts = cells.setdefault(cell, {})
+            count = counts.get(category, 0) + delta
+            if count > 0:
+                counts[category] = count
+            else:
+                counts.pop(category, None)
+                if not counts:
+                    del cells[cell]
+                    if not cells:
+                        del self._tiles[tile]
+            self._versions[tile] = self._versions.get(tile, 0) + 1
+
+    def _remove_locked(self, key: Hashable):
+        entry = self._entities.pop(key, None)
+        if entry is not None:
+            self._apply(entry[0], entry[1], entry[2], -1)
+
+    def update(self, key: Hashable, lat, lng, category: Optional[Category]):
+        """Place an entity. A missing position or category removes it."""
+        with self._lock:
+            self._update_locked(key, lat, lng, category)
+
+    def _update_locked(self, key, lat, lng, category):
+        if lat is None or lng is None or category is None:
+            self._remove_locked(key)
+            return
+        gx, gy = mercator_bin(lat, lng)
+        entry = self._entities.get(key)
+        if entry == (gx, gy, category):
+            return
+        self._remove_locked(key)
+        self._entities[key] = (gx, gy, category)
+        self._apply(gx, gy, category, 1)
+
+    def move(self, key: Hashable, lat, lng):
+        """Move an already placed entity, keeping its category."""
+        with self._lock:
+            entry = self._entities.get(key)
+            if entry is not None:
+                self._update_locked(key, lat, lng, entry[2])
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            self._remove_locked(key)
+
+    def load(self, entities: Iterable[Tuple[Hashable, object, object, Optional[Category]]]):
+        """Rebuild from (key, lat, lng, category) tuples and swap it in."""
+        placed: Dict[Hashable, Tuple[int, int, Category]] = {}
+        for key, lat, lng, category in entities:
+            if lat is not None and lng is not None and category is not None:
+                placed[key] = mercator_bin(lat, lng) + (category,)
+
+        # Count the deepest level once, then roll each level up into the next
+        tiles: Dict[Tuple[int, int, int], Dict[Tuple[int, int], Dict[Category, int]]] = {}
+        level = Counter(placed.values())
+        for z in range(MAX_ZOOM, -1, -1):
+            for (x, y, category), count in level.items():
+                cells = tiles.setdefault((z, x >> BIN_BITS, y >> BIN_BITS), {})
+                cells.setdefault((x & (BINS - 1), y & (BINS - 1)), {})[category] = count
+            parent = Counter()
+            for (x, y, category), count in level.items():
+                parent[(x >> 1, y >> 1, category)] += count
+            level = parent
+
+        with self._lock:
+            self._entities = placed
+            self._tiles = tiles
+            # A new generation invalidates every cached tile
+            self._generation += 1
+            self._versions = {}
+            self._cache.clear()
+        self._loaded = True
+
+    def ensure_loaded(self, loader):
+        """Populate the grid from ``loader()`` the first time it is needed."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load(loader())
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self):
+        return len(self._entities)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entities)
+
+    def tile(self, z: int, x: int, y: int) -> dict:
+        """Cells of one tile as {'x', 'y', <kind>: nested counts}."""
+        return self._render(z, x, y)[0]
+
+    def tile_json(self, z: int, x: int, y: int) -> Tuple[bytes, str]:
+        """The tile as JSON and a strong entity tag for it.
+
+        The tag is a hash of the body, not a local counter, so processes
+        holding different counts can never hand out the same tag.
+        """
+        _, body, etag = self._render(z, x, y)
+        return body, etag
+
+    def _render(self, z: int, x: int, y: int) -> Tuple[dict, bytes, str]:
+        key = (z, x, y)
+        with self._lock:
+            version = (self._generation, self._versions.get(key, 0))
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                self._cache.move_to_end(key)
+                return cached[1]
+            cells = [(cell, dict(counts)) for cell, counts in self._tiles.get(key, {}).items()]
+
+        result = []
+        for (cx, cy), counts in sorted(cells, key=lambda item: (item[0][1], item[0][0])):
+            item = {'x': cx, 'y': cy}
+            for category, count in counts.items():
+                node = item
+                for part in category[:-1]:
+                    node = node.setdefault(part, {})
+                node[category[-1]] = count
+            result.append(item)
+        payload = {'z': z, 'x': x, 'y': y, 'bins': BINS, 'cells': result}
+        body = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+        rendered = (payload, body, hashlib.sha256(body).hexdigest()[:32])
+
+        with self._lock:
+            self._cache[key] = (version, rendered)
+            self._cache.move_to_end(key)
+            while len(self._cache) > TILE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return rendered
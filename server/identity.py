@@ -0,0 +1,79 @@
+"""
+Tourist identifier resolution.
+
+Tourists are addressed by their primary key, their TID (TID-2024-001523) or
+the ID of the user who owns them. Every form resolves to the same
+(primary key, TID) pair through one bounded LRU cache, so repeat requests
+skip the lookup query. Only hits are cached: an unknown identifier is looked
+up again each time, so a tourist registered by another worker process is
+found at once. Entries expire after a while so deletions made elsewhere are
+eventually noticed; local registrations and deletions drop them at commit.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, NamedTuple, Optional
+
+# Identifiers kept before the least recently used are dropped
+DEFAULT_MAX_ENTRIES = 50000
+
+# Seconds a resolved identifier is trusted without asking the database again
+DEFAULT_TTL = 300
+
+
+class TouristIdentity(NamedTuple):
+    pk: str
+    tourist_id: str
+
+
+class IdentityResolver:
+    def __init__(self, loader: Callable[[str], Optional[TouristIdentity]],
+                 max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.loader = loader
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()  # ref -> (identity, expires)
+        self._lock = threading.Lock()
+
+    def resolve(self, ref: str) -> Optional[TouristIdentity]:
+        """(pk, tourist_id) for any identifier form, or None if no tourist matches."""
+        if not ref:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(ref)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(ref)
+                    return entry[0]
+                del self._entries[ref]
+
+        identity = self.loader(ref)
+        if identity is not None:
+            self.remember(ref, identity)
+        return identity
+
+    def remember(self, ref: str, identity: TouristIdentity):
+        with self._lock:
+            self._entries[ref] = (identity, time.monotonic() + self.ttl)
+            self._entries.move_to_end(ref)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, refs: Iterable[str], pks: Iterable[str] = ()):
+        """Drop the given identifiers, and every identifier resolving to one of ``pks``."""
+        pks = set(pks)
+        with self._lock:
+            for ref in refs:
+                self._entries.pop(ref, None)
+            if pks:
+                for ref in [ref for ref, (identity, _) in self._entries.items() if identity.pk in pks]:
+                    del self._entries[ref]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,235 @@
+"""
+Itinerary-deviation detection.
+
+Itinerary items are free-form (place, date, time) strings. Each tourist's
+itinerary is compiled once into a sorted list of time windows with
+coordinates. Places are resolved through a local gazetteer whose lookups
+are cached. Checking a location fix is then a binary search for the window
+active at that moment plus one distance computation.
+"""
+
+import bisect
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from proximity import haversine_many
+
+# A tourist further than this from every place planned for now is off-plan
+DEFAULT_DEVIATION_RADIUS = 5000
+
+# Allow this long after a window opens to travel there before checking
+START_GRACE = timedelta(minutes=45)
+
+# Length of a visit given as a single time rather than a range
+DEFAULT_VISIT = timedelta(hours=3)
+
+# Items with a date but no readable time are assumed to span the day
+DAY_START = (8, 0)
+DAY_END = (20, 0)
+
+# Compiled plans are re-read after this many seconds, picking up edits made
+# through another worker process
+PLAN_TTL = 300
+
+# Built-in places for the service area; extend with Gazetteer.add or a JSON file
+DEFAULT_PLACES = {
+    'Calangute Beach': (15.5439, 73.7553),
+    'Baga Beach': (15.5553, 73.7517),
+    'Anjuna Beach': (15.5736, 73.7400),
+    'Vagator Beach': (15.6031, 73.7336),
+    'Candolim Beach': (15.5180, 73.7624),
+    'Arambol Beach': (15.6867, 73.7035),
+    'Miramar Beach': (15.4817, 73.8076),
+    'Colva Beach': (15.2793, 73.9114),
+    'Palolem Beach': (15.0100, 74.0232),
+    'Old Goa': (15.5009, 73.9116),
+    'Basilica of Bom Jesus': (15.5009, 73.9116),
+    'Panaji': (15.4909, 73.8278),
+    'Panjim': (15.4909, 73.8278),
+    'Fort Aguada': (15.4920, 73.7737),
+    'Chapora Fort': (15.6060, 73.7367),
+    'Dona Paula': (15.4536, 73.8040),
+    'Margao': (15.2832, 73.9862),
+    'Mapusa': (15.5937, 73.8142),
+    'Dudhsagar Falls': (15.3144, 74.3143),
+    'Spice Plantation': (15.4030, 74.0159),
+}
+
+_TIME_FORMATS = ('%I:%M %p', '%I:%M%p', '%I %p', '%I%p', '%H:%M', '%H.%M', '%H')
+
+
+def _tokens(name: str) -> Tuple[str, ...]:
+    return tuple(re.findall(r'[a-z0-9]+', name.lower()))
+
+
+class Gazetteer:
+    """Place-name lookup with a cache of resolved (and unresolvable) names."""
+
+    def __init__(self, places: Optional[Dict[str, Tuple[float, float]]] = None):
+        self._places: Dict[Tuple[str, ...], Tuple[float, float]] = {}
+        self._cache: Dict[str, Optional[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+        for name, position in (places or DEFAULT_PLACES).items():
+            self.add(name, *position)
+
+    def add(self, name: str, lat: float, lng: float):
+        tokens = _tokens(name)
+        if not tokens:
+            return
+        with self._lock:
+            self._places[tokens] = (float(lat), float(lng))
+            self._cache.clear()
+
+    def load_file(self, path: str):
+        """Add places from a JSON object of {name: [lat, lng]}."""
+        with open(path) as f:
+            for name, (lat, lng) in json.load(f).items():
+                self.add(name, lat, lng)
+
+    def lookup(self, place: str) -> Optional[Tuple[float, float]]:
+        """Coordinates for a place name: an exact match, else the most
+        specific known place whose words all appear in the name."""
+        key = ' '.join(_tokens(place or ''))
+        if key in self._cache:
+            return self._cache[key]
+        tokens = tuple(key.split())
+        with self._lock:
+            found = self._places.get(tokens)
+            if found is None and tokens:
+                words = set(tokens)
+                best = None
+                for name, position in self._places.items():
+                    if set(name) <= words and (best is None or len(name) > len(best[0])):
+                        best = (name, position)
+                found = best[1] if best else None
+            self._cache[key] = found
+        return found
+
+
+def _parse_clock(value: str) -> Optional[Tuple[int, int]]:
+    value = value.strip().upper()
+    for fmt in _TIME_FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)
+            return parsed.hour, parsed.minute
+        except ValueError:
+            continue
+    return None
+
+
+def item_window(date: str, time_text: str) -> Optional[Tuple[datetime, datetime]]:
+    """(start, end) for an itinerary item, or None when the date is unreadable."""
+    try:
+        day = datetime.strptime((date or '').strip(), '%Y-%m-%d')
+    except ValueError:
+        return None
+
+    parts = [p.strip() for p in re.split(r'\s*(?:-|–|\bto\b)\s*', time_text or '', flags=re.IGNORECASE) if p.strip()]
+    start = _parse_clock(parts[0]) if parts else None
+    end = _parse_clock(parts[1]) if len(parts) > 1 else None
+    # "9 - 11 AM": the meridiem on the end applies to the start too
+    meridiem = re.search(r'[AP]M', parts[1].upper()) if end is not None else None
+    if meridiem and not re.search(r'[AP]M', parts[0].upper()):
+        start = _parse_clock(f"{parts[0]} {meridiem.group(0)}") or start
+
+    if start is None:
+        return day.replace(hour=DAY_START[0], minute=DAY_START[1]), day.replace(hour=DAY_END[0], minute=DAY_END[1])
+    opens = day.replace(hour=start[0], minute=start[1])
+    if end is None:
+        return opens, opens + DEFAULT_VISIT
+    closes = day.replace(hour=end[0], minute=end[1])
+    if closes <= opens:
+        closes += timedelta(days=1)
+    return opens, closes
+
+
+class ItineraryPlan:
+    """Itinerary windows sorted by start time, with resolved coordinates."""
+
+    __slots__ = ('starts', 'windows', 'compiled_at')
+
+    def __init__(self, items: Iterable[Tuple[str, str, str]], gazetteer: Gazetteer):
+        windows = []
+        for place, date, time_text in items:
+            position = gazetteer.lookup(place)
+            window = item_window(date, time_text)
+            if position is None or window is None:
+                continue
+            windows.append((window[0].timestamp(), window[1].timestamp(), place, position))
+        windows.sort(key=lambda w: w[0])
+        self.windows = windows
+        self.starts = [w[0] for w in windows]
+        self.compiled_at = time.monotonic()
+
+    def active(self, ts: float) -> List[Tuple[float, float, str, Tuple[float, float]]]:
+        """Windows open at ``ts`` (past their travel grace)."""
+        grace = START_GRACE.total_seconds()
+        found = []
+        # Windows starting after ts - grace can't be checked yet; scan back from there
+        i = bisect.bisect_right(self.starts, ts - grace)
+        while i > 0:
+            i -= 1
+            window = self.windows[i]
+            if window[1] >= ts:
+                found.append(window)
+            elif window[1] < ts - 86400:
+                # Windows are at most a day long, so nothing earlier can be open
+                break
+        return found
+
+
+class ItineraryMonitor:
+    """Per-tourist compiled plans, checked fix by fix."""
+
+    def __init__(self, gazetteer: Gazetteer, radius_m: float = DEFAULT_DEVIATION_RADIUS, ttl: float = PLAN_TTL):
+        self.gazetteer = gazetteer
+        self.radius_m = radius_m
+        self.ttl = ttl
+        self._plans: Dict[str, ItineraryPlan] = {}
+        self._lock = threading.Lock()
+
+    def has_plan(self, tourist_id: str) -> bool:
+        plan = self._plans.get(tourist_id)
+        return plan is not None and time.monotonic() - plan.compiled_at < self.ttl
+
+    def store(self, tourist_id: str, items: Iterable[Tuple[str, str, str]]) -> ItineraryPlan:
+        """Compile and cache a plan from (place, date, time) items."""
+        plan = ItineraryPlan(items, self.gazetteer)
+        with self._lock:
+            self._plans[tourist_id] = plan
+        return plan
+
+    def invalidate(self, tourist_id: str):
+        with self._lock:
+            self._plans.pop(tourist_id, None)
+
+    def check(self, tourist_id: str, ts: float, lat, lng, off_plan: bool) -> Optional[dict]:
+        """Evaluate a fix against the cached plan.
+
+        ``off_plan`` is the tourist's current state, which the caller stores.
+        Returns None when the fix leaves it unchanged, otherwise a dict with
+        'offPlan' and, when off, the planned place and distance to it.
+        """
+        plan = self._plans.get(tourist_id)
+        if plan is None or lat is None or lng is None:
+            return None
+        windows = plan.active(ts)
+        off = False
+        nearest = None
+        if windows:
+            distances = haversine_many(float(lat), float(lng), [w[3][0] for w in windows], [w[3][1] for w in windows])
+            distance, place = min(zip(distances, [w[2] for w in windows]))
+            off = distance > self.radius_m
+            nearest = (place, distance)
+
+        if off == off_plan:
+            return None
+        change = {'offPlan': off}
+        if off:
+            change['place'] = nearest[0]
+            change['distance'] = round(nearest[1], 1)
+        return change
@@ -0,0 +1,86 @@
+"""
+Helpers for paginated, filtered and projected list endpoints.
+
+Cursors are opaque url-safe tokens holding the sort key of the last row
+returned, so the next page is a keyset seek rather than an OFFSET scan.
+"""
+
+import base64
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class ListingError(ValueError):
+    """Invalid listing parameter; the message is safe to return to the client."""
+
+
+def encode_cursor(key: Sequence) -> str:
+    raw = json.dumps(list(key), separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: Optional[str]) -> Optional[list]:
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ListingError('Invalid cursor')
+    if not isinstance(key, list):
+        raise ListingError('Invalid cursor')
+    return key
+
+
+def parse_limit(value: Optional[str]) -> int:
+    if not value:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ListingError('Invalid limit')
+    if limit < 1:
+        raise ListingError('Invalid limit')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_fields(value: Optional[str], available: Dict[str, object],
+                 default: Optional[List[str]] = None) -> List[str]:
+    """Requested field names in request order; ``default`` (or all fields) when not given."""
+    if not value:
+        return list(default if default is not None else available)
+    fields = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in available:
+            raise ListingError(f'Unknown field: {name}')
+        if name not in fields:
+            fields.append(name)
+    if not fields:
+        raise ListingError('No fields requested')
+    return fields
+
+
+def parse_list(value: Optional[str]) -> List[str]:
+    """Comma-separated filter values, e.g. ``status=active,investigating``."""
+    if not value:
+        return []
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def parse_bbox(value: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """``minLat,minLng,maxLat,maxLng`` bounding box."""
+    if not value:
+        return None
+    try:
+        min_lat, min_lng, max_lat, max_lng = (float(v) for v in value.split(','))
+    except ValueError:
+        raise ListingError('Invalid bbox, expected minLat,minLng,maxLat,maxLng')
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ListingError('Invalid bbox, expected minLat,minLng,maxLat,maxLng')
+    return min_lat, min_lng, max_lat, max_lng
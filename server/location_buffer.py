@@ -0,0 +1,88 @@
+"""
+Write-behind buffer for location fixes.
+
+Keeps only the newest fix per tourist in memory and hands the whole set to a
+flush callback in one batch. A fix is never held longer than ``max_age``
+seconds (plus one flush), which bounds what a crash can lose.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class LocationBuffer:
+    """Coalescing per-tourist buffer flushed periodically or at a size threshold.
+
+    Buffered fixes must expose ``touristId`` and a normalized ``timestamp``.
+    """
+
+    def __init__(self, flush_fn: Callable[[List[Any]], None], max_pending: int = 500, max_age: float = 2.0):
+        self.flush_fn = flush_fn
+        self.max_pending = max_pending
+        self._pending: Dict[str, Any] = {}
+        self._inflight: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task = PeriodicTask('location-write-behind', max_age, self.flush)
+
+    def put(self, fix):
+        """Buffer a fix, replacing any older fix for the same tourist."""
+        self._task.ensure_started()
+        with self._lock:
+            current = self._pending.get(fix.touristId)
+            if current is None or fix.timestamp >= current.timestamp:
+                self._pending[fix.touristId] = fix
+            size = len(self._pending)
+        if size >= self.max_pending:
+            self._task.wake()
+
+    def get(self, tourist_id: str) -> Optional[Any]:
+        """Newest unflushed fix for a tourist, including one being flushed."""
+        with self._lock:
+            return self._pending.get(tourist_id) or self._inflight.get(tourist_id)
+
+    def buffered_ids(self) -> Set[str]:
+        """Tourists with an unflushed fix, including ones being flushed."""
+        with self._lock:
+            return set(self._pending) | set(self._inflight)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write all buffered fixes in one batch. Returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            try:
+                self.flush_fn(list(batch.values()))
+                return len(batch)
+            except Exception as e:
+                logger.error(f"Location buffer flush failed, requeueing {len(batch)} fixes: {str(e)}")
+                with self._lock:
+                    # Put the batch back unless a newer fix arrived meanwhile
+                    for tourist_id, fix in batch.items():
+                        current = self._pending.get(tourist_id)
+                        if current is None or fix.timestamp > current.timestamp:
+                            self._pending[tourist_id] = fix
+                raise
+            finally:
+                with self._lock:
+                    self._inflight = {}
+
+    def close(self):
+        """Stop the flusher and write whatever is still buffered."""
+        self._task.stop()
+        try:
+            self.flush()
+        except Exception:
+            pass
@@ -0,0 +1,184 @@
+"""
+Append-only location history stored as compact per-tourist chunks.
+
+Fixes are appended to an open in-memory chunk per tourist. Full or old chunks
+are sealed and persisted as a single row holding packed arrays (epoch seconds
+plus lat/lng in 1e-7 degree fixed point, zlib-compressed), so a day of fixes
+for one tourist is a handful of rows instead of thousands.
+"""
+
+import sys
+import threading
+import time
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seal an open chunk once it holds this many fixes...
+CHUNK_SIZE = 256
+# ...or once its oldest fix is this old (seconds)
+CHUNK_MAX_AGE = 15 * 60
+
+# (age in seconds, resolution in seconds): data older than age is kept at one
+# fix per resolution bucket
+DOWNSAMPLE_TIERS = [
+    (24 * 3600, 60),
+    (7 * 24 * 3600, 600),
+]
+
+# Downsampled chunks are merged up to this many fixes, never spanning more
+# than one day so each chunk ages into the next tier as a unit
+MERGED_CHUNK_SIZE = 1024
+MERGED_CHUNK_SPAN = 24 * 3600
+
+COORD_SCALE = 10_000_000
+
+
+class Chunk:
+    """Array-backed run of fixes for one tourist."""
+
+    __slots__ = ('ts', 'lat', 'lng', 'resolution', 'opened_at')
+
+    def __init__(self, resolution: int = 0):
+        self.ts = array('q')
+        self.lat = array('i')
+        self.lng = array('i')
+        self.resolution = resolution
+        self.opened_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.ts)
+
+    def append(self, ts: float, lat: float, lng: float):
+        self.ts.append(int(ts))
+        self.lat.append(round(lat * COORD_SCALE))
+        self.lng.append(round(lng * COORD_SCALE))
+
+    def extend(self, other: 'Chunk'):
+        self.ts.extend(other.ts)
+        self.lat.extend(other.lat)
+        self.lng.extend(other.lng)
+
+    @property
+    def start(self) -> int:
+        return min(self.ts)
+
+    @property
+    def end(self) -> int:
+        return max(self.ts)
+
+    def sort(self):
+        """Order fixes by time; devices may upload buffered fixes out of order."""
+        ts = self.ts
+        if all(ts[i] <= ts[i + 1] for i in range(len(ts) - 1)):
+            return
+        order = sorted(range(len(ts)), key=ts.__getitem__)
+        self.ts = array('q', (ts[i] for i in order))
+        self.lat = array('i', (self.lat[i] for i in order))
+        self.lng = array('i', (self.lng[i] for i in order))
+
+    def points(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Tuple[int, float, float]]:
+        """(epoch seconds, lat, lng) tuples within [start, end]."""
+        out = []
+        for t, la, ln in zip(self.ts, self.lat, self.lng):
+            if (start is None or t >= start) and (end is None or t <= end):
+                out.append((t, la / COORD_SCALE, ln / COORD_SCALE))
+        return out
+
+    def downsample(self, resolution: int) -> 'Chunk':
+        """Keep the first fix in every ``resolution``-second bucket."""
+        self.sort()
+        out = Chunk(resolution)
+        last_bucket = None
+        for t, la, ln in zip(self.ts, self.lat, self.lng):
+            bucket = t // resolution
+            if bucket != last_bucket:
+                out.ts.append(t)
+                out.lat.append(la)
+                out.lng.append(ln)
+                last_bucket = bucket
+        return out
+
+    def split(self, max_points: int = MERGED_CHUNK_SIZE, span: int = MERGED_CHUNK_SPAN) -> List['Chunk']:
+        """Cut a sorted chunk into pieces of at most max_points within one span bucket."""
+        pieces = []
+        piece = None
+        for t, la, ln in zip(self.ts, self.lat, self.lng):
+            if piece is None or len(piece) >= max_points or t // span != piece.ts[0] // span:
+                piece = Chunk(self.resolution)
+                pieces.append(piece)
+            piece.ts.append(t)
+            piece.lat.append(la)
+            piece.lng.append(ln)
+        return pieces
+
+    def encode(self) -> bytes:
+        parts = [self.ts, self.lat, self.lng]
+        if sys.byteorder != 'little':
+            parts = [array(p.typecode, p) for p in parts]
+            for p in parts:
+                p.byteswap()
+        return zlib.compress(b''.join(p.tobytes() for p in parts))
+
+    @classmethod
+    def decode(cls, data: bytes, count: int, resolution: int = 0) -> 'Chunk':
+        raw = zlib.decompress(data)
+        chunk = cls(resolution)
+        ts_bytes = count * chunk.ts.itemsize
+        coord_bytes = count * chunk.lat.itemsize
+        chunk.ts.frombytes(raw[:ts_bytes])
+        chunk.lat.frombytes(raw[ts_bytes:ts_bytes + coord_bytes])
+        chunk.lng.frombytes(raw[ts_bytes + coord_bytes:ts_bytes + 2 * coord_bytes])
+        if sys.byteorder != 'little':
+            for p in (chunk.ts, chunk.lat, chunk.lng):
+                p.byteswap()
+        return chunk
+
+
+class HistoryStore:
+    """Open chunks per tourist plus a queue of sealed chunks awaiting persistence."""
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, max_age: float = CHUNK_MAX_AGE):
+        self.chunk_size = chunk_size
+        self.max_age = max_age
+        self._open: Dict[str, Chunk] = {}
+        self._sealed: List[Tuple[str, Chunk]] = []
+        self._lock = threading.Lock()
+
+    def record(self, tourist_id: str, ts: float, lat: float, lng: float):
+        with self._lock:
+            chunk = self._open.get(tourist_id)
+            if chunk is None:
+                chunk = self._open[tourist_id] = Chunk()
+            chunk.append(ts, lat, lng)
+            if len(chunk) >= self.chunk_size:
+                self._seal_locked(tourist_id)
+
+    def _seal_locked(self, tourist_id: str):
+        chunk = self._open.pop(tourist_id, None)
+        if chunk is not None and len(chunk):
+            chunk.sort()
+            self._sealed.append((tourist_id, chunk))
+
+    def drain(self, seal_all: bool = False) -> List[Tuple[str, Chunk]]:
+        """Seal aged (or all) open chunks and hand back everything sealed."""
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            for tourist_id in [t for t, c in self._open.items() if seal_all or c.opened_at <= cutoff]:
+                self._seal_locked(tourist_id)
+            sealed, self._sealed = self._sealed, []
+        return sealed
+
+    def requeue(self, sealed: Iterable[Tuple[str, Chunk]]):
+        """Return chunks whose persistence failed to the front of the queue."""
+        with self._lock:
+            self._sealed = list(sealed) + self._sealed
+
+    def pending_points(self, tourist_id: str, start: Optional[float] = None, end: Optional[float] = None):
+        """Fixes for a tourist that are not persisted yet."""
+        with self._lock:
+            chunks = [c for t, c in self._sealed if t == tourist_id]
+            if tourist_id in self._open:
+                chunks.append(self._open[tourist_id])
+            return [p for c in chunks for p in c.points(start, end)]
+
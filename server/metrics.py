@@ -0,0 +1,171 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are recorded into a shard owned by the calling
+thread, so the request path never takes a lock: a thread only ever writes
+its own shard, and a scrape sums every shard. Shards of threads that have
+exited are folded into a retired total so their counts are kept without the
+shard list growing with every short-lived thread. Gauges are callbacks read
+at scrape time.
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds; covers sub-millisecond cache hits to slow reports
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Dead threads' shards are folded away once this many shards exist
+SHARD_FOLD_THRESHOLD = 64
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Shard:
+    __slots__ = ('thread', 'counters', 'histograms')
+
+    def __init__(self, thread: Optional[threading.Thread]):
+        self.thread = thread
+        # (name, labels) -> value
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+class Metrics:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._retired = _Shard(None)
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._gauges: Dict[str, Callable[[], object]] = {}
+
+    def counter(self, name: str, help_text: str):
+        self._help[name] = ('counter', help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self._help[name] = ('histogram', help_text)
+        self._buckets[name] = tuple(sorted(buckets))
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], object]):
+        """Register a gauge read at scrape time; ``fn`` returns a number or
+        an iterable of (labels dict, number) pairs."""
+        self._help[name] = ('gauge', help_text)
+        self._gauges[name] = fn
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+                if len(self._shards) > SHARD_FOLD_THRESHOLD:
+                    self._fold_locked()
+        return shard
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        series = histograms.get(key)
+        buckets = self._buckets[name]
+        if series is None:
+            series = histograms[key] = [0] * (len(buckets) + 2)
+        series[bisect.bisect_left(buckets, value)] += 1
+        series[-1] += value
+
+    def _fold_locked(self):
+        """Merge shards of exited threads into the retired totals."""
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                self._merge(self._retired, shard)
+        self._shards = alive
+
+    @staticmethod
+    def _merge(into: _Shard, shard: _Shard):
+        for key, value in list(shard.counters.items()):
+            into.counters[key] = into.counters.get(key, 0) + value
+        for key, series in list(shard.histograms.items()):
+            target = into.histograms.get(key)
+            if target is None:
+                into.histograms[key] = list(series)
+            else:
+                for i, value in enumerate(series):
+                    target[i] += value
+
+    def collect(self) -> _Shard:
+        """Totals across all threads."""
+        total = _Shard(None)
+        with self._lock:
+            self._fold_locked()
+            self._merge(total, self._retired)
+            for shard in self._shards:
+                self._merge(total, shard)
+        return total
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        total = self.collect()
+        by_name: Dict[str, List] = {}
+        for (name, labels), value in total.counters.items():
+            by_name.setdefault(name, []).append((labels, value))
+        for (name, labels), series in total.histograms.items():
+            by_name.setdefault(name, []).append((labels, series))
+
+        lines = []
+        for name, (kind, help_text) in self._help.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'gauge':
+                try:
+                    value = self._gauges[name]()
+                except Exception:
+                    continue
+                if isinstance(value, (int, float)):
+                    lines.append(f'{name} {_format_value(value)}')
+                else:
+                    for labels, item in value:
+                        lines.append(f'{name}{_format_labels(tuple(labels.items()))} {_format_value(item)}')
+            elif kind == 'counter':
+                for labels, value in sorted(by_name.get(name) or [((), 0)]):
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+            else:
+                buckets = self._buckets[name]
+                for labels, series in sorted(by_name.get(name, []), key=lambda s: s[0]):
+                    cumulative = 0
+                    for bound, count in zip(buckets, series):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_format_labels(labels, ("le", repr(bound)))} {_format_value(cumulative)}')
+                    cumulative += series[-2]
+                    lines.append(f'{name}_bucket{_format_labels(labels, ("le", "+Inf"))} {_format_value(cumulative)}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(series[-1])}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {_format_value(cumulative)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,157 @@
+"""
+Schema migrations.
+
+``db.create_all()`` only creates missing tables; it never alters existing
+ones. Changes to existing tables (indexes, columns, data moves) are listed here
+in order and applied once each, tracked in the ``schema_migrations`` table.
+Every step must be safe on a fresh database where ``create_all`` has already
+built the current schema.
+"""
+
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS: List[Tuple[str, str, Callable]] = []
+
+
+def migration(version: str, description: str):
+    """Register ``fn(connection)`` as the migration ``version``."""
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+def _create_indexes(conn, statements):
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+@migration('0001', 'Indexes for hot lookups')
+def add_hot_lookup_indexes(conn):
+    _create_indexes(conn, [
+        # Login, profile and dashboard resolve the tourist by user
+        "CREATE INDEX IF NOT EXISTS ix_tourists_user_id ON tourists (user_id)",
+        # updatedSince filters and report stamps
+        "CREATE INDEX IF NOT EXISTS ix_tourists_last_update ON tourists (last_update)",
+        # Per-tourist alerts, optionally by status, newest first
+        "CREATE INDEX IF NOT EXISTS ix_alerts_tourist_status_created ON alerts (tourist_id, status, created_at)",
+        # Police views: alerts by status, newest first
+        "CREATE INDEX IF NOT EXISTS ix_alerts_status_created ON alerts (status, created_at)",
+        # Stats: restricted zone count
+        "CREATE INDEX IF NOT EXISTS ix_geo_zones_type ON geo_zones (type)",
+    ])
+
+
+def _json_list(value):
+    """A JSON column value as a list; drivers return either decoded JSON or text."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+@migration('0002', 'Move itinerary and emergency contacts into child tables')
+def normalize_tourist_details(conn):
+    columns = {column['name'] for column in inspect(conn).get_columns('tourists')}
+    moves = [
+        ('itinerary', 'itinerary_items', ('place', 'date', 'time', 'notes')),
+        ('emergency_contacts', 'emergency_contacts', ('name', 'phone', 'relation')),
+    ]
+    for column, table, fields in moves:
+        # Fresh databases never had the JSON column
+        if column not in columns:
+            continue
+        rows = []
+        for tourist_id, value in conn.execute(text(f"SELECT id, {column} FROM tourists WHERE {column} IS NOT NULL")):
+            for position, item in enumerate(_json_list(value)):
+                if isinstance(item, dict):
+                    rows.append(dict({'id': str(uuid.uuid4()), 'tourist_id': tourist_id, 'position': position},
+                                     **{field: item.get(field) for field in fields}))
+        if rows:
+            names = ['id', 'tourist_id', 'position'] + list(fields)
+            conn.execute(
+                text(f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(':' + name for name in names)})"),
+                rows
+            )
+        conn.execute(text(f"ALTER TABLE tourists DROP COLUMN {column}"))
+
+
+@migration('0003', 'Change versions for delta sync')
+def add_sync_versions(conn):
+    for table in ('tourists', 'alerts', 'geo_zones', 'itinerary_items', 'emergency_contacts'):
+        if 'version' not in {column['name'] for column in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN version BIGINT NOT NULL DEFAULT 0"))
+    _create_indexes(conn, [
+        "CREATE INDEX IF NOT EXISTS ix_alerts_tourist_version ON alerts (tourist_id, version)",
+        "CREATE INDEX IF NOT EXISTS ix_geo_zones_version ON geo_zones (version)",
+        "CREATE INDEX IF NOT EXISTS ix_itinerary_items_tourist_version ON itinerary_items (tourist_id, version)",
+        "CREATE INDEX IF NOT EXISTS ix_emergency_contacts_tourist_version ON emergency_contacts (tourist_id, version)",
+    ])
+    if conn.execute(text("SELECT COUNT(*) FROM sync_counter")).scalar() == 0:
+        conn.execute(text("INSERT INTO sync_counter (id, value, purged_through) VALUES (1, 0, 0)"))
+
+
+@migration('0004', 'Persist the itinerary off-plan flag')
+def add_off_itinerary(conn):
+    if 'off_itinerary' not in {column['name'] for column in inspect(conn).get_columns('tourists')}:
+        conn.execute(text("ALTER TABLE tourists ADD COLUMN off_itinerary BOOLEAN NOT NULL DEFAULT FALSE"))
+
+
+@migration('0005', 'Separate last location fix time')
+def add_last_fix_at(conn):
+    if 'last_fix_at' not in {column['name'] for column in inspect(conn).get_columns('tourists')}:
+        conn.execute(text("ALTER TABLE tourists ADD COLUMN last_fix_at TIMESTAMP"))
+        # The best record of the last fix there is
+        conn.execute(text("UPDATE tourists SET last_fix_at = last_update"))
+
+
+@migration('0006', 'Record which silence a missing alert was raised for')
+def add_missing_alert_fix(conn):
+    if 'missing_alert_fix' not in {column['name'] for column in inspect(conn).get_columns('tourists')}:
+        conn.execute(text("ALTER TABLE tourists ADD COLUMN missing_alert_fix TIMESTAMP"))
+        # Tourists already flagged stay flagged until their next fix
+        conn.execute(text(
+            "UPDATE tourists SET missing_alert_fix = last_fix_at WHERE id IN ("
+            "SELECT tourist_id FROM alerts WHERE type = 'missing' AND status IN ('active', 'investigating'))"
+        ))
+
+
+def applied_versions(conn):
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(engine) -> List[str]:
+    """Apply pending migrations in order; returns the versions applied."""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version VARCHAR(50) PRIMARY KEY, "
+            "description TEXT, "
+            "applied_at TIMESTAMP)"
+        ))
+        done = applied_versions(conn)
+
+    applied = []
+    for version, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in done:
+            continue
+        # One transaction per migration so a failure leaves earlier ones recorded
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {'v': version, 'd': description, 't': datetime.now()}
+            )
+        logger.info(f"Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
@@ -0,0 +1,208 @@
+"""
+Proximity index over tourist positions.
+
+Positions are bucketed into a uniform lat/lng grid so "within R metres" and
+"k nearest" queries only look at the few cells around the query point instead
+of every tracked tourist. Exact distances use the haversine formula, computed
+for a whole cell's candidates at once.
+"""
+
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+EARTH_RADIUS_M = 6371008.8
+
+# Metres per degree of latitude (and of longitude at the equator)
+METRES_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+# ~1.1km at the equator; a few hundred tourists per cell in a crowded area
+DEFAULT_CELL_SIZE = 0.01
+
+
+def haversine_many(lat: float, lng: float, lats: List[float], lngs: List[float]) -> List[float]:
+    """Great-circle distances in metres from one point to many."""
+    rlat = math.radians(lat)
+    rlng = math.radians(lng)
+    cos_lat = math.cos(rlat)
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+    distances = []
+    for other_lat, other_lng in zip(lats, lngs):
+        olat = radians(other_lat)
+        a = sin((olat - rlat) / 2) ** 2 + cos_lat * cos(olat) * sin((radians(other_lng) - rlng) / 2) ** 2
+        distances.append(2 * EARTH_RADIUS_M * asin(min(1.0, sqrt(a))))
+    return distances
+
+
+class ProximityIndex:
+    """Uniform-grid index of point positions keyed by tourist id."""
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._positions: Dict[str, Tuple[float, float]] = {}
+        self._grid: Dict[Tuple[int, int], Dict[str, Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size), math.floor(lng / self.cell_size))
+
+    def _remove_locked(self, tourist_id: str):
+        position = self._positions.pop(tourist_id, None)
+        if position is None:
+            return
+        cell = self._cell(*position)
+        bucket = self._grid.get(cell)
+        if bucket is not None:
+            bucket.pop(tourist_id, None)
+            if not bucket:
+                del self._grid[cell]
+
+    def update(self, tourist_id: str, lat, lng):
+        """Insert or move a tourist. A missing position removes it."""
+        with self._lock:
+            self._remove_locked(tourist_id)
+            if lat is None or lng is None:
+                return
+            position = (float(lat), float(lng))
+            self._positions[tourist_id] = position
+            self._grid.setdefault(self._cell(*position), {})[tourist_id] = position
+
+    def remove(self, tourist_id: str):
+        with self._lock:
+            self._remove_locked(tourist_id)
+
+    def load(self, positions: Iterable[Tuple[str, object, object]]):
+        """Replace the index contents with (tourist_id, lat, lng) tuples.
+
+        The new index is built aside and swapped in, so queries during a reload
+        see the old positions rather than a partial set.
+        """
+        by_id: Dict[str, Tuple[float, float]] = {}
+        grid: Dict[Tuple[int, int], Dict[str, Tuple[float, float]]] = {}
+        for tourist_id, lat, lng in positions:
+            if lat is None or lng is None:
+                continue
+            position = (float(lat), float(lng))
+            by_id[tourist_id] = position
+            grid.setdefault(self._cell(*position), {})[tourist_id] = position
+        with self._lock:
+            self._positions, self._grid = by_id, grid
+        self._loaded = True
+
+    def ensure_loaded(self, loader):
+        """Populate the index from ``loader()`` the first time it is needed."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load(loader())
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self):
+        return len(self._positions)
+
+    def get(self, tourist_id: str) -> Optional[Tuple[float, float]]:
+        return self._positions.get(tourist_id)
+
+    def _ring(self, center: Tuple[int, int], radius: int):
+        """Cells at Chebyshev distance ``radius`` from ``center``."""
+        cy, cx = center
+        if radius == 0:
+            yield center
+            return
+        for x in range(cx - radius, cx + radius + 1):
+            yield (cy - radius, x)
+            yield (cy + radius, x)
+        for y in range(cy - radius + 1, cy + radius):
+            yield (y, cx - radius)
+            yield (y, cx + radius)
+
+    def _measure(self, lat: float, lng: float, bucket, exclude: Set[str]) -> List[Tuple[float, str]]:
+        ids = [tid for tid in bucket if tid not in exclude]
+        if not ids:
+            return []
+        lats = [bucket[tid][0] for tid in ids]
+        lngs = [bucket[tid][1] for tid in ids]
+        return list(zip(haversine_many(lat, lng, lats, lngs), ids))
+
+    def within(self, lat: float, lng: float, radius_m: float, limit: Optional[int] = None,
+               exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """(tourist_id, metres) for every tourist within ``radius_m``, nearest first."""
+        lat, lng = float(lat), float(lng)
+        exclude = set(exclude)
+        lat_span = radius_m / METRES_PER_DEGREE
+        # Widest longitude span is at the edge of the circle nearest a pole
+        widest = max(abs(lat) + lat_span, 0)
+        lng_span = 360.0 if widest >= 89.9 else radius_m / (METRES_PER_DEGREE * math.cos(math.radians(widest)))
+        lat0, lng0 = self._cell(lat - lat_span, lng - lng_span)
+        lat1, lng1 = self._cell(lat + lat_span, lng + lng_span)
+
+        found = []
+        with self._lock:
+            if (lat1 - lat0 + 1) * (lng1 - lng0 + 1) > len(self._grid):
+                # Huge radius: walking the occupied cells is cheaper
+                cells = [cell for cell in self._grid if lat0 <= cell[0] <= lat1 and lng0 <= cell[1] <= lng1]
+            else:
+                cells = [(y, x) for y in range(lat0, lat1 + 1) for x in range(lng0, lng1 + 1)]
+            for cell in cells:
+                bucket = self._grid.get(cell)
+                if bucket:
+                    found.extend(m for m in self._measure(lat, lng, bucket, exclude) if m[0] <= radius_m)
+        found.sort()
+        if limit is not None:
+            found = found[:limit]
+        return [(tid, distance) for distance, tid in found]
+
+    def nearest(self, lat: float, lng: float, k: int, max_radius_m: Optional[float] = None,
+                exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """(tourist_id, metres) for the ``k`` nearest tourists, nearest first.
+
+        Searches outward ring by ring and stops once no unvisited cell can hold
+        anything closer than the current k-th result.
+        """
+        lat, lng = float(lat), float(lng)
+        exclude = set(exclude)
+        if k <= 0:
+            return []
+        center = self._cell(lat, lng)
+        cell_height = self.cell_size * METRES_PER_DEGREE
+
+        found: List[Tuple[float, str]] = []
+        with self._lock:
+            remaining = len(self._positions)
+            radius = 0
+            while remaining > 0:
+                if 8 * radius > len(self._grid):
+                    # Sparse data: rings are mostly empty, so finish with the occupied cells
+                    for (y, x), bucket in self._grid.items():
+                        if max(abs(y - center[0]), abs(x - center[1])) >= radius:
+                            found.extend(self._measure(lat, lng, bucket, exclude))
+                    break
+                for cell in self._ring(center, radius):
+                    bucket = self._grid.get(cell)
+                    if bucket:
+                        remaining -= len(bucket)
+                        found.extend(self._measure(lat, lng, bucket, exclude))
+                # Anything not yet seen is at least this far away; cells narrow
+                # towards the poles, so use the narrowest width reached so far
+                edge_lat = min(abs(lat) + (radius + 1) * self.cell_size, 90.0)
+                cell_width = cell_height * math.cos(math.radians(edge_lat))
+                bound = radius * min(cell_height, cell_width)
+                if max_radius_m is not None and bound > max_radius_m:
+                    break
+                if len(found) >= k:
+                    found.sort()
+                    found = found[:k]
+                    if found[-1][0] <= bound:
+                        break
+                radius += 1
+
+        found.sort()
+        if max_radius_m is not None:
+            found = [m for m in found if m[0] <= max_radius_m]
+        return [(tid, distance) for distance, tid in found[:k]]
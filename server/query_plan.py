@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Query-plan check for the hot API endpoints.
+
+Seeds a large throwaway database, calls each endpoint below through the Flask
+test client, and runs EXPLAIN on every SELECT it issued. Each endpoint is
+called once beforehand so one-off loads (geofence index, stats counters) are
+left out and only the steady-state queries are checked. Exits non-zero if any
+query falls back to a full table scan, so it can gate CI:
+
+    cd server && python query_plan.py --tourists 50000 --alerts 200000
+
+Endpoints that return whole tables by design (unpaginated lists, reports) are
+not checked.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Endpoints that must be served from indexes: (method, path, json body)
+CHECKS = [
+    ('POST', '/api/auth/login', {'username': 'priya.sharma', 'password': 'password123'}),
+    ('GET', '/api/tourist/profile/user-1', None),
+    ('PUT', '/api/tourist/location/TID-2024-001523', {'lat': 15.55, 'lng': 73.75}),
+    ('POST', '/api/tourist/locations/batch', {'fixes': [{'touristId': 'TID-2024-001525', 'lat': 15.5, 'lng': 73.9}]}),
+    ('GET', '/api/tourist/alerts/TID-2024-001523', None),
+    ('POST', '/api/tourist/panic/TID-2024-001524', None),
+    ('GET', '/api/police/alerts', None),
+    ('GET', '/api/police/alerts?limit=50&severity=critical', None),
+    ('GET', '/api/police/tourists?limit=50&fields=touristId,status', None),
+    ('PUT', '/api/police/alert/alert-1', {'status': 'investigating'}),
+    ('GET', '/api/police/tourists/TID-2024-001523/trail', None),
+    ('GET', '/api/police/tourists/nearby?lat=15.5&lng=73.8&radius=2000&fields=status', None),
+    ('GET', '/api/police/stats', None),
+    ('GET', '/api/tourist/itinerary/TID-2024-001523', None),
+    ('POST', '/api/tourist/itinerary/TID-2024-001523', {'place': 'Baga Beach', 'date': '2024-12-29', 'time': '10:00'}),
+    ('GET', '/api/tourist/contacts/TID-2024-001523', None),
+    ('GET', '/api/police/tourists?limit=50&fields=touristId,itinerary', None),
+    ('GET', '/api/tourist/sync/TID-2024-001523?since=1', None),
+]
+
+# Tables large enough that a full scan matters
+LARGE_TABLES = {'users', 'tourists', 'alerts', 'geo_zones', 'location_history_chunks',
+                'itinerary_items', 'emergency_contacts', 'sync_tombstones'}
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def seed(db, Tourist, Alert, ItineraryEntry, GeoZone, tourists, alerts, zones):
+    """Bulk-insert synthetic rows with Core inserts (no ORM overhead)."""
+    now = datetime.now()
+    tourist_ids = []
+    batch = []
+    for i in range(tourists):
+        tourist_id = str(uuid.uuid4())
+        tourist_ids.append(tourist_id)
+        batch.append({
+            'id': tourist_id,
+            'user_id': f'seed-user-{i}',
+            'tourist_id': f'TID-SEED-{i:07d}',
+            'safety_score': Decimal('80.00'),
+            'status': random.choice(['safe', 'safe', 'caution', 'alert']),
+            'last_known_lat': Decimal(str(round(random.uniform(15.0, 15.8), 6))),
+            'last_known_lng': Decimal(str(round(random.uniform(73.6, 74.2), 6))),
+            'location_sharing': True,
+            'last_update': now - timedelta(seconds=random.randint(0, 86400)),
+        })
+        if len(batch) >= 5000:
+            db.session.execute(Tourist.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Tourist.__table__.insert(), batch)
+
+    batch = []
+    for tourist_id in tourist_ids:
+        for position in range(random.randint(0, 4)):
+            batch.append({
+                'id': str(uuid.uuid4()),
+                'tourist_id': tourist_id,
+                'position': position,
+                'place': random.choice(['Calangute Beach', 'Old Goa', 'Fort Aguada', 'Spice Plantation']),
+                'date': (now + timedelta(days=position)).strftime('%Y-%m-%d'),
+                'time': '10:00 AM - 4:00 PM',
+            })
+        if len(batch) >= 5000:
+            db.session.execute(ItineraryEntry.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(ItineraryEntry.__table__.insert(), batch)
+
+    # Zones edited over time, so delta-sync queries select a few recent ones
+    if zones:
+        db.session.execute(GeoZone.__table__.insert(), [{
+            'id': str(uuid.uuid4()),
+            'name': f'Seed zone {i}',
+            'type': random.choice(['safe', 'caution', 'restricted']),
+            'coordinates': [{'lat': 15.5, 'lng': 73.8}, {'lat': 15.51, 'lng': 73.8}, {'lat': 15.51, 'lng': 73.81}],
+            'version': i,
+        } for i in range(zones)])
+
+    batch = []
+    for i in range(alerts):
+        batch.append({
+            'id': str(uuid.uuid4()),
+            'tourist_id': random.choice(tourist_ids),
+            'type': random.choice(['panic', 'geofence', 'medical', 'missing']),
+            'severity': random.choice(['low', 'medium', 'high', 'critical']),
+            'status': 'active' if random.random() < 0.05 else 'resolved',
+            'created_at': now - timedelta(seconds=random.randint(0, 30 * 86400)),
+        })
+        if len(batch) >= 5000:
+            db.session.execute(Alert.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Alert.__table__.insert(), batch)
+    db.session.commit()
+
+
+def full_scans(conn, dialect, statement, parameters):
+    """Tables the statement reads with a full scan."""
+    if dialect == 'sqlite':
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+        return [m.group(1) for m in (SQLITE_FULL_SCAN.match(row[-1]) for row in rows) if m and m.group(1) in LARGE_TABLES]
+
+    rows = conn.exec_driver_sql('EXPLAIN ' + statement, parameters).fetchall()
+    return [m.group(1) for m in (POSTGRES_FULL_SCAN.search(row[0]) for row in rows) if m and m.group(1) in LARGE_TABLES]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tourists', type=int, default=20000)
+    parser.add_argument('--alerts', type=int, default=100000)
+    parser.add_argument('--zones', type=int, default=500)
+    args = parser.parse_args()
+
+    # Always a throwaway database: this seeds and mutates data
+    tmpdir = tempfile.mkdtemp(prefix='query_plan_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmpdir, 'query_plan.db')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from sqlalchemy import event
+    from app import app, db, init_database, Tourist, Alert, ItineraryEntry, GeoZone
+
+    init_database()
+    with app.app_context():
+        seed(db, Tourist, Alert, ItineraryEntry, GeoZone, args.tourists, args.alerts, args.zones)
+        engine = db.engine
+        dialect = engine.dialect.name
+        if dialect == 'sqlite':
+            with engine.begin() as conn:
+                conn.exec_driver_sql('ANALYZE')
+
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT') and not executemany:
+                captured.append((statement, parameters))
+
+        client = app.test_client()
+        for method, path, body in CHECKS:
+            client.open(path, method=method, json=body)
+        event.listen(engine, 'before_cursor_execute', capture)
+
+        failures = []
+        for method, path, body in CHECKS:
+            captured.clear()
+            response = client.open(path, method=method, json=body)
+            if response.status_code >= 500:
+                failures.append((method, path, f'HTTP {response.status_code}', ''))
+            statements = list(captured)
+            with engine.connect() as conn:
+                for statement, parameters in statements:
+                    for table in full_scans(conn, dialect, statement, parameters):
+                        failures.append((method, path, f'full scan of {table}', statement))
+        event.remove(engine, 'before_cursor_execute', capture)
+
+    for method, path, problem, statement in failures:
+        print(f"FAIL {method} {path}: {problem}")
+        if statement:
+            print(f"     {' '.join(statement.split())[:300]}")
+    print(f"{len(CHECKS)} endpoints checked, {len(failures)} problems")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
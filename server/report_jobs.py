@@ -0,0 +1,143 @@
+"""
+Background report rendering with a cache keyed by data version.
+
+A job's id is the data-version stamp it was submitted for, so resubmitting
+while nothing has changed returns the existing job, and a finished report is
+served from the cache directory until the data changes. The cache lives on
+disk so every worker process can serve a report rendered by another.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Finished reports kept in the cache directory
+MAX_CACHED_REPORTS = 16
+
+# Job records (not cached files) are forgotten after this many seconds
+JOB_TTL = 3600
+
+
+class ReportJob:
+    __slots__ = ('id', 'status', 'error', 'submitted_at', 'finished_at')
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = 'queued'  # 'queued', 'running', 'done', 'failed'
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            'jobId': self.id,
+            'status': self.status,
+            'error': self.error
+        }
+
+
+class ReportJobManager:
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: int = 2, suffix: str = '.pdf'):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), 'tourist_safety_reports')
+        self.max_workers = max_workers
+        self.suffix = suffix
+        self._jobs: Dict[str, ReportJob] = {}
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # Executors don't survive fork(); make one per process
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='report')
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def path_for(self, job_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{job_id}{self.suffix}")
+
+    def cached(self, job_id: str) -> Optional[str]:
+        path = self.path_for(job_id)
+        return path if os.path.exists(path) else None
+
+    def store(self, job_id: str, data: bytes) -> str:
+        """Atomically write a rendered report into the cache."""
+        path = self.path_for(job_id)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(self.suffix)]
+        if len(files) <= MAX_CACHED_REPORTS:
+            return
+        files.sort(key=lambda p: os.path.getmtime(p))
+        for path in files[:-MAX_CACHED_REPORTS]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def submit(self, job_id: str, render: Callable[[], bytes]) -> ReportJob:
+        """Queue ``render`` for ``job_id`` unless it is cached or already queued."""
+        with self._lock:
+            self._forget_old()
+            job = self._jobs.get(job_id)
+            if job is not None:
+                if job.status in ('queued', 'running'):
+                    return job
+                if job.status == 'done' and self.cached(job_id):
+                    return job
+
+            job = ReportJob(job_id)
+            self._jobs[job_id] = job
+            if self.cached(job_id):
+                job.status = 'done'
+                job.finished_at = time.time()
+                return job
+            self._pool().submit(self._run, job, render)
+            return job
+
+    def _run(self, job: ReportJob, render: Callable[[], bytes]):
+        job.status = 'running'
+        try:
+            self.store(job.id, render())
+            job.status = 'done'
+        except Exception as e:
+            logger.error(f"Report job {job.id} failed: {str(e)}")
+            job.status = 'failed'
+            job.error = 'Failed to generate report'
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        """Job status; jobs finished by another worker are found via the cache."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.cached(job_id):
+            job = ReportJob(job_id)
+            job.status = 'done'
+        return job
+
+    def shutdown(self):
+        """Let running renders finish and drop queued ones."""
+        with self._lock:
+            executor = self._executor if self._executor_pid == os.getpid() else None
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _forget_old(self):
+        cutoff = time.time() - JOB_TTL
+        for job_id in [j for j, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
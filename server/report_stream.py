@@ -0,0 +1,208 @@
+"""
+Streaming report writers (PDF, CSV, NDJSON) with bounded memory.
+
+ReportLab keeps every page in memory until the document is saved, so full
+reports use this minimal PDF writer instead: each page is emitted as soon as
+it is filled and only object offsets are retained, so memory stays flat no
+matter how many rows are rendered.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+MARGIN = 40
+ROW_HEIGHT = 16
+FONT_SIZE = 9
+HEADING_SIZE = 14
+TITLE_SIZE = 18
+CELL_PADDING = 4
+
+# Object numbers fixed up front; pages start after these
+CATALOG_OBJ = 1
+PAGES_OBJ = 2
+FONT_OBJ = 3
+BOLD_FONT_OBJ = 4
+FIRST_FREE_OBJ = 5
+
+
+def _escape(text: str) -> bytes:
+    raw = text.encode('latin-1', 'replace')
+    return raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+# No Helvetica glyph is wider than one em, so shorter strings always fit
+_MAX_GLYPH_WIDTH = FONT_SIZE * 1.0
+
+
+def stringWidth(text: str, font: str, size: float) -> float:
+    """ReportLab's font metrics, imported on first use to keep app startup fast."""
+    global stringWidth
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return stringWidth(text, font, size)
+
+
+def _fit(text: str, width: float, font: str) -> str:
+    """Truncate text with an ellipsis so it fits in ``width`` points."""
+    if len(text) * _MAX_GLYPH_WIDTH <= width or stringWidth(text, font, FONT_SIZE) <= width:
+        return text
+    while text and stringWidth(text + '...', font, FONT_SIZE) > width:
+        text = text[:-1]
+    return text + '...'
+
+
+class Section:
+    """A titled table whose rows are consumed lazily."""
+
+    def __init__(self, title: str, headers: Sequence[str], widths: Sequence[float], rows: Iterable[Sequence], empty_text: str = ''):
+        self.title = title
+        self.headers = list(headers)
+        self.widths = list(widths)
+        self.rows = rows
+        self.empty_text = empty_text
+
+
+class StreamingPdf:
+    """Write a multi-page table report page by page."""
+
+    def __init__(self):
+        self._offsets: List[Tuple[int, int]] = []
+        self._position = 0
+        self._next_obj = FIRST_FREE_OBJ
+        self._page_objs: List[int] = []
+        self._ops: List[bytes] = []
+        self._y = PAGE_HEIGHT - MARGIN
+
+    def _emit(self, data: bytes) -> bytes:
+        self._position += len(data)
+        return data
+
+    def _object(self, number: int, body: bytes) -> bytes:
+        self._offsets.append((number, self._position))
+        return self._emit(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def _text(self, x: float, y: float, text: str, font: str = 'F1', size: float = FONT_SIZE, gray: float = 0):
+        self._ops.append(f"{gray} g BT /{font} {size} Tf {x:.1f} {y:.1f} Td (".encode() + _escape(text) + b") Tj ET")
+
+    def _rect(self, x: float, y: float, w: float, h: float, gray: float):
+        self._ops.append(f"{gray} g {x:.1f} {y:.1f} {w:.1f} {h:.1f} re f".encode())
+
+    def _line(self, x0: float, y0: float, x1: float, y1: float):
+        self._ops.append(f"0 G 0.5 w {x0:.1f} {y0:.1f} m {x1:.1f} {y1:.1f} l S".encode())
+
+    def _flush_page(self) -> bytes:
+        """Emit the current page's content stream and page object."""
+        content = b"\n".join(self._ops)
+        content_obj = self._next_obj
+        page_obj = self._next_obj + 1
+        self._next_obj += 2
+        self._page_objs.append(page_obj)
+        self._ops = []
+        self._y = PAGE_HEIGHT - MARGIN
+
+        out = self._object(content_obj, f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream")
+        out += self._object(page_obj, (
+            f"<< /Type /Page /Parent {PAGES_OBJ} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {FONT_OBJ} 0 R /F2 {BOLD_FONT_OBJ} 0 R >> >> "
+            f"/Contents {content_obj} 0 R >>"
+        ).encode())
+        return out
+
+    def _ensure_space(self, height: float) -> bytes:
+        if self._y - height < MARGIN:
+            return self._flush_page()
+        return b''
+
+    def _paragraph(self, text: str, size: float, font: str = 'F2') -> bytes:
+        out = self._ensure_space(size + 10)
+        self._y -= size + 6
+        self._text(MARGIN, self._y, text, font, size)
+        self._y -= 4
+        return out
+
+    def _row(self, cells: Sequence, widths: Sequence[float], header: bool) -> bytes:
+        out = self._ensure_space(ROW_HEIGHT)
+        top = self._y
+        bottom = top - ROW_HEIGHT
+        total = sum(widths)
+        font = 'F2' if header else 'F1'
+        font_name = 'Helvetica-Bold' if header else 'Helvetica'
+        if header:
+            self._rect(MARGIN, bottom, total, ROW_HEIGHT, 0.5)
+        x = MARGIN
+        for cell, width in zip(cells, widths):
+            text = _fit('' if cell is None else str(cell), width - 2 * CELL_PADDING, font_name)
+            self._text(x + CELL_PADDING, bottom + 5, text, font, FONT_SIZE, 1 if header else 0)
+            x += width
+        self._line(MARGIN, bottom, MARGIN + total, bottom)
+        self._y = bottom
+        return out
+
+    def render(self, title: str, generated_at: datetime, summary: Sequence[Tuple[str, object]], sections: Sequence[Section]) -> Iterator[bytes]:
+        yield self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        yield self._object(CATALOG_OBJ, f"<< /Type /Catalog /Pages {PAGES_OBJ} 0 R >>".encode())
+        yield self._object(FONT_OBJ, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        yield self._object(BOLD_FONT_OBJ, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+        yield self._paragraph(title, TITLE_SIZE)
+        yield self._paragraph(f"Generated on: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}", FONT_SIZE + 1, 'F1')
+
+        yield self._paragraph("Summary", HEADING_SIZE)
+        widths = [200, 100]
+        yield self._row(['Metric', 'Count'], widths, True)
+        for label, value in summary:
+            yield self._row([label, value], widths, False)
+
+        for section in sections:
+            # Keep the heading, header row and first data row together
+            yield self._ensure_space(ROW_HEIGHT * 3 + HEADING_SIZE + 10)
+            self._y -= ROW_HEIGHT
+            yield self._paragraph(section.title, HEADING_SIZE)
+            yield self._row(section.headers, section.widths, True)
+            empty = True
+            for row in section.rows:
+                empty = False
+                if self._y - ROW_HEIGHT < MARGIN:
+                    # Repeat the header at the top of each new page
+                    yield self._flush_page()
+                    yield self._row(section.headers, section.widths, True)
+                yield self._row(row, section.widths, False)
+            if empty and section.empty_text:
+                yield self._paragraph(section.empty_text, FONT_SIZE + 1, 'F1')
+
+        if self._ops or not self._page_objs:
+            yield self._flush_page()
+
+        kids = ' '.join(f"{n} 0 R" for n in self._page_objs)
+        yield self._object(PAGES_OBJ, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_objs)} >>".encode())
+
+        xref_position = self._position
+        offsets = dict(self._offsets)
+        size = self._next_obj
+        xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for number in range(1, size):
+            xref.append(f"{offsets.get(number, 0):010d} 00000 n \n")
+        yield self._emit(''.join(xref).encode())
+        yield self._emit(f"trailer\n<< /Size {size} /Root {CATALOG_OBJ} 0 R >>\nstartxref\n{xref_position}\n%%EOF\n".encode())
+
+
+def stream_csv(headers: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """CSV text in small pieces, one row per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(['' if cell is None else cell for cell in row])
+        yield buffer.getvalue()
+
+
+def stream_ndjson(records: Iterable[dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, default=str) + '\n'
@@ -0,0 +1,106 @@
+"""
+PDF rendering for police safety reports.
+
+Rendering works from a plain snapshot dict so it can run on a background
+thread without touching the database session. ReportLab is imported on the
+first render: it is the slowest import in the app and most processes never
+render a report.
+"""
+
+from datetime import datetime
+from io import BytesIO
+
+
+def _table_style(header_font_size):
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), header_font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+
+def render_summary_pdf(snapshot) -> bytes:
+    """Render the summary report.
+
+    ``snapshot`` holds 'generated_at' (datetime), 'summary' (counts),
+    'tourists' rows of (tourist_id, name, safety_score, status, location)
+    and 'alerts' rows of (id, type, severity, location, created_at).
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    # Title
+    story.append(Paragraph("Tourist Safety Management System - Report", styles['Title']))
+    story.append(Spacer(1, 20))
+
+    # Current date
+    generated_at = snapshot.get('generated_at') or datetime.now()
+    story.append(Paragraph(f"Generated on: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
+    story.append(Spacer(1, 20))
+
+    # Summary section
+    story.append(Paragraph("Summary", styles['Heading1']))
+    summary = snapshot['summary']
+    summary_data = [
+        ['Metric', 'Count'],
+        ['Total Tourists', str(summary['tourists'])],
+        ['Active Alerts', str(summary['active_alerts'])],
+        ['Total Geo Zones', str(summary['zones'])],
+        ['High Risk Zones', str(summary['restricted_zones'])]
+    ]
+    summary_table = Table(summary_data)
+    summary_table.setStyle(_table_style(14))
+    story.append(summary_table)
+    story.append(Spacer(1, 30))
+
+    # Tourists section
+    story.append(Paragraph("Tourist Details", styles['Heading1']))
+    tourist_data = [['Tourist ID', 'Name', 'Safety Score', 'Status', 'Location']]
+    for tourist_id, name, safety_score, status, location in snapshot['tourists']:
+        tourist_data.append([
+            tourist_id,
+            name or 'Unknown',
+            safety_score or '0',
+            status or 'safe',
+            location or 'Unknown'
+        ])
+    tourist_table = Table(tourist_data)
+    tourist_table.setStyle(_table_style(12))
+    story.append(tourist_table)
+    story.append(Spacer(1, 30))
+
+    # Alerts section
+    story.append(Paragraph("Active Alerts", styles['Heading1']))
+    alert_data = [['Alert ID', 'Type', 'Severity', 'Location', 'Created']]
+    for alert_id, alert_type, severity, location, created_at in snapshot['alerts']:
+        alert_data.append([
+            alert_id[:8] + '...',
+            alert_type,
+            severity,
+            location or 'Unknown',
+            created_at.strftime('%Y-%m-%d %H:%M') if created_at else 'Unknown'
+        ])
+
+    if len(alert_data) > 1:
+        alert_table = Table(alert_data)
+        alert_table.setStyle(_table_style(12))
+        story.append(alert_table)
+    else:
+        story.append(Paragraph("No active alerts", styles['Normal']))
+
+    doc.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,112 @@
+"""
+Serialized response cache with write-driven invalidation.
+
+Each cached body lists the resource sets it was built from ('zones',
+'tourists', 'tourist:<id>', ...). Writes invalidate resource sets by name,
+which stamps them with a new value of one global counter. An entry stays
+valid while none of its resources has been stamped since the moment its
+query began, so a write that commits while the body is being built is never
+masked. ETags hash the body, so they are strong and agree across processes.
+
+Stamps are bounded: old ones are folded into a floor that stands for every
+resource not stamped since, which can only make entries older than it stale.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional
+
+# Entries and total body bytes kept before the least recently used are dropped
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Resource stamps kept before the oldest are folded into the floor
+DEFAULT_MAX_STAMPS = 8192
+
+
+class CachedResponse:
+    __slots__ = ('body', 'etag', 'resources', 'as_of', 'shared')
+
+    def __init__(self, body: bytes, resources, as_of: int, shared):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.resources = tuple(resources)
+        self.as_of = as_of
+        self.shared = shared
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_stamps: int = DEFAULT_MAX_STAMPS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_stamps = max_stamps
+        self._clock = 0
+        self._stamps: Dict[str, int] = {}
+        self._floor = 0  # stamp of every resource missing from _stamps
+        self._entries: 'OrderedDict[Hashable, CachedResponse]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> int:
+        """Take before running the queries behind a body; pass to ``put``."""
+        return self._clock
+
+    def invalidate(self, resources: Iterable[str]):
+        with self._lock:
+            self._clock += 1
+            for resource in resources:
+                self._stamps[resource] = self._clock
+            if len(self._stamps) > self.max_stamps:
+                self._prune_locked()
+
+    def _prune_locked(self):
+        """Forget stamps no entry is older than, or failing that the oldest, with their entries."""
+        floor = min((entry.as_of for entry in self._entries.values()), default=self._clock)
+        keep = self.max_stamps // 2
+        newer = sorted(stamp for stamp in self._stamps.values() if stamp > floor)
+        if len(newer) > keep:
+            floor = newer[-keep - 1]
+            for key in [key for key, entry in self._entries.items() if entry.as_of < floor]:
+                self._drop_locked(key)
+        self._stamps = {resource: stamp for resource, stamp in self._stamps.items() if stamp > floor}
+        self._floor = floor
+
+    def get(self, key: Hashable, shared=None) -> Optional[CachedResponse]:
+        """The cached entry for ``key`` if none of its resources changed since it was built."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.shared != shared or any(self._stamps.get(r, self._floor) > entry.as_of for r in entry.resources):
+                self._drop_locked(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, body: bytes, resources: Iterable[str], as_of: int, shared=None) -> CachedResponse:
+        entry = CachedResponse(body, resources, as_of, shared)
+        with self._lock:
+            # Already stale if a resource changed while the body was built; serve it once, don't keep it
+            if any(self._stamps.get(r, self._floor) > as_of for r in entry.resources) or len(body) > self.max_bytes:
+                return entry
+            self._drop_locked(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop_locked(next(iter(self._entries)))
+        return entry
+
+    def _drop_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
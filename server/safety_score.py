@@ -0,0 +1,95 @@
+"""
+Safety score model and the queue of tourists whose score needs recomputing.
+
+A score is a pure function of a tourist's current situation: open alerts,
+the zones they are in, how long since their last fix, and whether they are
+off their itinerary. Events only mark a tourist as affected; a background
+batch later recomputes just those tourists from their current facts, so the
+request path never pays for scoring and repeated events coalesce.
+"""
+
+import threading
+from decimal import Decimal
+from typing import Iterable, Optional, Set
+
+BASE_SCORE = 100
+
+# Penalty for each open alert, by severity
+ALERT_PENALTY = {
+    'critical': 25,
+    'high': 15,
+    'medium': 8,
+    'low': 3
+}
+
+# Penalty for being inside a zone, by zone type
+ZONE_PENALTY = {
+    'restricted': 30,
+    'caution': 10
+}
+
+# (seconds since the last fix, penalty) in increasing order; the last one reached applies
+STALENESS_PENALTY = [
+    (900, 5),
+    (3600, 10),
+    (21600, 20)
+]
+
+DEVIATION_PENALTY = 10
+
+_CENT = Decimal('0.01')
+
+
+def staleness_penalty(seconds: Optional[float]) -> int:
+    if seconds is None:
+        return STALENESS_PENALTY[-1][1]
+    penalty = 0
+    for threshold, value in STALENESS_PENALTY:
+        if seconds >= threshold:
+            penalty = value
+    return penalty
+
+
+def compute_score(alert_severities: Iterable[str], zone_types: Iterable[str],
+                  seconds_since_update: Optional[float], off_itinerary: bool = False) -> Decimal:
+    """Score between 0 and 100 with two decimals."""
+    score = BASE_SCORE
+    score -= sum(ALERT_PENALTY.get(severity, 0) for severity in alert_severities)
+    score -= sum(ZONE_PENALTY.get(zone_type, 0) for zone_type in zone_types)
+    score -= staleness_penalty(seconds_since_update)
+    if off_itinerary:
+        score -= DEVIATION_PENALTY
+    return Decimal(max(0, min(BASE_SCORE, score))).quantize(_CENT)
+
+
+class ScoreQueue:
+    """Tourists awaiting a recompute."""
+
+    def __init__(self):
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def mark(self, tourist_id: str):
+        with self._lock:
+            self._pending.add(tourist_id)
+
+    def mark_many(self, tourist_ids: Iterable[str]):
+        with self._lock:
+            self._pending.update(tourist_ids)
+
+    def drain(self, limit: Optional[int] = None) -> Set[str]:
+        """Take up to ``limit`` pending tourists."""
+        with self._lock:
+            if limit is None or len(self._pending) <= limit:
+                taken, self._pending = self._pending, set()
+                return taken
+            taken = set()
+            while len(taken) < limit:
+                taken.add(self._pending.pop())
+            return taken
+
+    def requeue(self, tourist_ids: Iterable[str]):
+        self.mark_many(tourist_ids)
+
+    def __len__(self):
+        return len(self._pending)
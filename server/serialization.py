@@ -0,0 +1,167 @@
+"""
+Fast JSON encoding for list endpoints.
+
+List endpoints select only the columns they return and encode the row
+tuples directly, without building ORM instances. Every synced row carries a
+change version (see Delta sync in app.py), so each row's encoded JSON is
+kept and reused until its version moves. Listing first reads just (id,
+version) pairs, so a list of mostly unchanged rows costs one narrow query
+plus a join of cached fragments; full rows are fetched only for the rest.
+orjson is used when installed; otherwise the standard library encoder with
+compact separators.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+# Encoded rows kept before the least recently used are dropped
+DEFAULT_MAX_ROWS = 200000
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False, default=_default)
+
+
+def dumps(obj) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return _encoder.encode(obj).encode()
+
+
+def join_array(fragments: Iterable[bytes]) -> bytes:
+    """A JSON array from already encoded elements"""
+    return b'[' + b','.join(fragments) + b']'
+
+
+class RowCache:
+    """Encoded rows by id, in one table per (kind, fields) signature; each
+    encoding is valid for one row version. Least recently used rows are
+    dropped once ``max_rows`` are held across all tables."""
+
+    def __init__(self, max_rows: int = DEFAULT_MAX_ROWS):
+        self.max_rows = max_rows
+        self._tables: 'Dict[Hashable, OrderedDict[Hashable, Tuple[int, bytes]]]' = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, sig: Hashable, keys: Sequence[Sequence]) -> List[Optional[bytes]]:
+        """Cached encodings for rows starting (id, version), None where missing or outdated."""
+        with self._lock:
+            table = self._tables.get(sig)
+            if not table:
+                return [None] * len(keys)
+            get = table.get
+            touch = table.move_to_end
+            found = []
+            for key in keys:
+                entry = get(key[0])
+                if entry is not None and entry[0] == key[1]:
+                    touch(key[0])
+                    found.append(entry[1])
+                else:
+                    found.append(None)
+        return found
+
+    def store(self, sig: Hashable, items: Iterable[Tuple[Hashable, int, bytes]]):
+        """Keep (id, version, encoded) triples."""
+        with self._lock:
+            table = self._tables.setdefault(sig, OrderedDict())
+            before = len(table)
+            for key, version, data in items:
+                table[key] = (version, data)
+                table.move_to_end(key)
+            self._size += len(table) - before
+            while self._size > self.max_rows:
+                # Evict from the largest table, oldest rows first
+                largest = max(self._tables.values(), key=len)
+                largest.popitem(last=False)
+                self._size -= 1
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self._size = 0
+
+    def __len__(self):
+        return self._size
+
+
+def encode_rows(rows, formatters: Sequence[Tuple[str, Optional[Callable]]], fields: Sequence[str],
+                cache: Optional[RowCache] = None, kind: Hashable = None,
+                bypass: Optional[Callable] = None, overlay: Optional[Callable] = None) -> List[bytes]:
+    """Encode projected rows as JSON objects of ``fields``.
+
+    ``formatters`` lists (name, formatter) for every labelled column needed;
+    ``fields`` is the subset returned, in order. With a cache, rows must also
+    carry ``id`` and ``version`` columns. Rows for which ``bypass(row)`` is
+    true have data the database doesn't hold yet: they skip the cache and
+    their item dicts are passed through ``overlay`` before encoding.
+    """
+    sig = (kind, tuple(fields))
+    skipped = [bool(bypass(row)) for row in rows] if bypass is not None else None
+    hits = cache.lookup(sig, [(row.id, row.version) for row in rows]) if cache is not None else None
+    only_fields = [name for name, _ in formatters] == list(fields)
+    fragments = []
+    new = []
+    for i, row in enumerate(rows):
+        skip = skipped is not None and skipped[i]
+        if hits is not None and hits[i] is not None and not skip:
+            fragments.append(hits[i])
+            continue
+        mapping = row._mapping
+        item = {name: fmt(mapping[name]) if fmt else mapping[name] for name, fmt in formatters}
+        if skip and overlay is not None:
+            overlay(item)
+        data = dumps(item if only_fields else {name: item[name] for name in fields})
+        fragments.append(data)
+        if cache is not None and not skip:
+            new.append((row.id, row.version, data))
+    if new:
+        cache.store(sig, new)
+    return fragments
+
+
+def encode_keyed(keys, fetch: Callable, formatters: Sequence[Tuple[str, Optional[Callable]]],
+                 fields: Sequence[str], cache: RowCache, kind: Hashable = None,
+                 bypass: Optional[Callable] = None, overlay: Optional[Callable] = None) -> List[bytes]:
+    """Encode the rows listed by ``keys`` (rows starting (id, version), in output order).
+
+    ``fetch(ids)`` returns the full projected rows, with versions, for those
+    ids, or for every key when passed None; it is only called for rows not
+    cached at their current version. Rows that vanished in between are left
+    out. ``bypass`` and ``overlay`` are as for encode_rows.
+    """
+    sig = (kind, tuple(fields))
+    hits = cache.lookup(sig, keys)
+    if bypass is not None:
+        hits = [None if bypass(key) else hit for key, hit in zip(keys, hits)]
+    missing = [key[0] for key, hit in zip(keys, hits) if hit is None]
+    if not missing:
+        return hits
+
+    # Mostly misses: one pass over the original query beats many id lookups
+    rows = fetch(None if len(missing) * 2 > len(keys) else missing)
+    encoded = dict(zip([row.id for row in rows], encode_rows(rows, formatters, fields, cache, kind, bypass, overlay)))
+    fragments = []
+    for key, hit in zip(keys, hits):
+        data = hit if hit is not None else encoded.get(key[0])
+        if data is not None:
+            fragments.append(data)
+    return fragments
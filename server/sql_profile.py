@@ -0,0 +1,77 @@
+"""
+Per-request SQL profiling.
+
+A profile counts the statements a request runs and their total time, and
+groups them by fingerprint: the statement with literals, bound values and
+IN lists collapsed, so the same query issued for every row of a loop shows
+up as one fingerprint repeated many times (an N+1). Endpoints can declare a
+query budget that the profile is checked against.
+"""
+
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+
+# A fingerprint run this many times in one request is reported as a likely N+1
+DEFAULT_REPEAT_THRESHOLD = 5
+
+# Fingerprints listed in the debug header, most repeated first
+HEADER_FINGERPRINTS = 3
+HEADER_FINGERPRINT_LENGTH = 120
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|:\w+|\?')
+_SPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """An endpoint ran more statements than its declared budget."""
+
+
+def fingerprint(statement: str) -> str:
+    """The statement with values normalized, for grouping repeats."""
+    text = _SPACE.sub(' ', statement).strip()
+    text = _STRING.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    text = _PLACEHOLDER.sub('?', text)
+    return _PLACEHOLDER_LIST.sub('(...)', text)
+
+
+class QueryProfile:
+    __slots__ = ('count', 'seconds', 'fingerprints')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """(fingerprint, count) for fingerprints run at least ``threshold`` times, most first."""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+    def header(self) -> str:
+        """One-line summary for the X-SQL-Profile debug header."""
+        parts = [f"count={self.count}", f"time_ms={self.seconds * 1000:.1f}"]
+        for fp, n in self.repeated()[:HEADER_FINGERPRINTS]:
+            text = fp[:HEADER_FINGERPRINT_LENGTH].replace(';', ',')
+            parts.append(f"repeat={n}x {text}")
+        # Header values must be latin-1; keep it plain ASCII
+        return '; '.join(parts).encode('ascii', 'replace').decode()
+
+    def over_budget(self, budget: Optional[int]) -> bool:
+        return budget is not None and self.count > budget
+
+
+def query_budget(limit: int):
+    """Declare the most statements a view may run per request."""
+    def decorate(view):
+        view.query_budget = limit
+        return view
+    return decorate
@@ -0,0 +1,75 @@
+"""
+Incrementally maintained counters for the police statistics.
+
+Writes feed deltas into the counters as they commit, so reading the stats is
+O(1). Counters are periodically reconciled against SQL aggregates to correct
+drift from other worker processes or writes that bypass the ORM.
+"""
+
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, Optional
+
+FIELDS = ('tourists', 'active_alerts', 'restricted_zones', 'score_sum')
+
+
+class StatsCounters:
+    def __init__(self, reconcile_fn: Callable[[], Dict[str, object]], cache_ttl: float = 2.0):
+        self.reconcile_fn = reconcile_fn
+        self.cache_ttl = cache_ttl
+        self._values: Dict[str, object] = {}
+        self._cached: Optional[Dict[str, str]] = None
+        self._cached_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._values)
+
+    def apply(self, delta: Dict[str, object]):
+        """Add committed deltas; ignored until the first reconcile."""
+        if not delta:
+            return
+        with self._lock:
+            if not self._values:
+                return
+            for key, value in delta.items():
+                self._values[key] = self._values[key] + value
+            self._cached = None
+
+    def reconcile(self):
+        """Reset counters from the authoritative SQL aggregates."""
+        values = self.reconcile_fn()
+        with self._lock:
+            self._values = {
+                'tourists': int(values['tourists']),
+                'active_alerts': int(values['active_alerts']),
+                'restricted_zones': int(values['restricted_zones']),
+                'score_sum': Decimal(str(values['score_sum'] or 0)),
+            }
+            self._cached = None
+
+    def snapshot(self) -> Dict[str, str]:
+        """Stats in the /api/police/stats response shape."""
+        now = time.monotonic()
+        cached = self._cached
+        if cached is not None and now - self._cached_at < self.cache_ttl:
+            return cached
+
+        if not self._values:
+            self.reconcile()
+
+        with self._lock:
+            values = dict(self._values)
+        tourists = values['tourists']
+        average = float(values['score_sum']) / tourists if tourists > 0 else 0.0
+        stats = {
+            'activeTourists': max(tourists, 0),
+            'activeAlerts': max(values['active_alerts'], 0),
+            'highRiskZones': max(values['restricted_zones'], 0),
+            'averageSafetyScore': f"{average:.1f}"
+        }
+        self._cached = stats
+        self._cached_at = now
+        return stats
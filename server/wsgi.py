@@ -0,0 +1,9 @@
+"""
+WSGI entry point for production servers:
+
+    cd server && gunicorn wsgi:app
+"""
+
+from app import app
+
+application = app
@@ -290,9 +290,10 @@ async function addItineraryItem(item) {
         
         toast.show('Itinerary item added successfully', 'success');
         
-        // Update stored tourist data with response
+        // Keep stored tourist data in step with the new item
         if (response) {
-            storage.set('tourist', response);
+            tourist.itinerary = [...(tourist.itinerary || []), response];
+            storage.set('tourist', tourist);
         }
         
         // Refresh page to show updated data
@@ -327,19 +328,14 @@ async function addEmergencyContact(contact) {
             throw new Error('Tourist information not found');
         }
         
-        // Get current contacts and add new one
-        const currentContacts = tourist.emergencyContacts || [];
-        const updatedContacts = [...currentContacts, contact];
-        
-        const response = await apiRequest('PUT', `/api/tourist/contacts/${tourist.id}`, {
-            emergencyContacts: updatedContacts
-        });
+        const response = await apiRequest('POST', `/api/tourist/contacts/${tourist.id}`, contact);
         
         toast.show('Emergency contact added successfully', 'success');
         
-        // Update stored tourist data with response
+        // Keep stored tourist data in step with the new contact
         if (response) {
-            storage.set('tourist', response);
+            tourist.emergencyContacts = [...(tourist.emergencyContacts || []), response];
+            storage.set('tourist', tourist);
         }
         
         // Refresh page to show updated data
@@ -366,26 +362,77 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
-// Auto-refresh alerts every 30 seconds
-setInterval(() => {
-    refreshAlerts();
-}, 30000);
+// Live alert feed: Server-Sent Events, with 30-second polling as a fallback
+let alertStream = null;
+let alertPollTimer = null;
+
+function subscribeToAlerts() {
+    const tourist = storage.get('tourist');
+    if (!tourist || !tourist.touristId) return;
+    
+    if (typeof EventSource === 'undefined') {
+        startAlertPolling();
+        return;
+    }
+    
+    alertStream = new EventSource(`/api/tourist/alerts/${tourist.touristId}/stream`);
+    
+    // Fall back to polling if the stream can't be opened (e.g. a buffering proxy)
+    const openTimeout = setTimeout(() => {
+        if (alertStream && alertStream.readyState !== EventSource.OPEN) {
+            alertStream.close();
+            alertStream = null;
+            startAlertPolling();
+        }
+    }, 10000);
+    
+    alertStream.addEventListener('open', () => clearTimeout(openTimeout));
+    
+    alertStream.addEventListener('alert.created', () => {
+        toast.show('New alerts received', 'warning');
+    });
+    
+    alertStream.addEventListener('alert.updated', (event) => {
+        const alert = JSON.parse(event.data);
+        if (alert.status === 'resolved') {
+            toast.show('An alert has been resolved', 'success');
+        }
+    });
+    
+    alertStream.onerror = () => {
+        // EventSource reconnects by itself unless the server refused the stream
+        if (alertStream && alertStream.readyState === EventSource.CLOSED) {
+            clearTimeout(openTimeout);
+            alertStream = null;
+            startAlertPolling();
+        }
+    };
+}
+
+function startAlertPolling() {
+    if (alertPollTimer !== null) return;
+    alertPollTimer = setInterval(() => {
+        refreshAlerts();
+    }, 30000);
+}
+
+document.addEventListener('DOMContentLoaded', subscribeToAlerts);
 
 async function refreshAlerts() {
     try {
         const tourist = storage.get('tourist');
         if (!tourist || !tourist.touristId) return;
         
-        const alerts = await apiRequest('GET', `/api/tourist/alerts/${tourist.touristId}`);
+        // Only what changed since the last sync is sent back
+        const since = storage.get('syncVersion') || 0;
+        const changes = await apiRequest('GET', `/api/tourist/sync/${tourist.touristId}?since=${since}`);
+        storage.set('syncVersion', changes.version);
         
-        // Update alert count in UI if needed
-        const currentAlertCount = document.querySelectorAll('[data-testid^="alert-"]').length;
-        if (alerts.length > currentAlertCount) {
-            // New alerts available, could show notification
+        if (!changes.reset && changes.alerts.some(alert => alert.status === 'active')) {
             toast.show('New alerts received', 'warning');
         }
         
     } catch (error) {
         console.error('Failed to refresh alerts:', error);
     }
-}
\ No newline at end of file
+}
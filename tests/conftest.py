@@ -0,0 +1,38 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# Server modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server'))
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """The app module on a throwaway SQLite database with demo data, under app.testing"""
+    # The database URL is read once, at import; don't leak it to anything else
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('DATABASE_URL', 'sqlite:///' + str(tmp_path_factory.mktemp('db') / 'test.db'))
+        import app as appmod
+    appmod.init_database()
+    appmod.app.testing = True
+    yield appmod
+    appmod.app.testing = False
+
+
+# Midday on a fixed date, for tests that need itinerary windows to be open
+FROZEN_NOW = datetime(2026, 3, 14, 12, 0)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return FROZEN_NOW if tz is None else FROZEN_NOW.astimezone(tz)
+
+
+@pytest.fixture
+def frozen_now(app, monkeypatch):
+    """Freeze the app's clock at FROZEN_NOW"""
+    monkeypatch.setattr(app, 'datetime', FrozenDatetime)
+    return FROZEN_NOW
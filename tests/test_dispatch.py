@@ -0,0 +1,50 @@
+import random
+
+from dispatch import plan_dispatch
+from proximity import ProximityIndex
+
+
+def officers_around(lat, lng, count, spread, seed=1):
+    rng = random.Random(seed)
+    index = ProximityIndex()
+    index.load((f"officer-{i}", lat + rng.uniform(-spread, spread), lng + rng.uniform(-spread, spread))
+               for i in range(count))
+    return index
+
+
+def test_clustered_burst_assigns_every_alert():
+    # 30 panic alerts within ~30 m share the same 8 nearest officers; 40 free
+    # officers within ~2 km must still cover all of them
+    officers = officers_around(15.55, 73.75, 40, 0.01)
+    rng = random.Random(2)
+    alerts = [(f"alert-{i}", 15.55 + rng.uniform(-0.0003, 0.0003), 73.75 + rng.uniform(-0.0003, 0.0003), 'critical')
+              for i in range(30)]
+
+    assignments, unassigned = plan_dispatch(alerts, officers, max_distance=20000)
+
+    assert unassigned == []
+    assert len({officer_id for _, officer_id, _ in assignments}) == 30
+
+
+def test_officer_shortage_leaves_least_severe_waiting():
+    officers = officers_around(15.55, 73.75, 3, 0.005)
+    alerts = [
+        ('low', 15.55, 73.75, 'low'),
+        ('critical-1', 15.551, 73.75, 'critical'),
+        ('critical-2', 15.549, 73.75, 'critical'),
+        ('high', 15.55, 73.751, 'high'),
+    ]
+
+    assignments, unassigned = plan_dispatch(alerts, officers, max_distance=20000)
+
+    assert unassigned == ['low']
+    assert {alert_id for alert_id, _, _ in assignments} == {'critical-1', 'critical-2', 'high'}
+
+
+def test_officers_beyond_max_distance_are_not_used():
+    officers = officers_around(16.5, 73.75, 5, 0.001)
+
+    assignments, unassigned = plan_dispatch([('far', 15.55, 73.75, 'critical')], officers, max_distance=20000)
+
+    assert assignments == []
+    assert unassigned == ['far']
@@ -0,0 +1,109 @@
+from geofence import GeofenceIndex, Zone
+
+SQUARE = [{'lat': 0.0, 'lng': 0.0}, {'lat': 0.0, 'lng': 1.0}, {'lat': 1.0, 'lng': 1.0}, {'lat': 1.0, 'lng': 0.0}]
+
+
+def test_reload_keeps_old_zones_visible():
+    index = GeofenceIndex(cell_size=0.5)
+    index.load([('a', 'caution', 'A', SQUARE)])
+    seen = []
+
+    def zones():
+        # Lookups while the new zones are still being read
+        seen.append(index.locate(0.5, 0.5))
+        yield ('b', 'restricted', 'B', SQUARE)
+        seen.append(index.locate(0.5, 0.5))
+
+    index.load(zones())
+    assert seen == [{'a'}, {'a'}]
+    assert index.locate(0.5, 0.5) == {'b'}
+    assert index.get('a') is None
+
+
+def square(lat0, lng0, lat1, lng1):
+    return [{'lat': lat0, 'lng': lng0}, {'lat': lat0, 'lng': lng1}, {'lat': lat1, 'lng': lng1}, {'lat': lat1, 'lng': lng0}]
+
+
+# An L shape: the unit square minus its top-right quarter
+L_SHAPE = [{'lat': 0, 'lng': 0}, {'lat': 0, 'lng': 1}, {'lat': 0.5, 'lng': 1},
+           {'lat': 0.5, 'lng': 0.5}, {'lat': 1, 'lng': 0.5}, {'lat': 1, 'lng': 0}]
+
+
+def test_point_in_polygon():
+    zone = Zone('z', 'caution', 'Z', L_SHAPE)
+    assert zone.contains(0.25, 0.25)
+    assert zone.contains(0.75, 0.25)
+    assert zone.contains(0.25, 0.75)
+    # The notch is inside the bounding box but outside the polygon
+    assert not zone.contains(0.75, 0.75)
+    assert not zone.contains(1.5, 0.5)
+    assert not zone.contains(-0.1, 0.5)
+
+
+def test_edges_count_as_inside():
+    zone = Zone('z', 'caution', 'Z', square(0, 0, 1, 1))
+    assert zone.contains(0.5, 0.0)
+    assert zone.contains(0.5, 1.0)
+    assert zone.contains(0.0, 0.5)
+    assert zone.contains(1.0, 0.5)
+    assert zone.contains(0.0, 0.0)
+
+
+def test_zone_spanning_cell_boundaries():
+    index = GeofenceIndex(cell_size=0.5)
+    index.add_zone('a', 'caution', 'A', square(0.4, 0.4, 0.6, 0.6))
+    # Points in each of the four cells the zone touches, and on the shared corner
+    for lat, lng in [(0.45, 0.45), (0.45, 0.55), (0.55, 0.45), (0.55, 0.55), (0.5, 0.5)]:
+        assert index.locate(lat, lng) == {'a'}, (lat, lng)
+    assert index.locate(0.65, 0.5) == set()
+
+
+def test_negative_coordinates_floor_into_cells():
+    index = GeofenceIndex(cell_size=0.5)
+    index.add_zone('w', 'restricted', 'W', square(-0.6, -0.6, -0.4, -0.4))
+    assert index.locate(-0.45, -0.55) == {'w'}
+    assert index.locate(-0.5, -0.5) == {'w'}
+    assert index.locate(0.45, 0.55) == set()
+
+
+def test_large_zone_kept_outside_grid():
+    index = GeofenceIndex(cell_size=0.001)
+    index.add_zone('big', 'caution', 'Big', square(0, 0, 1, 1))
+    assert index._grid == {}
+    assert index.locate(0.5, 0.5) == {'big'}
+    index.remove_zone('big')
+    assert index.locate(0.5, 0.5) == set()
+
+
+def test_replacing_zone_moves_its_cells():
+    index = GeofenceIndex(cell_size=0.5)
+    index.add_zone('a', 'caution', 'A', square(0.1, 0.1, 0.2, 0.2))
+    index.add_zone('a', 'caution', 'A', square(2.1, 2.1, 2.2, 2.2))
+    assert index.locate(0.15, 0.15) == set()
+    assert index.locate(2.15, 2.15) == {'a'}
+    assert len(index) == 1
+
+
+def test_transition_reports_enter_and_exit():
+    index = GeofenceIndex(cell_size=0.5)
+    index.add_zone('a', 'caution', 'A', square(0, 0, 1, 1))
+    index.add_zone('b', 'restricted', 'B', square(2, 2, 3, 3))
+    entered, exited = index.transition(0.5, 0.5, 2.5, 2.5)
+    assert [z.id for z in entered] == ['b']
+    assert [z.id for z in exited] == ['a']
+    assert index.transition(None, None, 0.5, 0.5)[0][0].id == 'a'
+    assert index.transition(0.5, 0.5, 0.6, 0.6) == ([], [])
+
+
+def test_degenerate_zones_ignored():
+    index = GeofenceIndex()
+    index.add_zone('line', 'caution', 'Line', [{'lat': 0, 'lng': 0}, {'lat': 1, 'lng': 1}])
+    index.load([('dot', 'caution', 'Dot', [{'lat': 0, 'lng': 0}])])
+    assert len(index) == 0
+
+
+def test_top_vertex_counts_as_inside():
+    zone = Zone('t', 'caution', 'T', [{'lat': 0, 'lng': 0}, {'lat': 0, 'lng': 2}, {'lat': 1, 'lng': 1}])
+    assert zone.contains(1, 1)
+    assert zone.contains(0, 1)
+    assert not zone.contains(1, 1.5)
@@ -0,0 +1,43 @@
+import uuid
+
+import pytest
+
+# At Old Goa Churches, and well away from it; both outside every demo zone
+ON_PLAN = {'lat': 15.5009, 'lng': 73.9116}
+OFF_PLAN = {'lat': 15.28, 'lng': 73.98}
+
+
+@pytest.fixture
+def planned_tourist(app, frozen_now):
+    """A tourist due at Old Goa Churches at frozen_now"""
+    tid = f'TID-TEST-{uuid.uuid4().hex[:8]}'
+    with app.app.app_context():
+        tourist = app.Tourist(user_id='user-1', tourist_id=tid, status='safe', itinerary=[
+            app.ItineraryEntry(position=0, place='Old Goa Churches', date='2026-03-14', time='10:00 - 15:00')
+        ])
+        app.db.session.add(tourist)
+        app.db.session.commit()
+        return tourist.id, tid
+
+
+def move(app, tid, position):
+    response = app.app.test_client().put(f'/api/tourist/location/{tid}', json=position)
+    assert response.status_code == 200
+    return response.get_json()['status']
+
+
+def test_return_to_plan_clears_caution(app, planned_tourist):
+    tourist_pk, tid = planned_tourist
+    assert move(app, tid, ON_PLAN) == 'safe'
+    assert move(app, tid, OFF_PLAN) == 'caution'
+    assert move(app, tid, ON_PLAN) == 'safe'
+
+
+def test_open_alert_keeps_caution(app, planned_tourist):
+    tourist_pk, tid = planned_tourist
+    assert move(app, tid, OFF_PLAN) == 'caution'
+    response = app.app.test_client().post('/api/police/alerts', json={
+        'touristId': tourist_pk, 'type': 'manual', 'severity': 'medium', 'description': 'Checked in late'
+    })
+    assert response.status_code == 200
+    assert move(app, tid, ON_PLAN) == 'caution'
@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from listing import ListingError, decode_cursor, encode_cursor
+
+# Away from the demo data, so a bbox around it only sees the seeded alerts
+LAT, LNG = 12.3456, 76.5432
+BBOX = f'{LAT - 0.001},{LNG - 0.001},{LAT + 0.001},{LNG + 0.001}'
+
+
+def test_cursor_round_trip():
+    key = ['2026-03-14T12:00:00', 'b7c1']
+    assert decode_cursor(encode_cursor(key)) == key
+    assert decode_cursor(None) is None
+    assert decode_cursor('') is None
+
+
+@pytest.mark.parametrize('token', ['not base64!', encode_cursor(['x'])[:-2], 'eyJhIjoxfQ'])
+def test_invalid_cursor(token):
+    with pytest.raises(ListingError):
+        decode_cursor(token)
+
+
+@pytest.fixture
+def tied_alerts(app):
+    """Five alerts sharing one created_at, so only the id breaks the tie"""
+    created = datetime(2026, 3, 14, 12, 0)
+    with app.app.app_context():
+        tourist = app.Tourist(user_id='user-1', tourist_id=f'TID-TEST-{uuid.uuid4().hex[:8]}')
+        app.db.session.add(tourist)
+        app.db.session.flush()
+        alerts = [app.Alert(tourist_id=tourist.id, type='manual', severity='low', lat=LAT, lng=LNG,
+                            created_at=created) for _ in range(5)]
+        app.db.session.add_all(alerts)
+        app.db.session.commit()
+        return [alert.id for alert in alerts]
+
+
+def test_alert_pages_with_tied_created_at(app, tied_alerts):
+    client = app.app.test_client()
+    seen, cursor = [], None
+    for _ in range(len(tied_alerts)):
+        query = {'bbox': BBOX, 'limit': 2, 'fields': 'id'}
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get('/api/police/alerts', query_string=query)
+        assert response.status_code == 200
+        page = response.get_json()
+        seen += [item['id'] for item in page['items']]
+        cursor = page['nextCursor']
+        if not cursor:
+            break
+    assert seen == sorted(tied_alerts, reverse=True)
+
+
+def test_alert_listing_rejects_bad_cursor(app):
+    response = app.app.test_client().get('/api/police/alerts', query_string={'cursor': encode_cursor(['x'])})
+    assert response.status_code == 400
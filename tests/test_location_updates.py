@@ -0,0 +1,19 @@
+TOURIST = 'TID-2024-001525'
+
+
+def test_buffered_update_matches_synchronous_shape(app, monkeypatch):
+    client = app.app.test_client()
+    synchronous = client.put(f'/api/tourist/location/{TOURIST}', json={'lat': 15.501, 'lng': 73.912}).get_json()
+
+    monkeypatch.setitem(app.app.config, 'LOCATION_WRITE_BEHIND', True)
+    try:
+        buffered = client.put(f'/api/tourist/location/{TOURIST}', json={'lat': 15.502, 'lng': 73.913}).get_json()
+    finally:
+        app.location_buffer.flush()
+
+    assert buffered.pop('buffered') is True
+    assert set(buffered) == set(synchronous)
+    assert buffered['id'] == synchronous['id']
+    assert buffered['status'] == synchronous['status']
+    assert buffered['lastKnownLat'] == '15.50200000'
+    assert buffered['lastUpdate'] > synchronous['lastUpdate']
@@ -0,0 +1,133 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from deadlines import DeadlineWheel
+
+
+def test_wheel_fires_at_deadline():
+    wheel = DeadlineWheel(resolution=10)
+    wheel.arm('a', 100)
+    wheel.arm('b', 200)
+    assert wheel.expired(50) == []
+    assert wheel.expired(100) == ['a']
+    assert 'a' not in wheel and 'b' in wheel
+    assert wheel.expired(100) == []
+    assert wheel.expired(205) == ['b']
+    assert len(wheel) == 0
+
+
+def test_wheel_rearm_moves_deadline():
+    wheel = DeadlineWheel(resolution=10)
+    wheel.arm('a', 100)
+    wheel.expired(50)
+    wheel.arm('a', 300)
+    assert wheel.expired(150) == []
+    assert wheel.expired(300) == ['a']
+
+
+def test_wheel_rearm_in_the_past_fires_next():
+    wheel = DeadlineWheel(resolution=10)
+    wheel.expired(100)
+    wheel.arm('a', 20)
+    assert wheel.expired(110) == ['a']
+
+
+def test_wheel_cancel_and_load():
+    wheel = DeadlineWheel(resolution=10)
+    wheel.arm('a', 100)
+    wheel.cancel('a')
+    assert wheel.expired(1000) == []
+    wheel.load([('b', 1100), ('c', 1500)])
+    assert wheel.loaded
+    assert wheel.expired(1200) == ['b']
+
+
+def test_init_worker_starts_detector(app):
+    # Not left to the first location fix: a worker that gets none must still check
+    assert not app.missing_detector_task.running
+    app.init_worker()
+    try:
+        assert app.missing_detector_task.running
+    finally:
+        app.missing_detector_task.stop()
+
+
+@pytest.fixture
+def silent_tourist(app):
+    """A tourist whose last fix is twice the missing threshold ago"""
+    last_fix = datetime.now() - timedelta(seconds=2 * app.missing_after())
+    with app.app.app_context():
+        tourist = app.Tourist(user_id='user-1', tourist_id=f'TID-TEST-{uuid.uuid4().hex[:8]}',
+                              last_known_lat=15.5, last_known_lng=73.8,
+                              last_update=last_fix, last_fix_at=last_fix)
+        app.db.session.add(tourist)
+        app.db.session.commit()
+        return tourist.id, tourist.tourist_id
+
+
+@pytest.fixture
+def detect(app, monkeypatch):
+    """Run one detector tick on a fresh wheel, which fires past deadlines straight away"""
+    def tick():
+        monkeypatch.setattr(app, 'missing_deadlines', DeadlineWheel())
+        return app.detect_missing_tourists()
+    return tick
+
+
+def missing_alerts(app, tourist_pk):
+    with app.app.app_context():
+        return app.Alert.query.filter_by(tourist_id=tourist_pk, type='missing').count()
+
+
+def test_detector_raises_one_alert(app, silent_tourist, detect):
+    tourist_pk, tid = silent_tourist
+    detect()
+    assert missing_alerts(app, tourist_pk) == 1
+    detect()
+    assert missing_alerts(app, tourist_pk) == 1
+
+
+def test_alerts_do_not_restart_missing_clock(app, silent_tourist, detect):
+    tourist_pk, tid = silent_tourist
+    client = app.app.test_client()
+    assert client.post(f'/api/tourist/panic/{tid}').status_code == 200
+    detect()
+    assert missing_alerts(app, tourist_pk) == 1
+
+
+def test_fix_restarts_missing_clock(app, silent_tourist, detect):
+    tourist_pk, tid = silent_tourist
+    client = app.app.test_client()
+    assert client.put(f'/api/tourist/location/{tid}', json={'lat': 15.5, 'lng': 73.8}).status_code == 200
+    detect()
+    assert missing_alerts(app, tourist_pk) == 0
+
+
+def test_no_alert_without_location_sharing(app, silent_tourist, detect):
+    tourist_pk, tid = silent_tourist
+    with app.app.app_context():
+        app.db.session.get(app.Tourist, tourist_pk).location_sharing = False
+        app.db.session.commit()
+    detect()
+    assert missing_alerts(app, tourist_pk) == 0
+
+
+def test_missing_alert_claimed_once(app, silent_tourist):
+    # Two workers that read the same tourist: only the first claim wins
+    tourist_pk, tid = silent_tourist
+    with app.app.app_context():
+        last_fix = app.db.session.get(app.Tourist, tourist_pk).last_fix_at
+        assert app.claim_missing_alert(tourist_pk, last_fix)
+        assert not app.claim_missing_alert(tourist_pk, last_fix)
+        app.db.session.commit()
+
+
+def test_resolved_missing_alert_not_raised_again(app, silent_tourist, detect):
+    tourist_pk, tid = silent_tourist
+    [alert] = detect()
+    client = app.app.test_client()
+    assert client.put(f'/api/police/alert/{alert.id}', json={'status': 'resolved'}).status_code == 200
+    detect()
+    assert missing_alerts(app, tourist_pk) == 1
@@ -0,0 +1,19 @@
+from proximity import ProximityIndex
+
+
+def test_reload_keeps_old_positions_visible():
+    index = ProximityIndex()
+    index.load([('a', 15.5, 73.8)])
+    seen = []
+
+    def positions():
+        # Queries while the new positions are still being read
+        seen.append([tid for tid, _ in index.within(15.5, 73.8, 100)])
+        yield ('b', 15.5, 73.8)
+        yield ('c', None, None)
+        seen.append([tid for tid, _ in index.within(15.5, 73.8, 100)])
+
+    index.load(positions())
+    assert seen == [['a'], ['a']]
+    assert [tid for tid, _ in index.within(15.5, 73.8, 100)] == ['b']
+    assert len(index) == 1
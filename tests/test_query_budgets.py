@@ -0,0 +1,43 @@
+import pytest
+
+TOURIST = 'TID-2024-001523'
+# At Old Goa Churches, outside every demo zone
+ON_PLAN = {'lat': 15.5009, 'lng': 73.9116}
+# Inside the demo "Restricted Military Area"
+RESTRICTED = {'lat': 15.4825, 'lng': 73.825}
+
+
+@pytest.fixture(params=['local', 'database'])
+def relay(request, app, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'EVENT_RELAY', request.param)
+    return request.param
+
+
+def query_count(response):
+    return int(response.headers['X-SQL-Profile'].split(';')[0].split('=')[1])
+
+
+def off_itinerary(app, tourist_id):
+    with app.app.app_context():
+        return app.db.session.query(app.Tourist.off_itinerary).filter_by(tourist_id=tourist_id).scalar()
+
+
+def test_zone_entry_within_budget(app, relay, frozen_now):
+    client = app.app.test_client()
+    # An itinerary item open at frozen_now, far from the zone, so entering it also goes off-plan
+    client.post(f'/api/tourist/itinerary/{TOURIST}', json={
+        'place': 'Old Goa Churches', 'date': '2026-03-14', 'time': '10:00 - 15:00'
+    })
+    assert client.put(f'/api/tourist/location/{TOURIST}', json=ON_PLAN).status_code == 200
+    assert off_itinerary(app, TOURIST) is False
+    app.itinerary_monitor.invalidate('tourist-1')
+
+    # Raises QueryBudgetExceeded under app.testing when over budget
+    response = client.put(f'/api/tourist/location/{TOURIST}', json=RESTRICTED)
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'alert'
+    assert off_itinerary(app, TOURIST) is True
+    assert query_count(response) <= app.update_location.query_budget
+
+    alerts = client.get(f'/api/tourist/alerts/{TOURIST}').get_json()
+    assert any(alert['type'] == 'geofence' and alert['status'] == 'active' for alert in alerts)
@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server')
+
+
+def test_hot_endpoints_use_indexes():
+    # Its own process and database: the check seeds thousands of rows
+    result = subprocess.run(
+        [sys.executable, 'query_plan.py', '--tourists', '2000', '--alerts', '5000'],
+        cwd=SERVER_DIR, capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout.strip().splitlines()[-1].endswith(' 0 problems')
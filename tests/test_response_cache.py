@@ -0,0 +1,52 @@
+from response_cache import ResponseCache
+
+
+def test_invalidation_drops_entry():
+    cache = ResponseCache()
+    cache.put('zones', b'[]', ['zones'], cache.snapshot())
+    assert cache.get('zones') is not None
+    cache.invalidate(['zones'])
+    assert cache.get('zones') is None
+
+
+def test_write_during_build_is_not_cached():
+    cache = ResponseCache()
+    as_of = cache.snapshot()
+    cache.invalidate(['tourist:1'])
+    cache.put('profile', b'{}', ['tourist:1'], as_of)
+    assert cache.get('profile') is None
+
+
+def test_stamps_stay_bounded():
+    cache = ResponseCache(max_stamps=100)
+    for i in range(10000):
+        cache.invalidate([f'tourist:{i}'])
+    assert len(cache._stamps) <= 100
+
+
+def test_pruning_keeps_fresh_entries_valid():
+    cache = ResponseCache(max_stamps=100)
+    cache.put('zones', b'[]', ['zones'], cache.snapshot())
+    for i in range(1000):
+        cache.invalidate([f'tourist:{i}'])
+    # Far older than the stamps kept, so dropped rather than risk serving it stale
+    assert cache.get('zones') is None
+
+    cache.put('zones', b'[]', ['zones'], cache.snapshot())
+    cache.put('profile', b'{}', ['tourist:7'], cache.snapshot())
+    for i in range(1000, 1040):
+        cache.invalidate([f'tourist:{i}'])
+    assert cache.get('zones') is not None
+    assert cache.get('profile') is not None
+    cache.invalidate(['tourist:7'])
+    assert cache.get('profile') is None
+
+
+def test_pruned_stamps_still_stale_older_builds():
+    cache = ResponseCache(max_stamps=10)
+    as_of = cache.snapshot()
+    for i in range(50):
+        cache.invalidate([f'tourist:{i}'])
+    # tourist:0's own stamp is gone, but the floor still marks it changed after as_of
+    cache.put('profile', b'{}', ['tourist:0'], as_of)
+    assert cache.get('profile') is None
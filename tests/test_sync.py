@@ -0,0 +1,86 @@
+import uuid
+
+import pytest
+
+CONTACT = {'name': 'Asha Rao', 'phone': '+91-9800000000', 'relation': 'Sister'}
+
+
+@pytest.fixture
+def tid(app):
+    """A fresh tourist, so other tests' writes don't show up in its deltas"""
+    tourist_id = f'TID-TEST-{uuid.uuid4().hex[:8]}'
+    with app.app.app_context():
+        app.db.session.add(app.Tourist(user_id='user-1', tourist_id=tourist_id))
+        app.db.session.commit()
+    return tourist_id
+
+
+def sync(app, tid, since):
+    response = app.app.test_client().get(f'/api/tourist/sync/{tid}', query_string={'since': since})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def tombstones(app, entity_ids):
+    with app.app.app_context():
+        rows = app.SyncTombstone.query.filter(app.SyncTombstone.entity_id.in_(entity_ids)).all()
+        return {row.entity_id: row.version for row in rows}
+
+
+def contact_versions(app, tid):
+    with app.app.app_context():
+        tourist = app.Tourist.query.filter_by(tourist_id=tid).one()
+        return {contact.id: contact.version for contact in tourist.emergency_contacts}
+
+
+def test_versions_increase_per_commit(app, tid):
+    client = app.app.test_client()
+    start = sync(app, tid, 0)['version']
+    client.post(f'/api/tourist/contacts/{tid}', json=CONTACT)
+    first = sync(app, tid, start)
+    client.post(f'/api/tourist/contacts/{tid}', json=dict(CONTACT, name='Ravi Rao'))
+    second = sync(app, tid, first['version'])
+
+    assert start < first['version'] < second['version']
+    assert [c['name'] for c in first['emergencyContacts']] == ['Asha Rao']
+    # Only what changed after the version the client already has
+    assert [c['name'] for c in second['emergencyContacts']] == ['Ravi Rao']
+    assert not second['reset'] and second['deleted'] == []
+
+
+def test_delete_leaves_tombstone(app, tid):
+    client = app.app.test_client()
+    item = client.post(f'/api/tourist/itinerary/{tid}', json={
+        'place': 'Fort Aguada', 'date': '2026-03-15', 'time': '09:00 - 11:00'
+    }).get_json()
+    since = sync(app, tid, 0)['version']
+    assert client.delete(f'/api/tourist/itinerary/{tid}/{item["id"]}').status_code == 200
+
+    delta = sync(app, tid, since)
+    assert delta['deleted'] == [{'type': 'itinerary', 'id': item['id']}]
+    assert delta['itinerary'] == []
+    assert tombstones(app, [item['id']])[item['id']] == delta['version']
+    # Already seen: not sent again
+    assert sync(app, tid, delta['version'])['deleted'] == []
+
+
+def test_contacts_replace_tombstones_old_rows(app, tid):
+    client = app.app.test_client()
+    client.post(f'/api/tourist/contacts/{tid}', json=CONTACT)
+    client.post(f'/api/tourist/contacts/{tid}', json=dict(CONTACT, name='Ravi Rao'))
+    old = contact_versions(app, tid)
+    since = sync(app, tid, 0)['version']
+
+    response = client.put(f'/api/tourist/contacts/{tid}', json={
+        'emergencyContacts': [dict(CONTACT, name='Meera Rao')]
+    })
+    assert response.status_code == 200
+    delta = sync(app, tid, since)
+
+    # The delete-orphan cascade tombstones both old rows in the same change as the new one
+    new = contact_versions(app, tid)
+    assert not set(new) & set(old)
+    assert sorted(d['id'] for d in delta['deleted'] if d['type'] == 'contact') == sorted(old)
+    assert set(tombstones(app, list(old)).values()) == set(new.values()) == {delta['version']}
+    assert delta['version'] > since
+    assert [c['name'] for c in delta['emergencyContacts']] == ['Meera Rao']